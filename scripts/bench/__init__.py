@@ -0,0 +1 @@
+#nothing
\ No newline at end of file
@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import math
+import time
+import numpy as np
+from bench.bench_astar import random_legs, synthetic_cost_grid
+from core.astar_engine import SearchGrid, astar
+from core.landmarks import DEFAULT_LANDMARKS, Landmarks
+
+# Usage: python bench/bench_alt.py --size 1000 --legs 10 --landmarks 8
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the landmark (ALT) heuristic with the Euclidean one on the same legs")
+    parser.add_argument("--size", type=int, default=1000, help="Synthetic grid side length in cells")
+    parser.add_argument("--legs", type=int, default=10, help="Number of random legs to plan")
+    parser.add_argument("--landmarks", type=int, default=DEFAULT_LANDMARKS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    grid = synthetic_cost_grid(args.size, args.seed)
+    search_grid = SearchGrid(grid)
+    t0 = time.perf_counter()
+    landmarks = Landmarks.build(grid, args.landmarks, args.seed)
+    print(f"Grid {args.size}x{args.size}: {args.landmarks} landmarks built in {time.perf_counter() - t0:.2f}s, "
+          f"{landmarks.dist_from.nbytes * 2 / 1e6:.0f} MB of float32 rasters\n")
+
+    totals = {"euclid": [0.0, 0], "alt": [0.0, 0]}
+    for start, goal in random_legs(grid, args.legs, args.seed):
+        euclid_stats, alt_stats = {}, {}
+        t0 = time.perf_counter()
+        _, euclid_cost = astar(search_grid, start, goal, euclid_stats)
+        euclid_time = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        _, alt_cost = landmarks.search(search_grid, start, goal, alt_stats)
+        alt_time = time.perf_counter() - t0
+        totals["euclid"][0] += euclid_time
+        totals["euclid"][1] += euclid_stats["expanded"]
+        totals["alt"][0] += alt_time
+        totals["alt"][1] += alt_stats["expanded"]
+        # Both heuristics are admissible, so both searches return the optimal cost
+        same = "ok" if math.isclose(alt_cost, euclid_cost, rel_tol=1e-6) else "MISMATCH"
+        print(f"{start} -> {goal}: euclid {euclid_stats['expanded']:7d} expanded {euclid_time * 1000:7.1f} ms | "
+              f"alt {alt_stats['expanded']:6d} expanded {alt_time * 1000:6.1f} ms [{same}]")
+
+    (euclid_time, euclid_expanded), (alt_time, alt_expanded) = totals["euclid"], totals["alt"]
+    print(f"\nExpanded nodes: {euclid_expanded} -> {alt_expanded} ({euclid_expanded / alt_expanded:.1f}x fewer)")
+    print(f"Query time: {euclid_time:.2f}s -> {alt_time:.2f}s ({euclid_time / alt_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import heapq
+import math
+import time
+import numpy as np
+from scipy.ndimage import gaussian_filter
+from core.astar_engine import SearchGrid, astar
+
+# Usage: python bench/bench_astar.py --size 1500 --legs 5
+
+
+# Heuristic for A*
+def heuristic(a, b):
+    return math.hypot(a[0]-b[0], a[1]-b[1])
+
+
+# Original dict/tuple A*, kept verbatim as the baseline to compare against
+def legacy_astar(grid, start, goal):
+    open_heap = []
+    heapq.heappush(open_heap, (0 + heuristic(start, goal), start))
+    came_from = {}
+    gscore = {start: 0}
+    fscore = {start: heuristic(start, goal)}
+    visited = np.zeros_like(grid, dtype=bool)
+
+    while open_heap:
+        current = heapq.heappop(open_heap)[1]
+        if visited[current[0], current[1]]:
+            continue
+        visited[current[0], current[1]] = True
+        if current == goal:
+            path = []
+            while current in came_from:
+                path.append(current)
+                current = came_from[current]
+            path.append(start)
+            path.reverse()
+            return path, gscore[goal]
+
+        for i, j in [(-1,0), (1,0), (0,-1), (0,1), (-1,-1), (-1,1), (1,-1), (1,1)]:
+            neighbor = (current[0]+i, current[1]+j)
+            if 0 <= neighbor[0] < grid.shape[0] and 0 <= neighbor[1] < grid.shape[1]:
+                if grid[neighbor[0], neighbor[1]] >= 100:
+                    continue
+                move_cost = grid[neighbor[0], neighbor[1]] * (1.414 if i != 0 and j != 0 else 1)
+                tentative_g = gscore[current] + move_cost
+                if tentative_g < gscore.get(neighbor, float('inf')):
+                    came_from[neighbor] = current
+                    gscore[neighbor] = tentative_g
+                    fscore[neighbor] = tentative_g + heuristic(neighbor, goal)
+                    heapq.heappush(open_heap, (fscore[neighbor], neighbor))
+    return None, float('inf')
+
+
+def synthetic_cost_grid(size, seed=0):
+    # Smoothed noise scaled to the 1-10 range generate_cost_grid.py produces
+    rng = np.random.default_rng(seed)
+    terrain = gaussian_filter(rng.random((size, size)), sigma=size / 50)
+    terrain = (terrain - terrain.min()) / (terrain.max() - terrain.min())
+    return 1 + terrain * 9
+
+
+def random_legs(grid, count, seed=0):
+    rng = np.random.default_rng(seed + 1)
+    h, w = grid.shape
+    legs = []
+    for _ in range(count):
+        start = (int(rng.integers(h)), int(rng.integers(w)))
+        goal = (int(rng.integers(h)), int(rng.integers(w)))
+        legs.append((start, goal))
+    return legs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the array-backed A* engine with the legacy dict A*")
+    parser.add_argument("--size", type=int, default=1500, help="Synthetic grid side length in cells")
+    parser.add_argument("--legs", type=int, default=5, help="Number of random legs to plan")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the new engine")
+    args = parser.parse_args()
+
+    grid = synthetic_cost_grid(args.size, args.seed)
+    legs = random_legs(grid, args.legs, args.seed)
+
+    prep_start = time.perf_counter()
+    search_grid = SearchGrid(grid)
+    prep_time = time.perf_counter() - prep_start
+    print(f"Grid {args.size}x{args.size}, padded in {prep_time * 1000:.1f} ms")
+
+    total_new = total_old = 0.0
+    for start, goal in legs:
+        t0 = time.perf_counter()
+        path, cost = astar(search_grid, start, goal)
+        new_time = time.perf_counter() - t0
+        total_new += new_time
+        line = f"{start} -> {goal}: cost {cost:.2f}, {len(path)} cells, engine {new_time:.2f}s"
+
+        if not args.skip_legacy:
+            t0 = time.perf_counter()
+            old_path, old_cost = legacy_astar(grid, start, goal)
+            old_time = time.perf_counter() - t0
+            total_old += old_time
+            match = "ok" if math.isclose(cost, old_cost) and len(old_path) == len(path) else "MISMATCH"
+            line += f", legacy {old_time:.2f}s ({old_time / new_time:.1f}x) [{match}]"
+        print(line)
+
+    print(f"\nEngine total: {total_new:.2f}s")
+    if not args.skip_legacy:
+        print(f"Legacy total: {total_old:.2f}s")
+        print(f"Speedup: {total_old / total_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
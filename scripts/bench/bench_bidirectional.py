@@ -0,0 +1,78 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import json
+import time
+import numpy as np
+from rasterio.transform import Affine, rowcol
+from bench.bench_astar import synthetic_cost_grid
+from core.astar_engine import BLOCKED_COST, SearchGrid, astar, astar_bidirectional
+
+# Usage: python bench/bench_bidirectional.py --legs 5
+#        python bench/bench_bidirectional.py --grid data/processed/cost_grid.npy   (from scripts/, real hub)
+
+COST_GRID_META_PATH = "data/processed/cost_grid_meta.json"
+HUB_PATH = "data/raw/central_hub.json"
+
+
+def load_real_grid(grid_path):
+    # Hub cell from central_hub.json through the transform generate_cost_grid.py stores in the meta file
+    grid = np.load(grid_path)
+    with open(COST_GRID_META_PATH) as f:
+        transform = Affine.from_gdal(*json.load(f)["transform"])
+    with open(HUB_PATH) as f:
+        hub = json.load(f)
+    row, col = rowcol(transform, hub["lon"], hub["lat"])
+    return grid, (int(row), int(col))
+
+
+def hub_legs(grid, hub, count, min_dist, max_dist, rng):
+    """Legs from the hub to random passable cells at a Chebyshev distance in [min_dist, max_dist)."""
+    legs = []
+    while len(legs) < count:
+        radius = int(rng.integers(min_dist, max_dist))
+        angle = rng.uniform(0, 2 * np.pi)
+        goal = (int(hub[0] + radius * np.sin(angle)), int(hub[1] + radius * np.cos(angle)))
+        if 0 <= goal[0] < grid.shape[0] and 0 <= goal[1] < grid.shape[1] and grid[goal] < BLOCKED_COST:
+            legs.append((hub, goal))
+    return legs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare bidirectional A* with astar on short and long legs from the hub")
+    parser.add_argument("--grid", default=None, help="Real cost grid (.npy); default is a synthetic grid with the hub in the middle")
+    parser.add_argument("--size", type=int, default=1000, help="Synthetic grid side length in cells")
+    parser.add_argument("--legs", type=int, default=5, help="Legs per distance class")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.grid:
+        grid, hub = load_real_grid(args.grid)
+    else:
+        grid = synthetic_cost_grid(args.size, args.seed)
+        hub = (args.size // 2, args.size // 2)
+    search_grid = SearchGrid(grid)
+    reach = min(hub[0], hub[1], grid.shape[0] - 1 - hub[0], grid.shape[1] - 1 - hub[1])
+    rng = np.random.default_rng(args.seed)
+    print(f"Grid {grid.shape[0]}x{grid.shape[1]}, hub at {hub}\n")
+
+    for label, lo, hi in (("short", 10, max(11, reach // 8)), ("long", reach // 2, reach)):
+        totals = {"astar": [0, 0.0], "bidirectional": [0, 0.0]}
+        for start, goal in hub_legs(grid, hub, args.legs, lo, hi, rng):
+            costs = []
+            for name, engine in (("astar", astar), ("bidirectional", astar_bidirectional)):
+                stats = {}
+                t0 = time.perf_counter()
+                costs.append(engine(search_grid, start, goal, stats)[1])
+                totals[name][0] += stats["expanded"]
+                totals[name][1] += time.perf_counter() - t0
+            if not np.isclose(costs[0], costs[1]):
+                print(f"  cost mismatch on {start} -> {goal}: {costs[0]:.3f} vs {costs[1]:.3f}")
+        (a_exp, a_time), (b_exp, b_time) = totals["astar"], totals["bidirectional"]
+        print(f"{label} legs ({lo}-{hi} cells): expanded {a_exp} -> {b_exp} ({b_exp / a_exp:.0%}), "
+              f"time {a_time:.2f}s -> {b_time:.2f}s ({a_time / b_time:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
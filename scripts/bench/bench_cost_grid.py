@@ -0,0 +1,58 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import resource
+import tempfile
+import time
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from scipy.ndimage import gaussian_filter
+
+# Usage: python bench/bench_cost_grid.py --size 4000 --workers 1 2 4
+
+
+def write_synthetic_dem(path, size, seed=0):
+    rng = np.random.default_rng(seed)
+    dem = (gaussian_filter(rng.random((size, size)), sigma=size / 40) * 2000).astype(np.float32)
+    with rasterio.open(
+        path, 'w', driver='GTiff', height=size, width=size, count=1, dtype='float32',
+        crs='EPSG:4326', transform=from_origin(-122.7, 45.6, 0.001, 0.001), nodata=-9999,
+        tiled=True, blockxsize=256, blockysize=256,
+    ) as dst:
+        dst.write(dem, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time whole-array vs chunked cost grid builds on a synthetic DEM")
+    parser.add_argument("--size", type=int, default=4000, help="DEM side length in cells")
+    parser.add_argument("--chunk-rows", type=int, default=512)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="cost_grid_bench_")
+    os.chdir(workdir)
+    os.makedirs("data/raw")
+    write_synthetic_dem("data/raw/elevation.tif", args.size)
+    # Imported after chdir: the builder uses repo-relative data/ paths
+    from core.generate_cost_grid import build_cost_grid, build_cost_grid_chunked
+
+    t0 = time.perf_counter()
+    reference = build_cost_grid()
+    whole = time.perf_counter() - t0
+    whole_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"whole-array: {whole:.2f}s, parent peak RSS {whole_rss:.0f} MB\n")
+
+    for workers in args.workers:
+        t0 = time.perf_counter()
+        out_path = build_cost_grid_chunked(chunk_rows=args.chunk_rows, workers=workers)
+        elapsed = time.perf_counter() - t0
+        child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        same = np.array_equal(np.load(out_path, mmap_mode="r"), reference)
+        print(f"chunked x{workers}: {elapsed:.2f}s ({whole / elapsed:.1f}x), "
+              f"worker peak RSS {child_rss:.0f} MB, identical={same}\n")
+
+
+if __name__ == "__main__":
+    main()
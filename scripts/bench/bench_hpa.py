@@ -0,0 +1,51 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import time
+import numpy as np
+from bench.bench_astar import random_legs, synthetic_cost_grid
+from core.astar_engine import SearchGrid, astar
+from core.hpa import DEFAULT_CLUSTER_SIZE, HPAGraph
+
+# Usage: python bench/bench_hpa.py --size 1500 --legs 10 --cluster-size 64
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HPA* with exact astar on long legs: latency and path cost")
+    parser.add_argument("--size", type=int, default=1500, help="Synthetic grid side length in cells")
+    parser.add_argument("--legs", type=int, default=10, help="Number of random legs to plan")
+    parser.add_argument("--cluster-size", type=int, default=DEFAULT_CLUSTER_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    grid = synthetic_cost_grid(args.size, args.seed)
+    search_grid = SearchGrid(grid)
+    t0 = time.perf_counter()
+    graph = HPAGraph.build(grid, args.cluster_size)
+    print(f"Grid {args.size}x{args.size}: HPA graph with {len(graph.nodes)} nodes, "
+          f"{len(graph.indices)} edges built in {time.perf_counter() - t0:.2f}s\n")
+
+    # Long legs only: anything closer than two clusters goes to flat astar anyway
+    legs = [(s, g) for s, g in random_legs(grid, args.legs * 4, args.seed)
+            if max(abs(s[0] - g[0]), abs(s[1] - g[1])) >= 2 * args.cluster_size][:args.legs]
+    exact_times, hpa_times, ratios = [], [], []
+    for start, goal in legs:
+        t0 = time.perf_counter()
+        _, exact_cost = astar(search_grid, start, goal)
+        exact_times.append(time.perf_counter() - t0)
+        stats = {}
+        t0 = time.perf_counter()
+        _, hpa_cost = graph.search(search_grid, start, goal, stats)
+        hpa_times.append(time.perf_counter() - t0)
+        ratios.append(hpa_cost / exact_cost)
+        print(f"{start} -> {goal}: astar {exact_times[-1] * 1000:7.1f} ms, hpa {hpa_times[-1] * 1000:6.1f} ms, "
+              f"cost +{(ratios[-1] - 1) * 100:.1f}% ({stats.get('clusters_refined', 0)} clusters refined)")
+
+    print(f"\nastar mean latency: {np.mean(exact_times) * 1000:.1f} ms")
+    print(f"HPA   mean latency: {np.mean(hpa_times) * 1000:.1f} ms ({np.sum(exact_times) / np.sum(hpa_times):.1f}x)")
+    print(f"Suboptimality: mean +{(np.mean(ratios) - 1) * 100:.1f}%, worst +{(np.max(ratios) - 1) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
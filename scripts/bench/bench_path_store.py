@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import json
+import tempfile
+import time
+import uuid
+import numpy as np
+from rasterio.transform import from_origin
+from bench.bench_astar import random_legs, synthetic_cost_grid
+from core.astar_engine import astar
+from core.path_store import PathStore, PathStoreWriter
+
+# Usage: python bench/bench_path_store.py --size 600 --legs 50 --copies 40
+
+
+def disk_usage(directory):
+    # Allocated blocks, not apparent size: small files still occupy a whole block
+    total = 0
+    for entry in os.scandir(directory):
+        total += entry.stat().st_blocks * 512
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-leg JSON path files with the columnar path store")
+    parser.add_argument("--size", type=int, default=600, help="Synthetic grid side length in cells")
+    parser.add_argument("--legs", type=int, default=50, help="Distinct legs to plan")
+    parser.add_argument("--copies", type=int, default=40, help="Times each leg is written")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    grid = synthetic_cost_grid(args.size, args.seed)
+    paths = [astar(grid, start, goal)[0] for start, goal in random_legs(grid, args.legs, args.seed)]
+    paths = [path for path in paths if path is not None] * args.copies
+    transform = from_origin(-122.7, 45.6, 0.001, 0.001)
+    cells = sum(len(path) for path in paths)
+    print(f"{len(paths)} legs, {cells / len(paths):.0f} cells per leg on average\n")
+
+    json_dir = tempfile.mkdtemp(prefix="paths_json_")
+    t0 = time.perf_counter()
+    for i, path in enumerate(paths):
+        with open(os.path.join(json_dir, f"drone_{i:05d}_leg1_path.json"), "w") as f:
+            json.dump({"path": path.tolist(), "transform": transform.to_gdal()}, f)
+    json_time = time.perf_counter() - t0
+    json_bytes = disk_usage(json_dir)
+
+    store_dir = tempfile.mkdtemp(prefix="paths_store_")
+    t0 = time.perf_counter()
+    with PathStoreWriter(store_dir, transform) as writer:
+        for i, path in enumerate(paths):
+            writer.add(uuid.uuid4(), f"drone_{i:05d}", 1, path, 0.0)
+    store_time = time.perf_counter() - t0
+    store_bytes = disk_usage(store_dir)
+
+    store = PathStore(store_dir)
+    same = all(np.array_equal(store.path(i), path) for i, path in enumerate(paths))
+
+    per_leg = 1e6 / len(paths)
+    print(f"JSON files: {json_time * per_leg:7.1f} us/leg, {json_bytes / len(paths):8.0f} bytes/leg")
+    print(f"Path store: {store_time * per_leg:7.1f} us/leg, {store_bytes / len(paths):8.0f} bytes/leg")
+    print(f"Write {json_time / store_time:.1f}x faster, {json_bytes / store_bytes:.1f}x less disk, round trip ok={same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import asyncio
+import statistics
+import tempfile
+import threading
+import time
+import numpy as np
+from bench.terrain import query_set, synthetic_cost
+from core.planner_service import PlannerClient, PlannerService
+
+# Usage: python bench/bench_planner_service.py --size 512 --queries 30 --workers 1
+
+
+def timed(call, legs):
+    times = []
+    for start, goal in legs:
+        t0 = time.perf_counter()
+        call(start, goal)
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def report(name, times):
+    ms = sorted(t * 1000 for t in times)
+    print(f"{name:24s} p50 {statistics.median(ms):8.2f} ms  p95 {ms[int(0.95 * (len(ms) - 1))]:8.2f} ms  "
+          f"max {ms[-1]:8.2f} ms  ({len(ms)} requests)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Client-side latency of the warm planner service")
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--terrain", default="lakes")
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--engine", default="hpa")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        grid_path = os.path.join(tmp, "cost_grid.npy")
+        socket_path = os.path.join(tmp, "planner.sock")
+        grid = synthetic_cost(args.terrain, args.size, args.seed)
+        np.save(grid_path, grid)
+        legs = query_set(grid, args.queries, args.seed)
+        hub = legs[0][0]
+
+        t0 = time.perf_counter()
+        service = PlannerService(grid_path, os.path.join(tmp, "missing_meta.json"), hub=hub, engine=args.engine,
+                                 workers=args.workers, cache_dir=os.path.join(tmp, "paths"))
+        print(f"Service start (build + load precomputed data): {time.perf_counter() - t0:.2f}s")
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        serving = asyncio.run_coroutine_threadsafe(service.serve(socket_path), loop)
+        while not os.path.exists(socket_path):
+            time.sleep(0.01)
+
+        try:
+            with PlannerClient(socket_path) as client:
+                client.request(op="ping")
+                report("resolve (no search)", timed(client.resolve, legs))
+                report("hub legs (hub field)", timed(client.plan, [(hub, goal) for _, goal in legs]))
+                report(f"cold legs ({args.engine})", timed(client.plan, legs))
+                report("repeat legs (cache)", timed(client.plan, legs))
+        finally:
+            # The loop thread is a daemon; cancelling the server is enough before the pool goes away
+            serving.cancel()
+            service.close()
+
+
+if __name__ == "__main__":
+    main()
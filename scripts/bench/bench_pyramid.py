@@ -0,0 +1,52 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import time
+import numpy as np
+from bench.bench_astar import random_legs, synthetic_cost_grid
+from core.astar_engine import SearchGrid, astar
+from core.pyramid import CostPyramid
+
+# Usage: python bench/bench_pyramid.py --size 1500 --legs 10
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare coarse-to-fine corridor search with a full-grid astar")
+    parser.add_argument("--size", type=int, default=1500, help="Synthetic grid side length in cells")
+    parser.add_argument("--legs", type=int, default=10, help="Number of random legs to plan")
+    parser.add_argument("--factors", type=int, nargs="+", default=[4, 16])
+    parser.add_argument("--pooling", choices=["mean", "min"], default="mean")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    grid = synthetic_cost_grid(args.size, args.seed)
+    search_grid = SearchGrid(grid)
+    t0 = time.perf_counter()
+    pyramid = CostPyramid.build(grid, args.factors, args.pooling)
+    print(f"Grid {args.size}x{args.size}: pyramid levels {[level.shape for level in pyramid.levels]} "
+          f"built in {time.perf_counter() - t0:.2f}s\n")
+
+    full_times, pyramid_times, ratios, peaks = [], [], [], []
+    for start, goal in random_legs(grid, args.legs, args.seed):
+        t0 = time.perf_counter()
+        _, full_cost = astar(search_grid, start, goal)
+        full_times.append(time.perf_counter() - t0)
+        stats = {}
+        t0 = time.perf_counter()
+        _, cost = pyramid.search(search_grid, start, goal, stats)
+        pyramid_times.append(time.perf_counter() - t0)
+        ratios.append(cost / full_cost)
+        peaks.append(stats["peak_cells"])
+        print(f"{start} -> {goal}: astar {full_times[-1] * 1000:7.1f} ms, pyramid {pyramid_times[-1] * 1000:6.1f} ms, "
+              f"cost +{(ratios[-1] - 1) * 100:.2f}%, largest search {stats['peak_cells'] / grid.size:.0%} of the grid, "
+              f"widened {stats['widened']}x")
+
+    print(f"\nastar mean latency:   {np.mean(full_times) * 1000:.1f} ms")
+    print(f"pyramid mean latency: {np.mean(pyramid_times) * 1000:.1f} ms ({np.sum(full_times) / np.sum(pyramid_times):.1f}x)")
+    print(f"Search state: {np.mean(peaks) / grid.size:.0%} of the grid on average (astar: 100%)")
+    print(f"Suboptimality: mean +{(np.mean(ratios) - 1) * 100:.2f}%, worst +{(np.max(ratios) - 1) * 100:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
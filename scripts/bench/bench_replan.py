@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import time
+import numpy as np
+from bench.terrain import query_set, synthetic_cost
+from core.astar_engine import BLOCKED_COST, SearchGrid, astar
+from core.dstar_lite import FlightReplanner
+
+# Usage: python bench/bench_replan.py --size 384 --flights 200 --patch 16
+#        python bench/bench_replan.py --ahead 0.1        (no-fly patch just ahead of a drone)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replan active flights after a local no-fly patch: astar from scratch vs D* Lite repair")
+    parser.add_argument("--size", type=int, default=384)
+    parser.add_argument("--terrain", default="lakes")
+    parser.add_argument("--flights", type=int, default=200)
+    parser.add_argument("--patch", type=int, default=16, help="Side of the square no-fly patch in cells")
+    parser.add_argument("--progress", type=float, default=0.3, help="Fraction of its path each flight has flown")
+    parser.add_argument("--ahead", type=float, default=0.5, help="Where the patch lands along the longest remaining path (0 = at the drone)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    grid = synthetic_cost(args.terrain, args.size, args.seed)
+    legs = query_set(grid, args.flights, args.seed)
+    print(f"Grid {args.size}x{args.size} ({args.terrain}), {args.flights} flights")
+
+    t0 = time.perf_counter()
+    replanner = FlightReplanner(grid)
+    for flight_id, (start, goal) in enumerate(legs):
+        replanner.add(flight_id, start, goal)
+    print(f"Initial plans (D* Lite): {time.perf_counter() - t0:.2f}s")
+
+    # Fly everyone part of the way, then drop the patch ahead of them on the longest remaining path
+    positions = {}
+    for flight_id, (path, _) in replanner.paths.items():
+        if path is None:
+            continue
+        positions[flight_id] = tuple(int(v) for v in path[int(len(path) * args.progress)])
+        replanner.advance(flight_id, positions[flight_id])
+    remaining = {i: replanner.paths[i][0][int(len(replanner.paths[i][0]) * args.progress):] for i in positions}
+    longest = remaining[max(remaining, key=lambda i: len(remaining[i]))]
+    occupied = np.array(list(positions.values()))
+    for center in longest[int(len(longest) * args.ahead):]:
+        row0 = int(np.clip(center[0] - args.patch // 2, 0, args.size - args.patch))
+        col0 = int(np.clip(center[1] - args.patch // 2, 0, args.size - args.patch))
+        # A drone inside the patch could not leave it; proving that takes a backward search its whole region
+        if not np.any((occupied[:, 0] >= row0) & (occupied[:, 0] < row0 + args.patch)
+                      & (occupied[:, 1] >= col0) & (occupied[:, 1] < col0 + args.patch)):
+            break
+    block = np.full((args.patch, args.patch), BLOCKED_COST)
+    crossing = [i for i, path in remaining.items()
+                if np.any((path[:, 0] >= row0) & (path[:, 0] < row0 + args.patch)
+                          & (path[:, 1] >= col0) & (path[:, 1] < col0 + args.patch))]
+    print(f"No-fly patch {args.patch}x{args.patch} at ({row0}, {col0}), crossing {len(crossing)} remaining paths\n")
+
+    updated = grid.copy()
+    updated[row0:row0 + args.patch, col0:col0 + args.patch] = block
+    search_grid = SearchGrid(updated)
+    expected = {}
+    t0 = time.perf_counter()
+    for flight_id, position in positions.items():
+        expected[flight_id] = astar(search_grid, position, legs[flight_id][1])[1]
+    all_time = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for flight_id in crossing:
+        astar(search_grid, positions[flight_id], legs[flight_id][1])
+    crossing_time = time.perf_counter() - t0
+
+    stats = {}
+    t0 = time.perf_counter()
+    replanner.apply_update(row0, col0, block, stats)
+    repair_time = time.perf_counter() - t0
+
+    mismatches = sum(not np.isclose(replanner.legs[i].plan()[1], expected[i]) for i in positions)
+    print(f"astar, every flight:        {all_time * 1000:9.1f} ms")
+    print(f"astar, crossing flights:    {crossing_time * 1000:9.1f} ms")
+    print(f"D* Lite repair:             {repair_time * 1000:9.1f} ms  "
+          f"({stats['replanned']} replanned, {stats['skipped']} untouched, {stats['changed_cells']} cells changed)")
+    print(f"Cost mismatches vs astar: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import hashlib
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+from bench.terrain import TERRAINS, query_set, synthetic_cost
+from core.astar_engine import SearchGrid, astar, astar_bidirectional
+from core.hpa import HPAGraph
+from core.landmarks import Landmarks
+from core.pyramid import CostPyramid
+from core.quantized import QuantizedCostGrid
+
+# Usage: python bench/bench_suite.py --out bench/baseline.json
+#        python bench/bench_suite.py --compare bench/baseline.json --threshold 10
+
+DEFAULT_SIZES = (128, 256, 512)
+DEFAULT_QUERIES = 9
+
+
+def quantized_astar(grid):
+    # Searches its own uint8 copy of the grid in fixed point; the float SearchGrid the suite passes is ignored
+    quantized = SearchGrid(QuantizedCostGrid.build(grid))
+    return lambda search_grid, start, goal, stats=None: astar(quantized, start, goal, stats)
+
+
+# Engine name -> builder taking the cost array and returning a search(grid, start, goal, stats) callable
+ENGINES = {
+    "astar": lambda grid: astar,
+    "astar-q8": quantized_astar,
+    "bidirectional": lambda grid: astar_bidirectional,
+    "alt": lambda grid: Landmarks.build(grid).search,
+    "pyramid": lambda grid: CostPyramid.build(grid).search,
+    "hpa": lambda grid: HPAGraph.build(grid).search,
+}
+# Metrics compared against the baseline; path cost is deterministic, so any growth beyond rounding counts
+COMPARED = {"median_query_s": None, "total_s": None, "expanded": None, "peak_mb": None, "cost": 1e-6}
+
+
+def case_fingerprint(grid, queries):
+    # Baselines are only comparable for identical grids and query sets
+    digest = hashlib.sha1(np.ascontiguousarray(grid).tobytes())
+    digest.update(json.dumps(queries).encode())
+    return digest.hexdigest()[:16]
+
+
+def run_engine(search, search_grid, queries, memory=True, repeat=1):
+    times, expanded, cost = [], 0, 0.0
+    for start, goal in queries:
+        # Best of `repeat` runs: the least disturbed timing of a deterministic search
+        best = float("inf")
+        for _ in range(repeat):
+            stats = {}
+            t0 = time.perf_counter()
+            path, leg_cost = search(search_grid, start, goal, stats)
+            best = min(best, time.perf_counter() - t0)
+        times.append(best)
+        expanded += stats.get("expanded", 0)
+        cost += leg_cost
+    result = {
+        "total_s": sum(times), "median_query_s": statistics.median(times), "max_query_s": max(times),
+        "expanded": expanded, "cost": cost,
+    }
+    if memory:
+        # Separate untimed pass: tracemalloc sees NumPy allocations but slows the search down
+        tracemalloc.start()
+        peak = 0
+        for start, goal in queries:
+            tracemalloc.reset_peak()
+            search(search_grid, start, goal)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        result["peak_mb"] = peak / 2 ** 20
+    return result
+
+
+def run_suite(sizes, terrains, engines, query_count, seed, memory=True, repeat=1):
+    results = {}
+    for size in sizes:
+        for terrain in terrains:
+            grid = synthetic_cost(terrain, size, seed)
+            queries = query_set(grid, query_count, seed)
+            search_grid = SearchGrid(grid)
+            fingerprint = case_fingerprint(grid, queries)
+            # Optimal total cost, to show how much the approximate engines (hpa, pyramid) give away
+            exact_cost = sum(astar(search_grid, start, goal)[1] for start, goal in queries)
+            for name in engines:
+                t0 = time.perf_counter()
+                search = ENGINES[name](grid)
+                build_s = time.perf_counter() - t0
+                result = run_engine(search, search_grid, queries, memory, repeat)
+                result.update(build_s=build_s, queries=len(queries), case=fingerprint,
+                              suboptimality=result["cost"] / exact_cost - 1 if exact_cost else 0.0)
+                key = f"{terrain}/{size}/{name}"
+                results[key] = result
+                print(f"{key:28s} total {result['total_s']:7.3f}s  median {result['median_query_s'] * 1000:8.1f} ms  "
+                      f"expanded {result['expanded']:>9,}  peak {result.get('peak_mb', float('nan')):6.1f} MB  "
+                      f"cost {result['cost']:11.2f} ({result['suboptimality'] * 100:+.2f}% vs astar)  build {build_s:5.2f}s")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print metric changes against `baseline` and return the regressions beyond `threshold` percent."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline["results"].get(key)
+        if base is None:
+            print(f"{key:28s} new (not in baseline)")
+            continue
+        if base.get("case") != result.get("case"):
+            print(f"{key:28s} skipped: grid or queries differ from the baseline")
+            continue
+        changes = []
+        for metric, tolerance in COMPARED.items():
+            if metric not in result or metric not in base or not base[metric]:
+                continue
+            change = (result[metric] - base[metric]) / base[metric]
+            limit = threshold / 100 if tolerance is None else tolerance
+            flag = change > limit
+            changes.append(f"{metric} {change * 100:+.2f}%{' REGRESSION' if flag else ''}")
+            if flag:
+                regressions.append((key, metric, change))
+        print(f"{key:28s} " + ", ".join(changes))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seeded planner benchmark suite with a JSON baseline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--terrains", nargs="+", default=list(TERRAINS), choices=TERRAINS)
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES, help="Queries per grid (short, medium, long in turn)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="Time each query this many times and keep the best")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory pass")
+    parser.add_argument("--out", default=None, help="Write the results to this JSON file (e.g. a new baseline)")
+    parser.add_argument("--compare", default=None, metavar="BASELINE", help="Compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent slowdown/growth flagged as a regression")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.terrains, args.engines, args.queries, args.seed, not args.no_memory, args.repeat)
+    report = {
+        "created": datetime.utcnow().isoformat(),
+        "python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+        "seed": args.seed, "repeat": args.repeat, "results": results,
+    }
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} ({baseline['created']}), threshold {args.threshold:g}%:")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:g}%")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import numpy as np
+from core.astar_engine import BLOCKED_COST
+from core.components import label_components
+from core.generate_cost_grid import slope_from_elevation, slope_to_cost
+
+# Seeded synthetic DEMs for offline benchmarks; elevations in meters, same slope -> cost pipeline as real grids
+TERRAINS = ("fractal", "ridges", "lakes")
+# Fraction of the lowest cells flooded (and blocked) in "lakes" terrain
+LAKE_LEVEL = 0.15
+NODATA = -9999.0
+
+
+def fractal_dem(size, seed=0, beta=3.0, relief=800.0):
+    """Fractional Brownian surface by spectral synthesis: white noise shaped by a 1/f^beta power spectrum."""
+    rng = np.random.default_rng(seed)
+    fy = np.fft.fftfreq(size)[:, None]
+    fx = np.fft.rfftfreq(size)[None, :]
+    freq = np.hypot(fy, fx)
+    freq[0, 0] = 1.0
+    spectrum = (rng.normal(size=freq.shape) + 1j * rng.normal(size=freq.shape)) * freq ** (-beta / 2)
+    spectrum[0, 0] = 0.0
+    dem = np.fft.irfft2(spectrum, s=(size, size))
+    dem = (dem - dem.min()) / (dem.max() - dem.min())
+    return dem * relief
+
+
+def ridged_dem(size, seed=0, relief=800.0):
+    # Folding the surface at its median turns valleys and peaks into sharp ridge lines
+    dem = fractal_dem(size, seed, beta=2.6, relief=1.0)
+    ridges = 1 - np.abs(2 * dem - 2 * np.median(dem))
+    return (ridges - ridges.min()) / (ridges.max() - ridges.min()) * relief
+
+
+def synthetic_dem(kind, size, seed=0):
+    if kind == "ridges":
+        return ridged_dem(size, seed)
+    return fractal_dem(size, seed)
+
+
+def synthetic_cost(kind, size, seed=0):
+    """Cost grid for a synthetic terrain: slope scaled to 1-10, with lakes blocked for the "lakes" kind."""
+    if kind not in TERRAINS:
+        raise ValueError(f"Unknown terrain {kind!r}, expected one of {TERRAINS}")
+    dem = synthetic_dem(kind, size, seed)
+    slope = slope_from_elevation(dem, NODATA)
+    cost = slope_to_cost(slope, float(slope.max()) or 1.0)
+    if kind == "lakes":
+        cost[dem <= np.quantile(dem, LAKE_LEVEL)] = BLOCKED_COST
+    return cost
+
+
+def query_set(cost, count, seed=0):
+    """`count` seeded (start, goal) pairs in the largest passable region, a third each short, medium and long."""
+    rng = np.random.default_rng(seed + 1)
+    labels, _ = label_components(cost)
+    sizes = np.bincount(labels.ravel())
+    sizes[0] = 0
+    rows, cols = np.nonzero(labels == np.argmax(sizes))
+    size = max(cost.shape)
+    bands = [(0, size / 8), (size / 8, size / 2), (size / 2, np.inf)]
+    queries = []
+    for i in range(count):
+        low, high = bands[i % 3]
+        # Rejection-sample a goal at the band's distance; give up on the band after a while (tiny regions)
+        for _ in range(1000):
+            a, b = rng.integers(len(rows), size=2)
+            dist = np.hypot(rows[a] - rows[b], cols[a] - cols[b])
+            if low <= dist < high:
+                break
+        queries.append(((int(rows[a]), int(cols[a])), (int(rows[b]), int(cols[b]))))
+    return queries
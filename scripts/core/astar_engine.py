@@ -0,0 +1,444 @@
+import heapq
+import math
+import numpy as np
+
+# Cells at or above this cost are treated as impassable by the planner
+BLOCKED_COST = 100
+# Quantized grids (core/quantized.py): uint8 levels 1..MAX_LEVEL are passable, BLOCKED_LEVEL is impassable
+MAX_LEVEL = 250
+BLOCKED_LEVEL = 255
+# Fixed-point step weights on quantized grids: 1000 straight, 1414 diagonal (the 1.414 factor of MOVES)
+STEP_UNIT = 1000
+
+# 8-connected moves as (d_row, d_col, step factor), same order as the original astar
+MOVES = [
+    (-1, 0, 1), (1, 0, 1), (0, -1, 1), (0, 1, 1),
+    (-1, -1, 1.414), (-1, 1, 1.414), (1, -1, 1.414), (1, 1, 1.414),
+]
+# Straight-line heuristic on a grid whose cells cost at least 1: a diagonal step is
+# 1.414, a bit under sqrt(2), so plain hypot would overestimate long diagonals
+UNIT_H_SCALE = 1.414 / math.sqrt(2)
+
+
+class SearchGrid:
+    """Cost grid padded with a one-cell blocked border and flattened.
+
+    Cells are addressed by their linear id in the padded grid, so every
+    neighbor is a fixed index offset and the search never bounds-checks.
+
+    A QuantizedCostGrid is padded as uint8 levels, with integer step weights
+    (STEP_UNIT per straight step), so searches add up exact integer path
+    costs; `cost_unit` converts them back to costs and `h_scale` puts the
+    straight-line heuristic in the same units, scaled by the cheapest level
+    on the grid when it is wrapped.
+    """
+
+    def __init__(self, grid, out=None):
+        """Pad `grid`, optionally writing the padded costs into the buffer `out`
+        (e.g. shared memory) instead of a fresh allocation."""
+        scale = getattr(grid, "scale", None)
+        grid = np.asarray(grid.levels if scale is not None else grid)
+        self._set_shape(grid.shape, scale)
+        padded_shape = (self.height + 2, self.width + 2)
+        dtype = np.float64 if scale is None else np.uint8
+        if out is None:
+            padded = np.empty(padded_shape, dtype=dtype)
+        else:
+            padded = np.ndarray(padded_shape, dtype=dtype, buffer=out)
+        padded.fill(np.inf if scale is None else BLOCKED_LEVEL)
+        padded[1:-1, 1:-1] = grid
+        self.costs = padded.ravel()
+        self._set_heuristic()
+
+    @classmethod
+    def from_padded(cls, costs, shape, scale=None):
+        """Wrap an already padded, flattened cost array (levels if `scale` is given) for a grid of `shape`."""
+        search_grid = cls.__new__(cls)
+        search_grid._set_shape(shape, scale)
+        search_grid.costs = costs
+        search_grid._set_heuristic()
+        return search_grid
+
+    @staticmethod
+    def nbytes_for(shape, quantized=False):
+        return (shape[0] + 2) * (shape[1] + 2) * np.dtype(np.uint8 if quantized else np.float64).itemsize
+
+    def _set_shape(self, shape, scale=None):
+        self.height, self.width = int(shape[0]), int(shape[1])
+        self.padded_width = self.width + 2
+        self.scale = scale
+        if scale is None:
+            self.blocked = BLOCKED_COST
+            self.cost_unit = 1.0
+            self.neighbors = [(di * self.padded_width + dj, step) for di, dj, step in MOVES]
+        else:
+            self.blocked = BLOCKED_LEVEL
+            self.cost_unit = scale / STEP_UNIT
+            self.neighbors = [(di * self.padded_width + dj, round(step * STEP_UNIT)) for di, dj, step in MOVES]
+
+    def _set_heuristic(self):
+        # Cheapest cell (level if quantized), scanned once here so searches needing a bound don't rescan per query
+        self.min_cost = float(np.min(self.costs))
+        if self.scale is None:
+            # Float grids keep the planner's convention that every cell costs at least 1
+            self.h_scale = UNIT_H_SCALE
+            return
+        # The cheapest passable level, so the heuristic is as tight as it can be and still admissible:
+        # every move costs at least min_level * step, and the 1414 diagonal step is a bit under sqrt(2) * 1000
+        if self.min_cost >= BLOCKED_LEVEL:
+            self.min_cost = 1.0
+        self.h_scale = self.min_cost * max(step for _, step in self.neighbors) / math.sqrt(2)
+
+    @property
+    def shape(self):
+        return (self.height, self.width)
+
+    @property
+    def size(self):
+        return self.costs.size
+
+    def cells(self):
+        """The unpadded (height, width) cost array (levels if quantized), as a view into `costs`."""
+        return self.costs.reshape(self.height + 2, self.padded_width)[1:-1, 1:-1]
+
+    def to_index(self, rc):
+        row, col = int(rc[0]), int(rc[1])
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise ValueError(f"Cell {rc} is outside the {self.height}x{self.width} cost grid")
+        return (row + 1) * self.padded_width + col + 1
+
+    def to_rowcol(self, indices):
+        rows, cols = np.divmod(np.asarray(indices, dtype=np.int64), self.padded_width)
+        return np.column_stack((rows - 1, cols - 1))
+
+
+# Padding copies the grid, so keep the last one around for repeated legs on the same array
+_last_grid = None
+_last_search_grid = None
+
+
+def as_search_grid(grid):
+    """Return a SearchGrid for `grid`, reusing the padded copy of the last array seen.
+
+    The cache is keyed on array identity, so code that modifies a grid in
+    place (update_cost_grid_window does) must call invalidate_search_grid.
+    """
+    global _last_grid, _last_search_grid
+    if isinstance(grid, SearchGrid):
+        return grid
+    if grid is not _last_grid:
+        _last_search_grid = SearchGrid(grid)
+        _last_grid = grid
+    return _last_search_grid
+
+
+def invalidate_search_grid():
+    """Drop the padded copy kept by as_search_grid, after a grid has been modified in place."""
+    global _last_grid, _last_search_grid
+    _last_grid = _last_search_grid = None
+
+
+def reconstruct_path(parent, start_idx, goal_idx):
+    """Walk a parent array back from goal to start, returning linear ids start-first."""
+    path = [goal_idx]
+    current = goal_idx
+    while current != start_idx:
+        current = parent[current]
+        path.append(current)
+    path.reverse()
+    return path
+
+
+# A* algorithm
+# NOTE: This implementation assumes a fixed route order (hub → pickup → drop-off → hub).
+# It does not attempt to reorder waypoints or optimize multi-stop delivery sequences.
+# That would be a form of the NP-hard Traveling Salesman Problem (TSP) and is out of scope for now.
+def astar(grid, start, goal, stats=None):
+    """Find the cheapest 8-connected path from `start` to `goal` (row, col cells).
+
+    `grid` is a 2-D cost array or a prepared SearchGrid. Returns `(path, cost)`
+    where `path` is an (N, 2) int array of (row, col) cells, or `(None, inf)` if
+    the goal is unreachable. On a quantized grid the cost is summed in fixed point. If a `stats` dict is passed, node expansion and
+    heap push counts and the peak heap size are written into it.
+    """
+    sg = as_search_grid(grid)
+    width = sg.padded_width
+    n = sg.size
+
+    g_arr = np.full(n, np.inf)
+    parent_arr = np.full(n, -1, dtype=np.int64)
+    closed_arr = np.zeros(n, dtype=np.uint8)
+
+    # memoryviews index like lists (plain Python floats/ints) without NumPy scalar overhead
+    costs = memoryview(sg.costs)
+    g = memoryview(g_arr)
+    parent = memoryview(parent_arr)
+    closed = memoryview(closed_arr)
+    neighbors = sg.neighbors
+    blocked = sg.blocked
+    h_scale = sg.h_scale
+    hypot = math.hypot
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+
+    start_idx = sg.to_index(start)
+    goal_idx = sg.to_index(goal)
+    goal_row, goal_col = divmod(goal_idx, width)
+    start_row, start_col = divmod(start_idx, width)
+
+    g[start_idx] = 0.0
+    open_heap = [(h_scale * hypot(start_row - goal_row, start_col - goal_col), start_idx)]
+    expanded = 0
+    pushed = 1
+    peak_heap = 1
+    # The heap size is only watched when someone asked for stats; it is a len() call on every pop
+    track_peak = stats is not None
+
+    while open_heap:
+        if track_peak and len(open_heap) > peak_heap:
+            peak_heap = len(open_heap)
+        current = heappop(open_heap)[1]
+        if closed[current]:
+            continue
+        closed[current] = 1
+        expanded += 1
+        if current == goal_idx:
+            if stats is not None:
+                stats.update(expanded=expanded, pushed=pushed, peak_heap=peak_heap)
+            path = reconstruct_path(parent, start_idx, goal_idx)
+            return sg.to_rowcol(path), g[goal_idx] * sg.cost_unit
+
+        g_current = g[current]
+        for offset, step in neighbors:
+            neighbor = current + offset
+            cost = costs[neighbor]
+            if cost >= blocked:
+                continue
+            tentative_g = g_current + cost * step
+            if tentative_g < g[neighbor]:
+                g[neighbor] = tentative_g
+                parent[neighbor] = current
+                row, col = divmod(neighbor, width)
+                heappush(open_heap, (tentative_g + h_scale * hypot(row - goal_row, col - goal_col), neighbor))
+                pushed += 1
+
+    if stats is not None:
+        stats.update(expanded=expanded, pushed=pushed, peak_heap=peak_heap)
+    return None, float('inf')
+
+
+def astar_bidirectional(grid, start, goal, stats=None):
+    """Bidirectional A*: one search from `start`, one backwards from `goal`.
+
+    Moves are charged by the cell being entered, so the backward search
+    walks edges in reverse and charges the cell it is leaving. Both searches
+    use the average potential p(v) = (h(v, goal) - h(start, v)) / 2 (negated
+    for the backward one) with a Euclidean h scaled down to stay consistent,
+    and stop once the two smallest keys sum to at least the best meeting
+    cost found. The cost is optimal; same return contract as astar.
+    """
+    sg = as_search_grid(grid)
+    width = sg.padded_width
+    n = sg.size
+
+    # One g/parent/closed triple per direction; parent_b points towards the goal
+    g_f_arr, g_b_arr = np.full(n, np.inf), np.full(n, np.inf)
+    parent_f_arr, parent_b_arr = np.full(n, -1, dtype=np.int64), np.full(n, -1, dtype=np.int64)
+    closed_f_arr, closed_b_arr = np.zeros(n, dtype=np.uint8), np.zeros(n, dtype=np.uint8)
+    costs = memoryview(sg.costs)
+    g_f, g_b = memoryview(g_f_arr), memoryview(g_b_arr)
+    parent_f, parent_b = memoryview(parent_f_arr), memoryview(parent_b_arr)
+    closed_f, closed_b = memoryview(closed_f_arr), memoryview(closed_b_arr)
+    neighbors = sg.neighbors
+    blocked = sg.blocked
+    hypot = math.hypot
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+
+    start_idx = sg.to_index(start)
+    goal_idx = sg.to_index(goal)
+    if start_idx == goal_idx or costs[goal_idx] >= blocked:
+        if stats is not None:
+            stats.update(expanded=0, expanded_forward=0, expanded_backward=0, pushed=0, peak_heap=0)
+        if start_idx == goal_idx:
+            return sg.to_rowcol([start_idx]), 0.0
+        return None, float('inf')
+    start_row, start_col = divmod(start_idx, width)
+    goal_row, goal_col = divmod(goal_idx, width)
+    # Every move costs at least min_cost * step and a diagonal step is 1.414 (1414 in fixed point), a bit under sqrt(2)
+    scale = sg.min_cost * max(step for _, step in neighbors) / math.sqrt(2)
+
+    def potential(idx):
+        row, col = divmod(idx, width)
+        return scale * (hypot(row - goal_row, col - goal_col) - hypot(row - start_row, col - start_col)) / 2
+
+    g_f[start_idx] = 0.0
+    g_b[goal_idx] = 0.0
+    open_f = [(potential(start_idx), start_idx)]
+    open_b = [(-potential(goal_idx), goal_idx)]
+    best, meeting = math.inf, -1
+    expanded_f = expanded_b = 0
+    pushed = 2
+    peak_heap = 2
+    track_peak = stats is not None
+
+    while open_f and open_b:
+        if track_peak and len(open_f) + len(open_b) > peak_heap:
+            peak_heap = len(open_f) + len(open_b)
+        if open_f[0][0] + open_b[0][0] >= best:
+            break
+        if open_f[0][0] <= open_b[0][0]:
+            current = heappop(open_f)[1]
+            if closed_f[current]:
+                continue
+            closed_f[current] = 1
+            expanded_f += 1
+            g_current = g_f[current]
+            for offset, step in neighbors:
+                neighbor = current + offset
+                cost = costs[neighbor]
+                if cost >= blocked:
+                    continue
+                tentative_g = g_current + cost * step
+                if tentative_g < g_f[neighbor]:
+                    g_f[neighbor] = tentative_g
+                    parent_f[neighbor] = current
+                    heappush(open_f, (tentative_g + potential(neighbor), neighbor))
+                    pushed += 1
+                    if tentative_g + g_b[neighbor] < best:
+                        best, meeting = tentative_g + g_b[neighbor], neighbor
+        else:
+            current = heappop(open_b)[1]
+            if closed_b[current]:
+                continue
+            closed_b[current] = 1
+            expanded_b += 1
+            g_current = g_b[current]
+            # Reversed edge neighbor -> current, which costs the cell being entered: current
+            entry_cost = costs[current]
+            for offset, step in neighbors:
+                neighbor = current + offset
+                if costs[neighbor] >= blocked and neighbor != start_idx:
+                    continue
+                tentative_g = g_current + entry_cost * step
+                if tentative_g < g_b[neighbor]:
+                    g_b[neighbor] = tentative_g
+                    parent_b[neighbor] = current
+                    heappush(open_b, (tentative_g - potential(neighbor), neighbor))
+                    pushed += 1
+                    if tentative_g + g_f[neighbor] < best:
+                        best, meeting = tentative_g + g_f[neighbor], neighbor
+
+    if stats is not None:
+        stats.update(expanded=expanded_f + expanded_b, expanded_forward=expanded_f,
+                     expanded_backward=expanded_b, pushed=pushed, peak_heap=peak_heap)
+    if meeting < 0:
+        return None, float('inf')
+    path = reconstruct_path(parent_f, start_idx, meeting)
+    current = meeting
+    while current != goal_idx:
+        current = parent_b[current]
+        path.append(current)
+    return sg.to_rowcol(path), best * sg.cost_unit
+
+
+def astar_tiled(tiled, start, goal, stats=None):
+    """astar over a TiledCostGrid, touching only the tiles the search reaches.
+
+    Costs and search state (g-scores, parents, closed flags) are kept per
+    tile and created the first time the frontier enters a tile, so resident
+    memory follows the explored area rather than the map size. Nodes are
+    global linear ids (row * width + col). Same return contract as astar.
+    """
+    height, width = tiled.shape
+    tile_size = tiled.tile_size
+    tile_cells = tile_size * tile_size
+    tile_cols = tiled.tile_cols
+    hypot = math.hypot
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+
+    # tile key -> [costs, g, parent, closed] memoryviews over flat per-tile arrays
+    tiles = {}
+
+    def load_tile(key):
+        ti, tj = divmod(key, tile_cols)
+        state = [
+            memoryview(np.ascontiguousarray(tiled.tile(ti, tj), dtype=np.float64).ravel()),
+            memoryview(np.full(tile_cells, np.inf)),
+            memoryview(np.full(tile_cells, -1, dtype=np.int64)),
+            memoryview(np.zeros(tile_cells, dtype=np.uint8)),
+        ]
+        tiles[key] = state
+        return state
+
+    def locate(row, col):
+        ti, r = divmod(row, tile_size)
+        tj, c = divmod(col, tile_size)
+        key = ti * tile_cols + tj
+        return tiles.get(key) or load_tile(key), r * tile_size + c
+
+    for rc in (start, goal):
+        if not (0 <= rc[0] < height and 0 <= rc[1] < width):
+            raise ValueError(f"Cell {rc} is outside the {height}x{width} cost grid")
+    start_row, start_col = int(start[0]), int(start[1])
+    goal_row, goal_col = int(goal[0]), int(goal[1])
+    start_id = start_row * width + start_col
+    goal_id = goal_row * width + goal_col
+
+    state, local = locate(start_row, start_col)
+    state[1][local] = 0.0
+    open_heap = [(UNIT_H_SCALE * hypot(start_row - goal_row, start_col - goal_col), start_id)]
+    expanded = 0
+    pushed = 1
+    peak_heap = 1
+    # The heap size is only watched when someone asked for stats; it is a len() call on every pop
+    track_peak = stats is not None
+
+    while open_heap:
+        if track_peak and len(open_heap) > peak_heap:
+            peak_heap = len(open_heap)
+        current = heappop(open_heap)[1]
+        row, col = divmod(current, width)
+        state, local = locate(row, col)
+        if state[3][local]:
+            continue
+        state[3][local] = 1
+        expanded += 1
+        if current == goal_id:
+            break
+
+        g_current = state[1][local]
+        for di, dj, step in MOVES:
+            nrow = row + di
+            ncol = col + dj
+            if nrow < 0 or ncol < 0 or nrow >= height or ncol >= width:
+                continue
+            nstate, nlocal = locate(nrow, ncol)
+            cost = nstate[0][nlocal]
+            if cost >= BLOCKED_COST:
+                continue
+            tentative_g = g_current + cost * step
+            if tentative_g < nstate[1][nlocal]:
+                nstate[1][nlocal] = tentative_g
+                nstate[2][nlocal] = current
+                heappush(open_heap, (tentative_g + UNIT_H_SCALE * hypot(nrow - goal_row, ncol - goal_col),
+                                     nrow * width + ncol))
+                pushed += 1
+    else:
+        if stats is not None:
+            stats.update(expanded=expanded, pushed=pushed, peak_heap=peak_heap, tiles_loaded=len(tiles))
+        return None, float('inf')
+
+    if stats is not None:
+        stats.update(expanded=expanded, pushed=pushed, peak_heap=peak_heap, tiles_loaded=len(tiles))
+    path = [goal_id]
+    current = goal_id
+    while current != start_id:
+        state, local = locate(*divmod(current, width))
+        current = state[2][local]
+        path.append(current)
+    path.reverse()
+    rows, cols = np.divmod(np.asarray(path, dtype=np.int64), width)
+    goal_state, goal_local = locate(goal_row, goal_col)
+    return np.column_stack((rows, cols)), goal_state[1][goal_local]
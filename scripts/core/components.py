@@ -0,0 +1,176 @@
+import os
+import numpy as np
+from scipy import ndimage
+from core.astar_engine import BLOCKED_COST
+from core.grid_store import (
+    ARTIFACT_META, begin_artifact, finish_artifact, grid_fingerprint, load_current_artifact, read_artifact_meta,
+)
+
+# Regions are 8-connected, matching the planner's moves
+EIGHT_CONNECTED = np.ones((3, 3), dtype=bool)
+# Rows of the cost grid read at a time while building the passable mask
+LABEL_BAND_ROWS = 4096
+
+
+class UnreachableError(RuntimeError):
+    """No passable route exists between a leg's endpoints."""
+
+
+def _grid_rows(grid, row0, row1):
+    # TiledCostGrid has no slicing, only windowed reads
+    if hasattr(grid, "read_window"):
+        return grid.read_window(row0, row1, 0, grid.shape[1])
+    return np.asarray(grid[row0:row1])
+
+
+def label_components(grid, out=None):
+    """Label the 8-connected regions of passable cells; blocked cells get 0.
+
+    Returns (labels, count). Labels are written into `out` (e.g. an int32
+    memmap) when given.
+    """
+    h, w = grid.shape
+    passable = np.empty((h, w), dtype=bool)
+    for row0 in range(0, h, LABEL_BAND_ROWS):
+        row1 = min(row0 + LABEL_BAND_ROWS, h)
+        passable[row0:row1] = _grid_rows(grid, row0, row1) < BLOCKED_COST
+    labels = out if out is not None else np.empty((h, w), dtype=np.int32)
+    count = ndimage.label(passable, structure=EIGHT_CONNECTED, output=labels)
+    return labels, count
+
+
+class ComponentIndex:
+    """Connected-component labels of the passable cells, for O(1) reachability checks.
+
+    Passability is symmetric even though move costs are not, so two passable
+    cells are mutually reachable exactly when they share a label. A blocked
+    start can still step out onto any passable neighbor; a blocked goal can
+    never be entered.
+    """
+
+    def __init__(self, labels, count):
+        self.labels = labels
+        self.count = int(count)
+        self._sizes = None
+
+    @classmethod
+    def build(cls, grid, directory, fingerprint):
+        begin_artifact(directory)
+        # Labelled straight into a memmap beside the old labels, then renamed over them
+        path = os.path.join(directory, "labels.npy")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        labels = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.int32, shape=tuple(grid.shape))
+        _, count = label_components(grid, out=labels)
+        labels.flush()
+        del labels
+        os.replace(tmp, path)
+        finish_artifact(directory, {"count": int(count), "shape": list(grid.shape), "grid_fingerprint": fingerprint})
+        return cls.load(directory)[0]
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        meta = read_artifact_meta(directory)
+        return cls(np.load(os.path.join(directory, "labels.npy"), mmap_mode=mmap_mode), meta["count"]), meta
+
+    @property
+    def sizes(self):
+        """Cells per label (index 0 counts blocked cells), computed on first use."""
+        if self._sizes is None:
+            self._sizes = np.bincount(np.asarray(self.labels).ravel(), minlength=self.count + 1)
+        return self._sizes
+
+    def start_labels(self, cell):
+        """Labels a leg starting at `cell` can reach."""
+        row, col = cell
+        label = int(self.labels[row, col])
+        if label:
+            return {label}
+        around = self.labels[max(0, row - 1):row + 2, max(0, col - 1):col + 2]
+        return set(np.unique(around[around > 0]).tolist())
+
+    def reachable(self, start, goal):
+        if tuple(start) == tuple(goal):
+            return True
+        goal_label = int(self.labels[goal[0], goal[1]])
+        return goal_label != 0 and goal_label in self.start_labels(start)
+
+    def nearest_cell(self, cell, label, max_radius=None):
+        """Closest cell to `cell` carrying `label`, searched in growing windows, or None."""
+        h, w = self.labels.shape
+        max_radius = max_radius or max(h, w)
+        radius = 8
+        while True:
+            r0, r1 = max(0, cell[0] - radius), min(h, cell[0] + radius + 1)
+            c0, c1 = max(0, cell[1] - radius), min(w, cell[1] + radius + 1)
+            rows, cols = np.nonzero(self.labels[r0:r1, c0:c1] == label)
+            if len(rows):
+                # The window is a square, so only hits within `radius` are guaranteed nearest
+                dist = np.hypot(rows + r0 - cell[0], cols + c0 - cell[1])
+                best = int(np.argmin(dist))
+                if dist[best] <= radius or radius >= max_radius:
+                    return (int(rows[best] + r0), int(cols[best] + c0))
+            if radius >= max_radius:
+                return None
+            radius = min(radius * 2, max_radius)
+
+    def snap_leg(self, start, goal):
+        """Move the endpoint in the smaller region to the nearest cell of the other one.
+
+        Returns the (start, goal) to plan instead; raises UnreachableError if
+        no endpoint can be moved.
+        """
+        start_labels = self.start_labels(start)
+        goal_label = int(self.labels[goal[0], goal[1]])
+        start_label = max(start_labels, key=lambda label: self.sizes[label]) if start_labels else 0
+        if start_label and (not goal_label or self.sizes[start_label] >= self.sizes[goal_label]):
+            snapped = self.nearest_cell(goal, start_label)
+            if snapped is not None:
+                return start, snapped
+        elif goal_label:
+            snapped = self.nearest_cell(start, goal_label)
+            if snapped is not None:
+                return snapped, goal
+        raise UnreachableError(f"No passable route from {start} to {goal}")
+
+
+def components_dir(grid_path):
+    return os.path.splitext(grid_path)[0] + "_components"
+
+
+def load_or_build_components(grid, grid_path, fingerprint=None):
+    """Load the labels stored next to `grid_path`, labelling `grid` if they are missing or stale.
+
+    The labels are keyed on the fingerprint of the float grid saved at
+    `grid_path`, whichever view of it (tiled, quantized) is being planned on:
+    quantizing keeps every blocked cell blocked, so they share one labelling.
+    """
+    directory = components_dir(grid_path)
+    fingerprint = fingerprint or grid_fingerprint(np.load(grid_path, mmap_mode="r"))
+    components = load_current_artifact(directory, ComponentIndex.load, fingerprint,
+                                       lambda meta: tuple(meta["shape"]) == tuple(grid.shape))
+    if components is not None:
+        return components
+    components = ComponentIndex.build(grid, directory, fingerprint)
+    print(f"✅ {components.count} passable regions labelled in {directory}")
+    return components
+
+
+def update_components(grid_path, row0, col0, old_block, new_block):
+    """Relabel after cells [row0:, col0:] changed from `old_block` to `new_block`.
+
+    Labels only depend on which cells are blocked, so a patch that changes
+    costs without opening or closing any cell is free. Otherwise the whole
+    grid is relabelled: blocking can split a region far from the patch.
+    Either way the labels are re-keyed on the patched grid's fingerprint.
+    """
+    directory = components_dir(grid_path)
+    if not os.path.exists(os.path.join(directory, ARTIFACT_META)):
+        return None
+    grid = np.load(grid_path, mmap_mode="r")
+    if np.array_equal(old_block < BLOCKED_COST, new_block < BLOCKED_COST):
+        components, meta = ComponentIndex.load(directory)
+        finish_artifact(directory, {**meta, "grid_fingerprint": grid_fingerprint(grid)})
+        return components
+    components = ComponentIndex.build(grid, directory, grid_fingerprint(grid))
+    print(f"✅ Passable regions relabelled after the patch at ({row0}, {col0}): {components.count} regions")
+    return components
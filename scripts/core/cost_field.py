@@ -0,0 +1,146 @@
+import os
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from core.astar_engine import BLOCKED_COST, BLOCKED_LEVEL, MOVES, STEP_UNIT
+from core.grid_store import grid_fingerprint, load_current_artifact, read_artifact_meta, save_artifact
+
+
+def grid_graph(grid):
+    """Directed 8-connected graph of a cost grid as a sparse CSR matrix.
+
+    Node ids are linear cell ids (row * width + col). An edge u -> v costs
+    grid[v] times the step factor, matching how astar charges moves, and
+    there are no edges into blocked cells. A QuantizedCostGrid gets the
+    fixed-point weights astar sums on it (level * 1000 or 1414), so its
+    distances are exact integers; multiply them by graph_cost_unit(grid).
+    """
+    scale = getattr(grid, "scale", None)
+    if scale is None:
+        grid = np.asarray(grid, dtype=np.float64)
+        passable = grid < BLOCKED_COST
+        moves = MOVES
+    else:
+        grid = np.asarray(grid.levels, dtype=np.float64)
+        passable = grid != BLOCKED_LEVEL
+        moves = [(di, dj, round(step * STEP_UNIT)) for di, dj, step in MOVES]
+    h, w = grid.shape
+    ids = np.arange(h * w, dtype=np.int64).reshape(h, w)
+
+    sources, targets, weights = [], [], []
+    for di, dj, step in moves:
+        src = (slice(max(0, -di), h - max(0, di)), slice(max(0, -dj), w - max(0, dj)))
+        dst = (slice(max(0, di), h - max(0, -di)), slice(max(0, dj), w - max(0, -dj)))
+        mask = passable[dst]
+        sources.append(ids[src][mask])
+        targets.append(ids[dst][mask])
+        weights.append(grid[dst][mask] * step)
+
+    return csr_matrix(
+        (np.concatenate(weights), (np.concatenate(sources), np.concatenate(targets))),
+        shape=(h * w, h * w),
+    )
+
+
+def graph_cost_unit(grid):
+    """Cost of one unit of grid_graph(grid) distance: 1 for float grids, scale / STEP_UNIT for quantized ones."""
+    scale = getattr(grid, "scale", None)
+    return 1.0 if scale is None else scale / STEP_UNIT
+
+
+class HubCostField:
+    """Shortest-path distance and predecessor rasters to and from one hub cell.
+
+    Move costs depend on the cell being entered, so a path's cost differs by
+    direction. The field keeps an outbound raster (hub -> every cell) and an
+    inbound raster (every cell -> hub) so that both hub legs become a
+    backtrace instead of a search.
+    """
+
+    ARRAYS = ("dist_out", "pred_out", "dist_in", "pred_in")
+
+    def __init__(self, hub, shape, dist_out, pred_out, dist_in, pred_in, cost_unit=1.0):
+        self.hub = (int(hub[0]), int(hub[1]))
+        self.shape = tuple(shape)
+        self.cost_unit = cost_unit
+        self.dist_out = dist_out
+        self.pred_out = pred_out
+        self.dist_in = dist_in
+        self.pred_in = pred_in
+
+    @classmethod
+    def build(cls, grid, hub):
+        h, w = grid.shape
+        hub_id = int(hub[0]) * w + int(hub[1])
+        graph = grid_graph(grid)
+        dist_out, pred_out = dijkstra(graph, directed=True, indices=hub_id, return_predecessors=True)
+        dist_in, pred_in = dijkstra(graph.T.tocsr(), directed=True, indices=hub_id, return_predecessors=True)
+        # Quantized grids: integer sums, converted to costs once, exactly as astar does with its fixed-point g
+        unit = graph_cost_unit(grid)
+        if unit != 1.0:
+            dist_out *= unit
+            dist_in *= unit
+        return cls(hub, (h, w), dist_out, pred_out, dist_in, pred_in, unit)
+
+    def save(self, directory, fingerprint):
+        save_artifact(directory, {name: getattr(self, name) for name in self.ARRAYS}, {
+            "hub": list(self.hub), "shape": list(self.shape), "grid_fingerprint": fingerprint,
+            "cost_unit": self.cost_unit,
+        })
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        meta = read_artifact_meta(directory)
+        arrays = [np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in cls.ARRAYS]
+        return cls(meta["hub"], meta["shape"], *arrays, meta["cost_unit"]), meta
+
+    def _cell_id(self, rc):
+        row, col = int(rc[0]), int(rc[1])
+        if not (0 <= row < self.shape[0] and 0 <= col < self.shape[1]):
+            raise ValueError(f"Cell {rc} is outside the {self.shape[0]}x{self.shape[1]} cost field")
+        return row * self.shape[1] + col
+
+    def _backtrace(self, pred, cell_id):
+        ids = [cell_id]
+        hub_id = self.hub[0] * self.shape[1] + self.hub[1]
+        while cell_id != hub_id:
+            cell_id = int(pred[cell_id])
+            ids.append(cell_id)
+        rows, cols = np.divmod(np.asarray(ids, dtype=np.int64), self.shape[1])
+        return np.column_stack((rows, cols))
+
+    def path_from_hub(self, goal):
+        """(path, cost) for the leg hub -> goal, same contract as astar."""
+        goal_id = self._cell_id(goal)
+        cost = float(self.dist_out[goal_id])
+        if not np.isfinite(cost):
+            return None, float('inf')
+        return self._backtrace(self.pred_out, goal_id)[::-1], cost
+
+    def path_to_hub(self, start):
+        """(path, cost) for the leg start -> hub, same contract as astar."""
+        start_id = self._cell_id(start)
+        cost = float(self.dist_in[start_id])
+        if not np.isfinite(cost):
+            return None, float('inf')
+        return self._backtrace(self.pred_in, start_id), cost
+
+
+def hub_field_dir(grid_path):
+    return os.path.splitext(grid_path)[0] + "_hub_field"
+
+
+def load_or_build_hub_field(grid, hub, grid_path, fingerprint=None):
+    """Load the cached hub field next to `grid_path`, rebuilding it if the grid or hub changed."""
+    directory = hub_field_dir(grid_path)
+    fingerprint = fingerprint or grid_fingerprint(grid)
+    hub = (int(hub[0]), int(hub[1]))
+    field = load_current_artifact(directory, HubCostField.load, fingerprint, lambda meta: tuple(meta["hub"]) == hub)
+    if field is not None:
+        return field
+
+    print(f"Building hub cost field for hub cell {tuple(hub)}...")
+    field = HubCostField.build(grid, hub)
+    field.save(directory, fingerprint)
+    print(f"✅ Hub cost field cached in {directory}")
+    return HubCostField.load(directory)[0]
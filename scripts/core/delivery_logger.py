@@ -1,3 +1,5 @@
+import threading
+import time
 import uuid
 from datetime import datetime
 from trino.dbapi import connect
@@ -45,4 +47,152 @@ def insert_delivery_leg(
     ))
 
     print(f"✅ Inserted delivery leg for drone {drone_id} ({leg_type})")
-    return flight_id
\ No newline at end of file
+    return flight_id
+
+LOG_COLUMNS = (
+    "flight_id", "drone_id", "leg_type",
+    "start_lat", "start_lon", "end_lat", "end_lon",
+    "cost", "path_length", "duration_seconds",
+    "timestamp", "log_date",
+)
+
+
+def sqlite_log_connection(db_path=":memory:"):
+    """Local stand-in for the Trino catalog: a SQLite connection with a delivery_logs table.
+
+    It can be used from any thread, so DeliveryLogWriter's flush timer can write through it.
+    """
+    import sqlite3
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS delivery_logs (
+            flight_id TEXT, drone_id TEXT, leg_type TEXT,
+            start_lat REAL, start_lon REAL, end_lat REAL, end_lon REAL,
+            cost REAL, path_length INTEGER, duration_seconds REAL,
+            timestamp TIMESTAMP, log_date DATE
+        )
+    """)
+    return conn
+
+
+class DeliveryLogWriter:
+    """Buffered delivery_logs writer that reuses one connection.
+
+    Legs are collected in memory and written as multi-row INSERT ... VALUES
+    statements once `batch_size` legs are pending, once the oldest pending
+    leg is `max_delay_s` old (a timer thread flushes a writer that has gone
+    quiet), and on flush()/close(). A batch leaves the buffer once its INSERT
+    succeeds, so a failed flush keeps exactly the legs still to write.
+    By default it connects to Trino with TRINO_CONFIG; pass `conn` (e.g.
+    sqlite_log_connection()) and `table` to write somewhere else.
+    """
+
+    def __init__(self, conn=None, table=None, trino_config=None, batch_size=500, max_delay_s=5.0):
+        if conn is None:
+            if not trino_config:
+                from config.trino_config import TRINO_CONFIG
+                trino_config = TRINO_CONFIG
+            conn = connect(**trino_config)
+            table = table or f"{trino_config['catalog']}.{trino_config['schema']}.delivery_logs"
+        self.conn = conn
+        self.table = table or "delivery_logs"
+        self.batch_size = batch_size
+        self.max_delay_s = max_delay_s
+        self.pending = []
+        self.oldest_pending = None
+        self.rows_written = 0
+        self.batches_written = 0
+        # add(), flush() and the timer all touch the buffer and the connection
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def add(
+        self,
+        drone_id,
+        leg_type,
+        start_lat,
+        start_lon,
+        end_lat,
+        end_lon,
+        cost,
+        path_length,
+        duration_seconds,
+        flight_id=None
+    ):
+        if not flight_id:
+            flight_id = str(uuid.uuid4())
+        timestamp = datetime.utcnow()
+        with self._lock:
+            self.pending.append((
+                flight_id, drone_id, leg_type,
+                start_lat, start_lon, end_lat, end_lon,
+                cost, path_length, duration_seconds,
+                timestamp, timestamp.date()
+            ))
+            if self.oldest_pending is None:
+                self.oldest_pending = time.monotonic()
+                self._start_timer()
+            if len(self.pending) >= self.batch_size or time.monotonic() - self.oldest_pending >= self.max_delay_s:
+                self._flush()
+        return flight_id
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _start_timer(self):
+        self._timer = threading.Timer(self.max_delay_s, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            if self.conn is not None:
+                self._flush()
+
+    def _flush(self):
+        # Callers hold self._lock
+        if not self.pending:
+            return
+        cursor = self.conn.cursor()
+        placeholders = "(" + ", ".join("?" * len(LOG_COLUMNS)) + ")"
+        written = 0
+        try:
+            while self.pending:
+                batch = self.pending[:self.batch_size]
+                insert_query = (
+                    f"INSERT INTO {self.table} ({', '.join(LOG_COLUMNS)}) VALUES "
+                    + ", ".join([placeholders] * len(batch))
+                )
+                cursor.execute(insert_query, [value for row in batch for value in row])
+                cursor.fetchall()
+                # Trino commits every statement, so a batch is written as soon as its INSERT returns
+                del self.pending[:len(batch)]
+                written += len(batch)
+                self.rows_written += len(batch)
+                self.batches_written += 1
+        finally:
+            if written:
+                # Keeps the batches that went through when a later one fails
+                self.conn.commit()
+                print(f"✅ Flushed {written} delivery legs to {self.table}")
+            if not self.pending:
+                self.oldest_pending = None
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+    def close(self):
+        with self._lock:
+            if self.conn is None:
+                return
+            self._flush()
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,175 @@
+import math
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse.csgraph import dijkstra
+from core.cost_field import graph_cost_unit, grid_graph
+
+# Pending orders considered per drone in one assignment round
+BATCH_ORDERS_PER_DRONE = 4
+# Drones back within this many seconds of the first free one join its assignment round
+DISPATCH_WINDOW_S = 300.0
+# Stand-in cost for pairs a drone cannot fly; linear_sum_assignment needs finite entries
+INFEASIBLE = 1e18
+
+
+def octile(a, b):
+    # Lower bound on the cost of any 8-connected path between two cells (every cell costs at least 1)
+    dr, dc = abs(a[0] - b[0]), abs(a[1] - b[1])
+    return max(dr, dc) + (1.414 - 1) * min(dr, dc)
+
+
+class FleetDispatcher:
+    """Assigns pending deliveries to drones, one batch at a time.
+
+    Each drone is free at some simulated time, in seconds from the start of
+    the run. Every flight goes drone position -> pickup -> dropoff -> hub.
+    A round pairs the drones that are free next with the batch of pending
+    orders. A drone x order matrix holds the time each drone would finish
+    each order, and linear_sum_assignment picks the pairing with the
+    smallest total finish time. That puts fast drones on long orders and
+    lets near orders go first; orders that lose out wait for the next free
+    drone.
+
+    Leg costs come from the hub cost field and, for drones away from the
+    hub, one Dijkstra per distinct start cell. Leg 2 comes from the path
+    cache, or from an octile lower bound when the leg was never planned.
+    Costs are in flat-cell units, so cost * cell_size / speed is a time,
+    the same scaling simulate_leg uses. A drone whose range cannot cover
+    the straight-line round trip is never paired with that order.
+    """
+
+    def __init__(self, drones, hub, cell_size, index, hub_field=None, path_cache=None, grid=None):
+        self.drones = list(drones)
+        self.hub = (int(hub[0]), int(hub[1]))
+        self.cell_size = float(cell_size)
+        # lat/lon -> (row, col), e.g. lambda lat, lon: georef.index(lon, lat)
+        self.index = index
+        self.hub_field = hub_field
+        self.path_cache = path_cache
+        self.grid = grid
+        self.available_at = np.zeros(len(self.drones))
+        # Drones start where barn.json puts them (the hub by default) and end every flight at the hub
+        self.positions = [
+            index(d["lat"], d["lon"]) if "lat" in d and "lon" in d else self.hub for d in self.drones
+        ]
+        self.positions = [(int(r), int(c)) for r, c in self.positions]
+        self._approach_fields = {}
+
+    def _approach_field(self, cell):
+        # Outbound distances from a non-hub drone position, one Dijkstra per distinct cell
+        if cell not in self._approach_fields:
+            if self.grid is None:
+                self._approach_fields[cell] = None
+            else:
+                h, w = self.grid.shape
+                dist = dijkstra(grid_graph(self.grid), directed=True, indices=cell[0] * w + cell[1])
+                self._approach_fields[cell] = dist * graph_cost_unit(self.grid)
+        return self._approach_fields[cell]
+
+    def _approach_costs(self, position, pickups):
+        if position == self.hub and self.hub_field is not None:
+            field = self.hub_field.dist_out
+        else:
+            field = self._approach_field(position)
+        if field is None:
+            return np.array([octile(position, p) for p in pickups])
+        w = self.hub_field.shape[1] if self.hub_field is not None else self.grid.shape[1]
+        return np.asarray(field[[p[0] * w + p[1] for p in pickups]], dtype=np.float64)
+
+    def _leg_cost(self, start, goal):
+        if self.path_cache is not None:
+            cached = self.path_cache.get(start, goal)
+            if cached is not None:
+                return float(cached[1])
+        return octile(start, goal)
+
+    def trip_costs(self, deliveries, position=None):
+        """Per-order (cost, reach) of the flight position -> pickup -> dropoff -> hub, the hub by default.
+
+        `cost` is in flat-cell units (inf where a leg is unreachable) and
+        `reach` is the straight-line trip length in cells, for range checks.
+        Neither depends on the drone beyond where it starts.
+        """
+        position = self.hub if position is None else position
+        pickups = [self.index(d["pickup"]["lat"], d["pickup"]["lon"]) for d in deliveries]
+        dropoffs = [self.index(d["dropoff"]["lat"], d["dropoff"]["lon"]) for d in deliveries]
+        pickups = [(int(r), int(c)) for r, c in pickups]
+        dropoffs = [(int(r), int(c)) for r, c in dropoffs]
+
+        carry = np.array([self._leg_cost(p, q) for p, q in zip(pickups, dropoffs)])
+        if self.hub_field is not None:
+            w = self.hub_field.shape[1]
+            back = np.asarray(self.hub_field.dist_in[[q[0] * w + q[1] for q in dropoffs]], dtype=np.float64)
+        else:
+            back = np.array([octile(q, self.hub) for q in dropoffs])
+        reach = np.array([math.dist(position, p) + math.dist(p, q) + math.dist(q, self.hub)
+                          for p, q in zip(pickups, dropoffs)])
+        return self._approach_costs(position, pickups) + carry + back, reach
+
+    def cost_matrix(self, deliveries):
+        """(finish_seconds, flight_seconds) matrices of shape (drones, deliveries); INFEASIBLE where a drone cannot fly it."""
+        flight = np.empty((len(self.drones), len(deliveries)))
+        trips = {}
+        for i, (drone, position) in enumerate(zip(self.drones, self.positions)):
+            if position not in trips:
+                trips[position] = self.trip_costs(deliveries, position)
+            cost, reach = trips[position]
+            flight[i] = cost * self.cell_size / drone["speed_mps"]
+            if "range_km" in drone:
+                flight[i, reach * self.cell_size > drone["range_km"] * 1000] = np.inf
+
+        finish = self.available_at[:, None] + flight
+        finish[~np.isfinite(finish)] = INFEASIBLE
+        return finish, flight
+
+    def assign(self, deliveries):
+        """Pair the drones free next (within DISPATCH_WINDOW_S) with some of `deliveries`.
+
+        Orders only busy drones can fly (e.g. beyond the range of every free
+        drone) bring those drones into the round at their available_at, so
+        every round with a flyable order assigns at least one.
+
+        Returns (assignments, deferred, unassignable). `assignments` holds
+        (delivery, drone_index, start_seconds, estimated_seconds) tuples.
+        `deferred` orders lost out to better pairings this round.
+        `unassignable` orders no drone can fly at all. The assigned drones
+        are booked until their estimated finish; call complete() to replace
+        that with the simulated duration.
+        """
+        if not deliveries:
+            return [], [], []
+        finish, flight = self.cost_matrix(deliveries)
+        feasible = (finish < INFEASIBLE).any(axis=0)
+        unassignable = [d for d, ok in zip(deliveries, feasible) if not ok]
+        columns = np.flatnonzero(feasible)
+        # Only drones free now take part; a busy drone booked this round would get as many orders as a fast idle one
+        free = self.available_at <= self.available_at.min() + DISPATCH_WINDOW_S
+        # ...except for orders no free drone can fly: the busy drones that can join at their available_at,
+        # or those orders would be deferred forever while the free drones never move
+        stranded = ~(finish[np.ix_(free, columns)] < INFEASIBLE).any(axis=0)
+        free |= (finish[:, columns[stranded]] < INFEASIBLE).any(axis=1)
+        candidates = np.flatnonzero(free)
+
+        assignments = []
+        taken = set()
+        if len(columns):
+            rows, cols = linear_sum_assignment(finish[np.ix_(candidates, columns)])
+            for row, col in zip(candidates[rows], cols):
+                j = columns[col]
+                if finish[row, j] >= INFEASIBLE:
+                    continue
+                start = self.available_at[row]
+                assignments.append((deliveries[j], int(row), float(start), float(flight[row, j])))
+                self.available_at[row] = finish[row, j]
+                self.positions[row] = self.hub
+                taken.add(int(j))
+        deferred = [deliveries[j] for j in columns if int(j) not in taken]
+        return assignments, deferred, unassignable
+
+    def complete(self, drone_index, finished_at):
+        """Record when a drone actually got back to the hub."""
+        self.available_at[drone_index] = finished_at
+
+    def makespan(self):
+        """Simulated seconds until the last drone is back."""
+        return float(self.available_at.max()) if len(self.available_at) else 0.0
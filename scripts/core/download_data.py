@@ -8,17 +8,44 @@ def ensure_directories():
     os.makedirs("data/raw", exist_ok=True)
     os.makedirs("data/processed", exist_ok=True)
 
-def generate_srtm_dem_from_bounds(min_lat, max_lat, min_lon, max_lon, resolution=0.001):
+def sample_srtm_grid(elevation_data, lats, lons, nodata=-9999):
+    """Elevation for every (lat, lon) pair of the two 1-D axes, as a (len(lats), len(lons)) array.
+
+    Each SRTM tile touched is decoded into an array once and sampled with
+    fancy indexing, using the same floor-based row/column lookup as
+    GeoElevationFile.get_elevation, so results match per-cell calls exactly.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    data = np.full((len(lats), len(lons)), nodata, dtype=np.float32)
+    tile_lats = np.floor(lats)
+    tile_lons = np.floor(lons)
+
+    for tile_lat in np.unique(tile_lats):
+        lat_idx = np.nonzero(tile_lats == tile_lat)[0]
+        for tile_lon in np.unique(tile_lons):
+            lon_idx = np.nonzero(tile_lons == tile_lon)[0]
+            srtm_file = elevation_data.get_file(float(lats[lat_idx[0]]), float(lons[lon_idx[0]]))
+            if not srtm_file:
+                continue
+
+            side = srtm_file.square_side
+            tile = np.frombuffer(srtm_file.data, dtype=">i2").reshape(side, side)
+            rows = np.floor((srtm_file.latitude + 1 - lats[lat_idx]) * float(side - 1)).astype(np.int64)
+            cols = np.floor((lons[lon_idx] - srtm_file.longitude) * float(side - 1)).astype(np.int64)
+            block = tile[np.ix_(rows, cols)].astype(np.float32)
+            block[(block > 10000) | (block < -1000)] = nodata
+            data[np.ix_(lat_idx, lon_idx)] = block
+
+    return data
+
+
+def generate_srtm_dem_from_bounds(min_lat, max_lat, min_lon, max_lon, resolution=0.001, compress="deflate", block_size=256):
     elevation_data = srtm.get_data()
 
     lats = np.arange(min_lat, max_lat + resolution, resolution)
     lons = np.arange(min_lon, max_lon + resolution, resolution)
-    data = np.zeros((len(lats), len(lons)), dtype=np.float32)
-
-    for i, lat_val in enumerate(lats):
-        for j, lon_val in enumerate(lons):
-            elev = elevation_data.get_elevation(lat_val, lon_val)
-            data[i, j] = elev if elev is not None else -9999
+    data = sample_srtm_grid(elevation_data, lats, lons)
 
     transform = from_origin(
         west=min(lons),
@@ -29,9 +56,7 @@ def generate_srtm_dem_from_bounds(min_lat, max_lat, min_lon, max_lon, resolution
 
     out_path = f"data/raw/elevation.tif"
     data = np.flipud(data)
-    with rasterio.open(
-        out_path,
-        'w',
+    profile = dict(
         driver='GTiff',
         height=data.shape[0],
         width=data.shape[1],
@@ -40,8 +65,17 @@ def generate_srtm_dem_from_bounds(min_lat, max_lat, min_lon, max_lon, resolution
         crs='EPSG:4326',
         transform=transform,
         nodata=-9999
-    ) as dst:
-        dst.write(data, 1)
+    )
+    if compress:
+        # Tiled + compressed so readers (and windowed cost-grid updates) fetch only the blocks they need
+        profile.update(tiled=True, blockxsize=block_size, blockysize=block_size, compress=compress, predictor=3)
+
+    with rasterio.open(out_path, 'w', **profile) as dst:
+        if compress:
+            for _, window in dst.block_windows(1):
+                dst.write(data[window.toslices()], 1, window=window)
+        else:
+            dst.write(data, 1)
 
     print(f"✅ DEM written to: {out_path}")
     return out_path
@@ -0,0 +1,346 @@
+import heapq
+import math
+import numpy as np
+from core.astar_engine import SearchGrid, as_search_grid
+from core.quantized import quantize_costs
+
+
+class DStarLite:
+    """One leg's incremental search state (D* Lite, Koenig & Likhachev 2002).
+
+    The search runs backwards from the goal, so g(s) is the cost from s to
+    the goal and the drone's position can move along the path (`move_to`)
+    without invalidating anything. When cells change cost, `update_cells`
+    re-evaluates only the cells next to them that the search has touched;
+    the next `plan` then repairs the affected part of the search instead of
+    starting over. Moves are charged the cost of the cell being entered,
+    like astar, and work on float and quantized SearchGrids alike.
+
+    State is kept in dicts, so memory follows the explored area. The
+    search_grid's costs must be changed in place (FlightReplanner does that)
+    and reported here.
+    """
+
+    def __init__(self, grid, start, goal, min_cost=None):
+        self.search_grid = sg = grid if isinstance(grid, SearchGrid) else SearchGrid(grid)
+        # memoryview reads give plain Python numbers (as in astar) and still see in-place cost changes
+        self._costs = memoryview(sg.costs)
+        self.start = sg.to_index(start)
+        self.goal = sg.to_index(goal)
+        # Lower bound on any cell's cost, for the heuristic; SearchGrid keeps it so a leg doesn't rescan the grid
+        self.min_cost = sg.min_cost if min_cost is None else min_cost
+        self.reset()
+
+    def reset(self):
+        """Forget the search state (as for a new leg) and plan from scratch on the next `plan`."""
+        # Consistent: every move costs at least min_cost * step, and a diagonal step is under sqrt(2)
+        self.h_scale = self.min_cost * max(step for _, step in self.search_grid.neighbors) / math.sqrt(2)
+        self.km = 0.0
+        self.g = {}
+        self.rhs = {self.goal: 0.0}
+        self.queued = {}
+        self.heap = []
+        self._push(self.goal)
+        self._bounds = None
+
+    def _h(self, a, b):
+        width = self.search_grid.padded_width
+        ar, ac = divmod(a, width)
+        br, bc = divmod(b, width)
+        return self.h_scale * math.hypot(ar - br, ac - bc)
+
+    def _push(self, s):
+        # Heap entries are flat (k1, k2, s) tuples; queued[s] is s's live entry, any other one for s is stale
+        best = min(self.g.get(s, math.inf), self.rhs.get(s, math.inf))
+        self.queued[s] = entry = (best + self._h(self.start, s) + self.km, best, s)
+        heapq.heappush(self.heap, entry)
+
+    def _update_vertex(self, s):
+        # Queued exactly while inconsistent
+        if self.g.get(s, math.inf) != self.rhs.get(s, math.inf):
+            self._push(s)
+        else:
+            self.queued.pop(s, None)
+
+    def _outside(self, s):
+        # Padding ring around the grid: never a position, so never a predecessor worth tracking
+        row, col = divmod(s, self.search_grid.padded_width)
+        return row == 0 or col == 0 or row > self.search_grid.height or col > self.search_grid.width
+
+    def _best_successor(self, s):
+        """(min over successors of c(s, s') + g(s'), that successor)."""
+        costs = self._costs
+        blocked = self.search_grid.blocked
+        g = self.g
+        best, best_next = math.inf, -1
+        for offset, step in self.search_grid.neighbors:
+            nxt = s + offset
+            cost = costs[nxt]
+            if cost >= blocked:
+                continue
+            total = cost * step + g.get(nxt, math.inf)
+            if total < best:
+                best, best_next = total, nxt
+        return best, best_next
+
+    def _compute(self, stats=None):
+        sg = self.search_grid
+        costs = self._costs
+        blocked = sg.blocked
+        neighbors = sg.neighbors
+        width = sg.padded_width
+        g, rhs, queued, heap = self.g, self.rhs, self.queued, self.heap
+        start, goal, km, h_scale = self.start, self.goal, self.km, self.h_scale
+        start_row, start_col = divmod(start, width)
+        inf = math.inf
+        hypot = math.hypot
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        expanded = pushed = 0
+        peak_heap = len(heap)
+        track_peak = stats is not None
+
+        while heap:
+            if track_peak and len(heap) > peak_heap:
+                peak_heap = len(heap)
+            entry = heap[0]
+            k1, k2, u = entry
+            if queued.get(u) is not entry:
+                heappop(heap)
+                continue
+            g_start, rhs_start = g.get(start, inf), rhs.get(start, inf)
+            best = min(g_start, rhs_start)
+            if (k1 > best + km or k1 == best + km and k2 >= best) and rhs_start <= g_start:
+                break
+            heappop(heap)
+            g_u, rhs_u = g.get(u, inf), rhs[u]
+            best = min(g_u, rhs_u)
+            row, col = divmod(u, width)
+            new_k1 = best + h_scale * hypot(row - start_row, col - start_col) + km
+            if k1 < new_k1 or k1 == new_k1 and k2 < best:
+                # Queued before the drone moved (km grew): requeue with the current key
+                queued[u] = entry = (new_k1, best, u)
+                heappush(heap, entry)
+                pushed += 1
+                continue
+            del queued[u]
+            expanded += 1
+            # Entering u costs the same from every predecessor, up to the step factor
+            entry_cost = costs[u]
+            if g_u > rhs_u:
+                # Overconsistent: settle u and offer it to its predecessors (nothing to offer if u is blocked)
+                g[u] = rhs_u
+                if entry_cost >= blocked:
+                    continue
+                for offset, step in neighbors:
+                    p = u + offset
+                    candidate = entry_cost * step + rhs_u
+                    if candidate >= rhs.get(p, inf) or p == goal:
+                        continue
+                    if costs[p] >= blocked and self._outside(p):
+                        continue
+                    rhs[p] = candidate
+                    g_p = g.get(p, inf)
+                    if g_p == candidate:
+                        queued.pop(p, None)
+                        continue
+                    best = min(g_p, candidate)
+                    row, col = divmod(p, width)
+                    queued[p] = entry = (best + h_scale * hypot(row - start_row, col - start_col) + km, best, p)
+                    heappush(heap, entry)
+                    pushed += 1
+            else:
+                # Underconsistent: u got more expensive; predecessors that went through u look again
+                g[u] = inf
+                if rhs_u < inf:
+                    queued[u] = entry = (rhs_u + h_scale * hypot(row - start_row, col - start_col) + km, rhs_u, u)
+                    heappush(heap, entry)
+                    pushed += 1
+                if entry_cost >= blocked:
+                    entry_cost = inf
+                for offset, step in neighbors:
+                    p = u + offset
+                    if p == goal or rhs.get(p) != entry_cost * step + g_u:
+                        continue
+                    rhs_p = inf
+                    for offset2, step2 in neighbors:
+                        cost = costs[p + offset2]
+                        if cost < blocked:
+                            total = cost * step2 + g.get(p + offset2, inf)
+                            if total < rhs_p:
+                                rhs_p = total
+                    rhs[p] = rhs_p
+                    g_p = g.get(p, inf)
+                    if g_p == rhs_p:
+                        queued.pop(p, None)
+                        continue
+                    best = min(g_p, rhs_p)
+                    prow, pcol = divmod(p, width)
+                    queued[p] = entry = (best + h_scale * hypot(prow - start_row, pcol - start_col) + km, best, p)
+                    heappush(heap, entry)
+                    pushed += 1
+
+        self._bounds = None
+        if stats is not None:
+            stats.update(expanded=expanded, pushed=pushed, peak_heap=peak_heap)
+
+    def plan(self, stats=None):
+        """(path, cost) from the current position to the goal; same contract as astar."""
+        sg = self.search_grid
+        if self._costs[self.goal] >= sg.blocked and self.start != self.goal:
+            # Every way in is blocked; the backward search would only prove it by exhausting the region
+            if stats is not None:
+                stats.update(expanded=0, pushed=0, peak_heap=len(self.heap))
+            return None, float('inf')
+        self._compute(stats)
+        if self.rhs.get(self.start, math.inf) == math.inf:
+            return None, float('inf')
+        path = [self.start]
+        current = self.start
+        # Follow the cheapest successor; g is exact along the optimal path once the search is consistent
+        for _ in range(sg.size):
+            if current == self.goal:
+                break
+            current = self._best_successor(current)[1]
+            if current < 0:
+                return None, float('inf')
+            path.append(current)
+        return sg.to_rowcol(path), self.rhs[self.start] * sg.cost_unit
+
+    def move_to(self, cell):
+        """The drone has moved on to `cell`; later plans start there."""
+        new_start = self.search_grid.to_index(cell)
+        self.km += self._h(self.start, new_start)
+        self.start = new_start
+
+    def bounds(self):
+        """(row0, row1, col0, col1) padded-grid box around every cell the search has touched."""
+        if self._bounds is None:
+            ids = np.fromiter(self.rhs.keys(), dtype=np.int64, count=len(self.rhs))
+            rows, cols = np.divmod(ids, self.search_grid.padded_width)
+            self._bounds = (int(rows.min()), int(rows.max()) + 1, int(cols.min()), int(cols.max()) + 1)
+        return self._bounds
+
+    def update_cells(self, ids, old_costs):
+        """Cells `ids` (padded linear ids, already changed in the grid) used to cost `old_costs`.
+
+        Re-evaluates the touched predecessors of each changed cell; returns
+        True if that made any of them inconsistent (so `plan` has work to do).
+        """
+        sg = self.search_grid
+        blocked, neighbors = sg.blocked, sg.neighbors
+        rhs, g, goal = self.rhs, self.g, self.goal
+        inf = math.inf
+        new_costs = sg.costs[ids]
+        passable = new_costs < blocked
+        if passable.any() and float(new_costs[passable].min()) < self.min_cost:
+            # Cheaper than anything the heuristic assumed: it may overestimate now, so start over
+            self.min_cost = sg.min_cost = float(new_costs[passable].min())
+            self.reset()
+            return True
+        dirty = False
+        for v, old, new in zip(ids.tolist(), old_costs.tolist(), new_costs.tolist()):
+            old = inf if old >= blocked else old
+            new = inf if new >= blocked else new
+            g_v = g.get(v, inf)
+            for offset, step in neighbors:
+                u = v - offset
+                if u == goal or u not in rhs:
+                    continue
+                if new < old:
+                    candidate = new * step + g_v
+                    if candidate >= rhs[u]:
+                        continue
+                    rhs[u] = candidate
+                elif rhs[u] == old * step + g_v:
+                    rhs[u] = self._best_successor(u)[0]
+                else:
+                    continue
+                self._update_vertex(u)
+                dirty = True
+        return dirty
+
+
+def dstar_lite(grid, start, goal, stats=None):
+    """One-shot D* Lite search; same contract as astar. Keep a DStarLite to replan incrementally."""
+    return DStarLite(as_search_grid(grid), start, goal).plan(stats)
+
+
+class FlightReplanner:
+    """Active legs over one private copy of the cost grid, repaired together when it changes.
+
+    `apply_update(row0, col0, block)` takes exactly what
+    update_cost_grid_window returns: it writes the block into the grid,
+    works out which cells actually changed and repairs only the legs whose
+    searches reached them. A leg far from the change costs one box test.
+    """
+
+    def __init__(self, grid):
+        # Private copy: the costs are patched in place as updates arrive
+        self.search_grid = SearchGrid(grid)
+        self.min_cost = self.search_grid.min_cost
+        self.legs = {}
+        self.paths = {}
+
+    def add(self, flight_id, start, goal):
+        leg = DStarLite(self.search_grid, start, goal, self.min_cost)
+        self.legs[flight_id] = leg
+        self.paths[flight_id] = leg.plan()
+        return self.paths[flight_id]
+
+    def advance(self, flight_id, cell):
+        self.legs[flight_id].move_to(cell)
+
+    def remove(self, flight_id):
+        self.legs.pop(flight_id, None)
+        self.paths.pop(flight_id, None)
+
+    def apply_update(self, row0, col0, block, stats=None):
+        """Patch cells [row0:, col0:] with `block` (float costs) and replan the legs it affects.
+
+        Returns {flight_id: (path, cost)} for the legs that were replanned;
+        every other leg keeps its current path. A path of None means the
+        leg can no longer reach its goal. When costs only went up, legs
+        whose path avoids the changed cells are not replanned: their path is
+        still the cheapest one.
+        """
+        sg = self.search_grid
+        block = np.asarray(block, dtype=np.float64)
+        height, width = block.shape
+        rows = np.arange(row0 + 1, row0 + 1 + height)
+        cols = np.arange(col0 + 1, col0 + 1 + width)
+        ids = (rows[:, None] * sg.padded_width + cols[None, :]).ravel()
+        new = (block if sg.scale is None else quantize_costs(block, sg.scale)).ravel()
+        old = sg.costs[ids]
+        changed = old != new
+        ids, old = ids[changed], old[changed]
+        sg.costs[ids] = new[changed]
+        cheaper = bool(np.any(new[changed] < old))
+
+        replanned = {}
+        skipped = deferred = 0
+        if ids.size and float(np.min(sg.costs[ids])) < self.min_cost:
+            # Cheaper than any cell so far: every leg's heuristic may overestimate now, so all of them start over
+            self.min_cost = sg.min_cost = float(np.min(sg.costs[ids]))
+            for flight_id, leg in self.legs.items():
+                leg.min_cost = self.min_cost
+                leg.reset()
+                replanned[flight_id] = self.paths[flight_id] = leg.plan()
+        elif ids.size:
+            # Padded box of the change, grown by one: its neighbors are the cells whose edges changed
+            r0, r1 = int(rows[0]) - 1, int(rows[-1]) + 2
+            c0, c1 = int(cols[0]) - 1, int(cols[-1]) + 2
+            for flight_id, leg in self.legs.items():
+                br0, br1, bc0, bc1 = leg.bounds()
+                if br1 <= r0 or r1 <= br0 or bc1 <= c0 or c1 <= bc0 or not leg.update_cells(ids, old):
+                    skipped += 1
+                    continue
+                path = self.paths[flight_id][0]
+                if not cheaper and (path is None or not np.isin((path[:, 0] + 1) * sg.padded_width + path[:, 1] + 1, ids).any()):
+                    # Only dearer cells, none on the path: it is still optimal. The queued repair runs on the next plan
+                    deferred += 1
+                    continue
+                replanned[flight_id] = self.paths[flight_id] = leg.plan()
+        if stats is not None:
+            stats.update(changed_cells=int(ids.size), replanned=len(replanned), deferred=deferred, skipped=skipped)
+        return replanned
@@ -1,17 +1,45 @@
-import json, math, os, heapq, sqlite3, time
+import json, math, os, heapq, sqlite3, time, uuid
 from datetime import datetime
 import numpy as np
 import rasterio
 from rasterio.transform import xy
 from order_manager import fetch_pending_orders
+from core.astar_engine import astar, astar_bidirectional
+from core.components import UnreachableError, load_or_build_components
+from core.cost_field import load_or_build_hub_field
+from core.grid_store import TiledCostGrid, grid_fingerprint
+from core.hpa import load_or_build_hpa_graph
+from core.landmarks import load_or_build_landmarks
+from core.path_cache import PathCache
+from core.path_store import PathStoreWriter
+from core.planner import LegPlanner, planner_mode
+from core.pyramid import load_or_build_pyramid
 from drone_deliveries.scripts.core.delivery_logger import insert_delivery_leg  # name your logger file whatever you like
 from drone_deliveries.scripts.config.trino_config import TRINO_CONFIG
 
 # Configs
 COST_GRID_PATH = "data/processed/cost_grid.npy"
+COST_GRID_TILES_DIR = "data/processed/cost_grid_tiles"
 ELEVATION_TIF = "data/raw/elevation.tif"
 DELIVERY_PATH = "data/raw/delivery_coords.json"
 HUB_PATH = "data/raw/central_hub.json"
+# Answer hub legs (1 and 3) by backtracing a cached cost field instead of searching
+USE_HUB_COST_FIELD = True
+# Memory-map the tiled grid and page in only the tiles a search touches (no hub field in this mode)
+USE_TILED_GRID = False
+# Reuse legs planned in earlier runs; entries are invalidated when the grid changes
+USE_PATH_CACHE = True
+# Plan long legs on the precomputed cluster graph (HPA*); faster, but legs cost a few percent more than
+# the optimum (see bench/bench_hpa.py), so it is opt-in like the other planners
+USE_HPA = False
+# Coarse-to-fine corridor search over a pooled cost pyramid; only used when USE_HPA is off
+USE_PYRAMID = False
+# Exact search with the landmark (ALT) heuristic instead of plain astar; used when neither of the above is
+USE_LANDMARKS = False
+# Search from both ends at once when none of the above is in use
+USE_BIDIRECTIONAL_SEARCH = False
+# Legs between disconnected regions: "reject" the order up front, or "snap" the endpoint to the nearest reachable cell
+UNREACHABLE_POLICY = "reject"
 
 
 def load_barn():
@@ -34,59 +62,22 @@ def load_coordinates():
 def heuristic(a, b):
     return math.hypot(a[0]-b[0], a[1]-b[1])
 
-# A* algorithm
-# NOTE: This implementation assumes a fixed route order (hub → pickup → drop-off → hub).
-# It does not attempt to reorder waypoints or optimize multi-stop delivery sequences.
-# That would be a form of the NP-hard Traveling Salesman Problem (TSP) and is out of scope for now.
-def astar(grid, start, goal):
-    open_heap = []
-    heapq.heappush(open_heap, (0 + heuristic(start, goal), start))
-    came_from = {}
-    gscore = {start: 0}
-    fscore = {start: heuristic(start, goal)}
-    visited = np.zeros_like(grid, dtype=bool)
-
-    while open_heap:
-        current = heapq.heappop(open_heap)[1]
-        if visited[current[0], current[1]]:
-            continue
-        visited[current[0], current[1]] = True
-        if current == goal:
-            path = []
-            while current in came_from:
-                path.append(current)
-                current = came_from[current]
-            path.append(start)
-            path.reverse()
-            return path, gscore[goal]
-
-        for i, j in [(-1,0), (1,0), (0,-1), (0,1), (-1,-1), (-1,1), (1,-1), (1,1)]:
-            neighbor = (current[0]+i, current[1]+j)
-            if 0 <= neighbor[0] < grid.shape[0] and 0 <= neighbor[1] < grid.shape[1]:
-                if grid[neighbor[0], neighbor[1]] >= 100:
-                    continue
-                move_cost = grid[neighbor[0], neighbor[1]] * (1.414 if i != 0 and j != 0 else 1)
-                tentative_g = gscore[current] + move_cost
-                if tentative_g < gscore.get(neighbor, float('inf')):
-                    came_from[neighbor] = current
-                    gscore[neighbor] = tentative_g
-                    fscore[neighbor] = tentative_g + heuristic(neighbor, goal)
-                    heapq.heappush(open_heap, (fscore[neighbor], neighbor))
-    return None, float('inf')
+# Constant-time check of all three legs, so an unflyable order is dropped before any leg is logged
+def check_delivery(planner, src, hub, delivery):
+    stops = [hub, delivery["pickup"], delivery["dropoff"], hub]
+    for origin, dest in zip(stops, stops[1:]):
+        planner.resolve(src.index(origin["lon"], origin["lat"]), src.index(dest["lon"], dest["lat"]))
 
 # Compute stats per leg
-def simulate_leg(grid, transform, src, origin, dest, leg_number, drone_id, speed_mps):
+def simulate_leg(planner, src, origin, dest, leg_number, drone_id, speed_mps, path_writer, flight_id):
     start_rc = src.index(origin["lon"], origin["lat"])
     goal_rc = src.index(dest["lon"], dest["lat"])
-    path, cost = astar(grid, start_rc, goal_rc)
-    if not path:
+    path, cost = planner.plan(start_rc, goal_rc)
+    if path is None:
         raise RuntimeError("No path found")
 
-    # Save path to file for visualization later
-    os.makedirs("data/logs", exist_ok=True)
-    path_file = f"data/logs/{drone_id}_leg{leg_number}_path.json"
-    with open(path_file, "w") as f:
-        json.dump({"path": path, "transform": transform.to_gdal()}, f)
+    # Save path for visualization later
+    path_writer.add(flight_id, drone_id, leg_number, path, cost)
 
     distance = heuristic(start_rc, goal_rc) * src.res[0]  # Grid distance * resolution
     est_time = distance / speed_mps
@@ -103,19 +94,46 @@ def simulate_leg(grid, transform, src, origin, dest, leg_number, drone_id, speed
 
 # Main simulation
 if __name__ == "__main__":
-    grid = np.load(COST_GRID_PATH)
+    grid = TiledCostGrid(COST_GRID_TILES_DIR) if USE_TILED_GRID else np.load(COST_GRID_PATH)
     with rasterio.open(ELEVATION_TIF) as src:
         transform = src.transform
         hub, deliveries = load_coordinates()
         drones = load_barn()
-        for delivery, drone in zip(deliveries, drones):
-            drone_id = drone["id"]
-            speed = drone["speed_mps"]
-            inserts = []
-            inserts.append(simulate_leg(grid, transform, src, hub, delivery["pickup"], 1, drone_id, speed))
-            inserts.append(simulate_leg(grid, transform, src, delivery["pickup"], delivery["dropoff"], 2, drone_id, speed))
-            inserts.append(simulate_leg(grid, transform, src, delivery["dropoff"], hub, 3, drone_id, speed))
-            print("\n".join(inserts))
-            print("-- End of delivery simulation --\n")
+        fingerprint = None if USE_TILED_GRID else grid_fingerprint(grid)
+        hub_field = None
+        if USE_HUB_COST_FIELD and not USE_TILED_GRID:
+            hub_field = load_or_build_hub_field(grid, src.index(hub["lon"], hub["lat"]), COST_GRID_PATH, fingerprint)
+        hpa_graph = load_or_build_hpa_graph(grid, COST_GRID_PATH, fingerprint) if USE_HPA and fingerprint else None
+        pyramid = None
+        if USE_PYRAMID and not hpa_graph and fingerprint:
+            pyramid = load_or_build_pyramid(grid, COST_GRID_PATH, fingerprint)
+        landmarks = None
+        if USE_LANDMARKS and not (hpa_graph or pyramid) and fingerprint:
+            landmarks = load_or_build_landmarks(grid, COST_GRID_PATH, fingerprint)
+        engine = astar_bidirectional if USE_BIDIRECTIONAL_SEARCH else astar
+        path_cache = None
+        if USE_PATH_CACHE and fingerprint:
+            path_cache = PathCache(fingerprint, planner_mode(hpa_graph, landmarks, pyramid, engine, UNREACHABLE_POLICY))
+        components = load_or_build_components(grid, COST_GRID_PATH, fingerprint)
+        planner = LegPlanner(grid, hub_field, path_cache, hpa_graph, landmarks, pyramid, engine,
+                             components, UNREACHABLE_POLICY)
+        with PathStoreWriter(transform=transform) as path_writer:
+            for delivery, drone in zip(deliveries, drones):
+                drone_id = drone["id"]
+                speed = drone["speed_mps"]
+                try:
+                    check_delivery(planner, src, hub, delivery)
+                except UnreachableError as e:
+                    print(f"Skipping delivery to {delivery['dropoff']['name']}: {e}")
+                    continue
+                flight_id = str(uuid.uuid4())
+                inserts = []
+                inserts.append(simulate_leg(planner, src, hub, delivery["pickup"], 1, drone_id, speed, path_writer, flight_id))
+                inserts.append(simulate_leg(planner, src, delivery["pickup"], delivery["dropoff"], 2, drone_id, speed, path_writer, flight_id))
+                inserts.append(simulate_leg(planner, src, delivery["dropoff"], hub, 3, drone_id, speed, path_writer, flight_id))
+                print("\n".join(inserts))
+                print("-- End of delivery simulation --\n")
+        if path_cache is not None:
+            print(f"Path cache: {path_cache.stats()}")
 
 
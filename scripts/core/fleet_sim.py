@@ -0,0 +1,157 @@
+import heapq
+from collections import deque
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from core.dispatcher import BATCH_ORDERS_PER_DRONE, INFEASIBLE
+
+# Seconds of flight time one second of waiting is worth when choosing orders, so long orders are not starved
+WAIT_PRIORITY = 1.0
+
+
+class FleetSimulation:
+    """Discrete-event simulation of a drone fleet serving orders as they arrive.
+
+    Time only moves between events: order arrivals (sorted by `created_s`)
+    and drone-free events, kept in a heap keyed by the time each drone gets
+    back to the hub. At every event time the idle drones are paired with
+    the oldest waiting orders (at most BATCH_ORDERS_PER_DRONE per idle
+    drone) by linear_sum_assignment. Orders wait in one queue per drone
+    range, so far orders at the head never hide the ones an idle
+    short-range drone could fly: it also sees the oldest orders within its
+    range. The score is flight time minus WAIT_PRIORITY * time already
+    waited. Every drone starts at the hub and each flight ends there.
+
+    Flight times come from FleetDispatcher.trip_costs, computed once per
+    order, and each drone's speed_mps. Pass `flight_time(delivery, drone,
+    estimate)` to replace the estimate with a real duration, e.g. by
+    planning and logging the legs. Orders outside every drone's range_km
+    are rejected on arrival.
+    """
+
+    def __init__(self, dispatcher, flight_time=None):
+        self.dispatcher = dispatcher
+        self.drones = dispatcher.drones
+        self.flight_time = flight_time
+        self.speed = np.array([d["speed_mps"] for d in self.drones], dtype=np.float64)
+        self.range_cells = np.array([d.get("range_km", np.inf) * 1000 for d in self.drones]) / dispatcher.cell_size
+
+    def run(self, deliveries):
+        """Simulate `deliveries` (dicts with pickup, dropoff and created_s) and return a stats dict."""
+        deliveries = sorted(deliveries, key=lambda d: d["created_s"])
+        n = len(deliveries)
+        created = np.array([d["created_s"] for d in deliveries], dtype=np.float64)
+        cost, reach = self.dispatcher.trip_costs(deliveries) if n else (np.empty(0), np.empty(0))
+        seconds_per_cost = self.dispatcher.cell_size / self.speed
+        servable = np.isfinite(cost) & (reach <= self.range_cells.max())
+        # Distinct ranges, shortest first; an order waits in the queue of the shortest range that covers it
+        ranges = np.unique(self.range_cells)
+        drone_class = np.searchsorted(ranges, self.range_cells)
+        order_class = np.searchsorted(ranges, reach)
+
+        started = np.full(n, np.nan)
+        finished = np.full(n, np.nan)
+        busy = np.zeros(len(self.drones))
+        flights = np.zeros(len(self.drones), dtype=np.int64)
+        # Drone-free events: (time, drone); every drone is idle at t=0
+        free_events = [(0.0, i) for i in range(len(self.drones))]
+        idle = []
+        # Servable orders in arrival order per range; only the heads (the assignment window) are ever touched
+        waiting = [deque() for _ in ranges]
+        peak_waiting = 0
+        next_order = 0
+        now = 0.0
+
+        while next_order < n or free_events:
+            if free_events and (next_order >= n or free_events[0][0] <= created[next_order]):
+                now = free_events[0][0]
+            else:
+                now = created[next_order]
+            while free_events and free_events[0][0] <= now:
+                idle.append(heapq.heappop(free_events)[1])
+            while next_order < n and created[next_order] <= now:
+                if servable[next_order]:
+                    waiting[order_class[next_order]].append(next_order)
+                next_order += 1
+            queued = sum(len(queue) for queue in waiting)
+            peak_waiting = max(peak_waiting, queued)
+            if not idle or not queued:
+                continue
+
+            drones = np.array(idle)
+            window = self._take_window(waiting, drone_class[drones])
+            if not window:
+                continue
+            window = np.array(window)
+            flight = cost[window][None, :] * seconds_per_cost[drones][:, None]
+            score = flight - WAIT_PRIORITY * (now - created[window])[None, :]
+            score[reach[window][None, :] > self.range_cells[drones][:, None]] = INFEASIBLE
+            if len(drones) == 1:
+                rows, cols = np.zeros(1, dtype=np.int64), np.array([np.argmin(score[0])])
+            elif len(window) == 1:
+                rows, cols = np.array([np.argmin(score[:, 0])]), np.zeros(1, dtype=np.int64)
+            else:
+                rows, cols = linear_sum_assignment(score)
+
+            assigned = set()
+            for row, col in zip(rows, cols):
+                if score[row, col] >= INFEASIBLE:
+                    continue
+                drone, order = int(drones[row]), int(window[col])
+                seconds = float(flight[row, col])
+                if self.flight_time is not None:
+                    seconds = self.flight_time(deliveries[order], self.drones[drone], seconds)
+                started[order], finished[order] = now, now + seconds
+                busy[drone] += seconds
+                flights[drone] += 1
+                heapq.heappush(free_events, (now + seconds, drone))
+                assigned.add(int(row))
+                window[col] = -1
+            idle = [int(d) for i, d in enumerate(drones) if i not in assigned]
+            # Orders that lost out go back to the head of their queues, still oldest first
+            for order in sorted((int(order) for order in window if order >= 0), reverse=True):
+                waiting[order_class[order]].appendleft(order)
+
+        return self._report(created, started, finished, busy, flights, servable, peak_waiting)
+
+    @staticmethod
+    def _take_window(waiting, classes):
+        # The oldest BATCH_ORDERS_PER_DRONE orders per idle drone that one of them can reach; an idle drone
+        # that can reach none of those (far orders fill the head) also gets the oldest within its own range
+        counts = np.bincount(classes)
+        window = []
+        lowest = len(waiting)
+        for top in np.flatnonzero(counts)[::-1]:
+            if lowest <= top:
+                continue
+            count = BATCH_ORDERS_PER_DRONE * (counts[top] if window else len(classes))
+            heads = [(queue[0], c) for c, queue in enumerate(waiting[:top + 1]) if queue]
+            heapq.heapify(heads)
+            while heads and count:
+                order, c = heapq.heappop(heads)
+                waiting[c].popleft()
+                if waiting[c]:
+                    heapq.heappush(heads, (waiting[c][0], c))
+                window.append(order)
+                lowest = min(lowest, c)
+                count -= 1
+        return window
+
+    def _report(self, created, started, finished, busy, flights, servable, peak_waiting):
+        served = ~np.isnan(finished)
+        makespan = float(finished[served].max()) if served.any() else 0.0
+        wait = started[served] - created[served]
+        horizon = makespan - (float(created.min()) if len(created) else 0.0)
+        return {
+            "orders": int(len(created)),
+            "served": int(served.sum()),
+            "rejected": int((~servable).sum()),
+            "makespan_s": makespan,
+            "orders_per_hour": float(served.sum() / (horizon / 3600)) if horizon > 0 else 0.0,
+            "utilization": float(busy.sum() / (len(busy) * horizon)) if horizon > 0 else 0.0,
+            "wait_mean_s": float(wait.mean()) if len(wait) else 0.0,
+            "wait_p50_s": float(np.percentile(wait, 50)) if len(wait) else 0.0,
+            "wait_p95_s": float(np.percentile(wait, 95)) if len(wait) else 0.0,
+            "wait_max_s": float(wait.max()) if len(wait) else 0.0,
+            "peak_waiting": int(peak_waiting),
+            "flights_per_drone": flights.tolist(),
+        }
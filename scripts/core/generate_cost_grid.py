@@ -1,33 +1,274 @@
+import argparse
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
 import rasterio
 import numpy as np
-import matplotlib.pyplot as plt
+from rasterio.windows import Window, from_bounds
 from scipy.ndimage import sobel
 import os
+from core.astar_engine import BLOCKED_COST, invalidate_search_grid
+from core.components import ComponentIndex, components_dir, update_components
+from core.georef import GeoReference
+from core.grid_store import grid_fingerprint, patch_tiled_grid, write_tiled_grid
+from core.hpa import DEFAULT_CLUSTER_SIZE, load_or_build_hpa_graph
+from core.landmarks import DEFAULT_LANDMARKS, load_or_build_landmarks
+from core.pyramid import load_or_build_pyramid
+from core.quantized import load_or_build_quantized
 
-# Load elevation GeoTIFF
-with rasterio.open("data/raw/elevation.tif") as src:
-    elevation = src.read(1)  # Read first band
-    transform = src.transform
+ELEVATION_TIF = "data/raw/elevation.tif"
+COST_GRID_PATH = "data/processed/cost_grid.npy"
+COST_GRID_META_PATH = "data/processed/cost_grid_meta.json"
+COST_GRID_TILES_DIR = "data/processed/cost_grid_tiles"
+NO_FLY_ZONES_PATH = "data/processed/no_fly_zones.json"
 
-# Optional: mask out invalid values
-elevation = np.where(elevation == src.nodata, np.nan, elevation)
+# Sobel is a 3x3 stencil, so a window needs one extra cell on each side to match a full run
+SOBEL_HALO = 1
 
-# Compute slope from elevation
-dx = sobel(elevation, axis=1, mode='nearest')
-dy = sobel(elevation, axis=0, mode='nearest')
-slope = np.hypot(dx, dy)
 
-# Normalize and scale slope to get cost
-slope = np.nan_to_num(slope, nan=0.0)
-cost_grid = 1 + (slope / np.max(slope)) * 9  # Cost from 1 (flat) to 10 (steep)
+def slope_from_elevation(elevation, nodata):
+    # Optional: mask out invalid values
+    elevation = np.where(elevation == nodata, np.nan, elevation)
 
+    # Compute slope from elevation
+    dx = sobel(elevation, axis=1, mode='nearest')
+    dy = sobel(elevation, axis=0, mode='nearest')
+    slope = np.hypot(dx, dy)
+    return np.nan_to_num(slope, nan=0.0)
 
-# Save processed cost grid
-os.makedirs("data/processed", exist_ok=True)
-np.save("data/processed/cost_grid.npy", cost_grid)
 
-print("✅ Cost grid generated and saved to /data/processed/cost_grid.npy")
-plt.imshow(cost_grid, cmap='hot')
-plt.colorbar(label='Movement Cost')
-plt.title("Movement Cost Grid (from Slope)")
-plt.show()
\ No newline at end of file
+def slope_to_cost(slope, slope_scale):
+    return 1 + (slope / slope_scale) * 9  # Cost from 1 (flat) to 10 (steep)
+
+
+def load_no_fly_zones(path=NO_FLY_ZONES_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)["zones"]
+
+
+def zone_window(transform, shape, zone):
+    """Row/col window [row0:row1, col0:col1] covering a lat/lon box, clipped to the grid."""
+    window = from_bounds(zone["min_lon"], zone["min_lat"], zone["max_lon"], zone["max_lat"], transform)
+    row0 = max(0, math.floor(window.row_off))
+    col0 = max(0, math.floor(window.col_off))
+    row1 = min(shape[0], math.ceil(window.row_off + window.height))
+    col1 = min(shape[1], math.ceil(window.col_off + window.width))
+    return row0, row1, col0, col1
+
+
+def apply_no_fly_zones(cost, transform, shape, zones, row0=0, col0=0):
+    """Mark no-fly cells of `cost` (a block starting at row0, col0 of the grid) as blocked."""
+    for zone in zones:
+        z_row0, z_row1, z_col0, z_col1 = zone_window(transform, shape, zone)
+        r0, r1 = max(z_row0, row0), min(z_row1, row0 + cost.shape[0])
+        c0, c1 = max(z_col0, col0), min(z_col1, col0 + cost.shape[1])
+        if r0 < r1 and c0 < c1:
+            cost[r0 - row0:r1 - row0, c0 - col0:c1 - col0] = BLOCKED_COST
+    return cost
+
+
+def build_cost_grid(elevation_tif=ELEVATION_TIF, out_path=COST_GRID_PATH, show=False):
+    """Full rebuild: slope-based cost for the whole DEM, plus the tiled copy and metadata."""
+    # Load elevation GeoTIFF
+    with rasterio.open(elevation_tif) as src:
+        elevation = src.read(1)  # Read first band
+        transform = src.transform
+        nodata = src.nodata
+
+    slope = slope_from_elevation(elevation, nodata)
+    # Persist the normalization so windowed updates scale new slopes the same way
+    slope_scale = float(np.max(slope)) or 1.0
+    cost_grid = slope_to_cost(slope, slope_scale)
+    apply_no_fly_zones(cost_grid, transform, cost_grid.shape, load_no_fly_zones())
+
+    # Save processed cost grid
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    np.save(out_path, cost_grid)
+    _write_meta(slope_scale, GeoReference(transform, cost_grid.shape, nodata))
+    print(f"✅ Cost grid generated and saved to {out_path}")
+
+    # Tiled copy for memory-mapped, page-on-demand planning
+    write_tiled_grid(cost_grid, COST_GRID_TILES_DIR, transform)
+    _label_components(cost_grid, out_path)
+
+    if show:
+        import matplotlib.pyplot as plt
+        plt.imshow(cost_grid, cmap='hot')
+        plt.colorbar(label='Movement Cost')
+        plt.title("Movement Cost Grid (from Slope)")
+        plt.show()
+    return cost_grid
+
+
+def _write_meta(slope_scale, georef):
+    # The georeference is saved with the grid so planners convert coordinates without opening the DEM
+    with open(COST_GRID_META_PATH, "w") as f:
+        json.dump({"slope_scale": slope_scale, **georef.to_meta()}, f)
+
+
+def _label_components(cost_grid, out_path):
+    # Passable regions for up-front reachability checks; kept current by update_cost_grid_window
+    components = ComponentIndex.build(cost_grid, components_dir(out_path), grid_fingerprint(cost_grid))
+    print(f"✅ {components.count} passable regions labelled in {components_dir(out_path)}")
+
+
+def _slope_rows(elevation_tif, out_path, row0, row1):
+    # Rows [row0:row1] plus the Sobel halo; full width, so only rows need a halo
+    with rasterio.open(elevation_tif) as src:
+        halo_row0, halo_row1 = max(0, row0 - SOBEL_HALO), min(src.height, row1 + SOBEL_HALO)
+        elevation = src.read(1, window=Window(0, halo_row0, src.width, halo_row1 - halo_row0)).astype(np.float32)
+        nodata = src.nodata
+    slope = slope_from_elevation(elevation, nodata)[row0 - halo_row0:row1 - halo_row0]
+
+    out = np.load(out_path, mmap_mode="r+")
+    out[row0:row1] = slope
+    out.flush()
+    return float(np.max(slope))
+
+
+def _cost_rows(out_path, row0, row1, slope_scale, transform, zones):
+    out = np.load(out_path, mmap_mode="r+")
+    block = slope_to_cost(out[row0:row1], np.float32(slope_scale))
+    out[row0:row1] = apply_no_fly_zones(block, transform, out.shape, zones, row0, 0)
+    out.flush()
+
+
+def build_cost_grid_chunked(elevation_tif=ELEVATION_TIF, out_path=COST_GRID_PATH, chunk_rows=1024, workers=None):
+    """Full rebuild in overlapping row blocks on a process pool, in float32.
+
+    Pass one writes each block's slope straight into a memory-mapped .npy and
+    returns its maximum; pass two normalizes the blocks in place with the
+    global maximum. Peak memory per worker is a few chunk-sized float32
+    arrays, and the result matches build_cost_grid.
+    """
+    with rasterio.open(elevation_tif) as src:
+        shape = (src.height, src.width)
+        transform = src.transform
+        georef = GeoReference.from_dataset(src)
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    out = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float32, shape=shape)
+    del out
+
+    chunks = [(row0, min(row0 + chunk_rows, shape[0])) for row0 in range(0, shape[0], chunk_rows)]
+    zones = load_no_fly_zones()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        maxima = list(pool.map(_slope_rows, *zip(*[(elevation_tif, out_path, r0, r1) for r0, r1 in chunks])))
+        slope_scale = max(maxima) or 1.0
+        list(pool.map(_cost_rows, *zip(*[(out_path, r0, r1, slope_scale, transform, zones) for r0, r1 in chunks])))
+
+    _write_meta(slope_scale, georef)
+    print(f"✅ Cost grid generated in {len(chunks)} chunks and saved to {out_path}")
+
+    write_tiled_grid(np.load(out_path, mmap_mode="r"), COST_GRID_TILES_DIR, transform)
+    _label_components(np.load(out_path, mmap_mode="r"), out_path)
+    return out_path
+
+
+def update_cost_grid_window(min_lat, max_lat, min_lon, max_lon, elevation_tif=ELEVATION_TIF, grid_path=COST_GRID_PATH):
+    """Recompute the cost grid inside a lat/lon box and patch it in place.
+
+    A changed elevation also moves the Sobel slopes one halo outside the
+    box, so the box grown by SOBEL_HALO is rewritten; that window plus
+    another halo is read from the DEM. Slopes are normalized with the scale
+    persisted by the last full build, so cells outside the window keep
+    their values; slopes steeper than anything in that build are clipped to
+    the maximum cost of 10. The passable-region labels are recomputed only
+    if the patch opened or closed a cell.
+    Returns (row0, col0, block), the patched block and its grid offset
+    (FlightReplanner.apply_update takes these to repair in-flight legs).
+    """
+    with open(COST_GRID_META_PATH) as f:
+        slope_scale = json.load(f)["slope_scale"]
+
+    with rasterio.open(elevation_tif) as src:
+        transform = src.transform
+        shape = (src.height, src.width)
+        row0, row1, col0, col1 = zone_window(transform, shape, {
+            "min_lat": min_lat, "max_lat": max_lat, "min_lon": min_lon, "max_lon": max_lon,
+        })
+        if row0 >= row1 or col0 >= col1:
+            raise ValueError("Dirty bounding box does not overlap the elevation grid")
+        # Cells within the halo of the box read its elevations, so their slopes are rewritten too
+        row0, col0 = max(0, row0 - SOBEL_HALO), max(0, col0 - SOBEL_HALO)
+        row1, col1 = min(shape[0], row1 + SOBEL_HALO), min(shape[1], col1 + SOBEL_HALO)
+
+        # Read the window with its halo, clipped where the halo would leave the raster
+        halo_row0, halo_col0 = max(0, row0 - SOBEL_HALO), max(0, col0 - SOBEL_HALO)
+        halo_row1, halo_col1 = min(shape[0], row1 + SOBEL_HALO), min(shape[1], col1 + SOBEL_HALO)
+        elevation = src.read(1, window=Window(halo_col0, halo_row0, halo_col1 - halo_col0, halo_row1 - halo_row0))
+        nodata = src.nodata
+
+    slope = slope_from_elevation(elevation, nodata)
+    slope = slope[row0 - halo_row0:row1 - halo_row0, col0 - halo_col0:col1 - halo_col0]
+    block = np.minimum(slope_to_cost(slope, slope_scale), 10)
+    apply_no_fly_zones(block, transform, shape, load_no_fly_zones(), row0, col0)
+
+    grid = np.load(grid_path, mmap_mode="r+")
+    old_block = np.array(grid[row0:row1, col0:col1])
+    grid[row0:row1, col0:col1] = block
+    grid.flush()
+    del grid
+    # A memmap of this file already open in the process sees the patch, its padded search copy does not
+    invalidate_search_grid()
+    if os.path.exists(COST_GRID_TILES_DIR):
+        patch_tiled_grid(COST_GRID_TILES_DIR, row0, col0, block)
+
+    print(f"✅ Cost grid patched in rows {row0}:{row1}, cols {col0}:{col1}")
+    update_components(grid_path, row0, col0, old_block, block)
+    return row0, col0, block
+
+
+def add_no_fly_zone(min_lat, max_lat, min_lon, max_lon, name=None):
+    """Persist a no-fly zone and block its cells in the stored grid."""
+    zones = load_no_fly_zones()
+    zones.append({"name": name, "min_lat": min_lat, "max_lat": max_lat, "min_lon": min_lon, "max_lon": max_lon})
+    os.makedirs(os.path.dirname(NO_FLY_ZONES_PATH), exist_ok=True)
+    with open(NO_FLY_ZONES_PATH, "w") as f:
+        json.dump({"zones": zones}, f, indent=2)
+    return update_cost_grid_window(min_lat, max_lat, min_lon, max_lon)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the slope-based movement cost grid")
+    parser.add_argument("--window", nargs=4, type=float, metavar=("MIN_LAT", "MAX_LAT", "MIN_LON", "MAX_LON"),
+                        help="Only regenerate this dirty bounding box and patch the stored grid in place")
+    parser.add_argument("--no-fly", nargs=4, type=float, metavar=("MIN_LAT", "MAX_LAT", "MIN_LON", "MAX_LON"),
+                        help="Add a no-fly zone and block it in the stored grid")
+    parser.add_argument("--show", action="store_true", help="Plot the cost grid after a full build")
+    parser.add_argument("--chunked", action="store_true", help="Full build in row blocks on a process pool")
+    parser.add_argument("--chunk-rows", type=int, default=1024, help="Rows per block for --chunked")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --chunked (default: all cores)")
+    parser.add_argument("--hpa", action="store_true", help="Also precompute the hierarchical planning graph")
+    parser.add_argument("--cluster-size", type=int, default=DEFAULT_CLUSTER_SIZE, help="HPA cluster side in cells")
+    parser.add_argument("--pyramid", action="store_true", help="Also build the 4x/16x pooled cost pyramid")
+    parser.add_argument("--landmarks", type=int, default=0, metavar="COUNT",
+                        help="Also precompute COUNT landmark distance rasters for the ALT heuristic "
+                             f"(e.g. {DEFAULT_LANDMARKS})")
+    parser.add_argument("--quantized", action="store_true",
+                        help="Also write the uint8 quantized grid (levels + scale) for USE_QUANTIZED_GRID")
+    args = parser.parse_args()
+
+    if args.no_fly:
+        add_no_fly_zone(*args.no_fly)
+    elif args.window:
+        update_cost_grid_window(*args.window)
+    elif args.chunked:
+        build_cost_grid_chunked(chunk_rows=args.chunk_rows, workers=args.workers)
+    else:
+        build_cost_grid(show=args.show)
+
+    if args.hpa:
+        load_or_build_hpa_graph(np.load(COST_GRID_PATH, mmap_mode="r"), COST_GRID_PATH, cluster_size=args.cluster_size)
+    if args.pyramid:
+        load_or_build_pyramid(np.load(COST_GRID_PATH, mmap_mode="r"), COST_GRID_PATH)
+    if args.landmarks:
+        load_or_build_landmarks(np.load(COST_GRID_PATH, mmap_mode="r"), COST_GRID_PATH, count=args.landmarks)
+    if args.quantized:
+        load_or_build_quantized(np.load(COST_GRID_PATH, mmap_mode="r"), COST_GRID_PATH)
+
+
+if __name__ == "__main__":
+    main()
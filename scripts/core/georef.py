@@ -0,0 +1,81 @@
+import json
+import math
+from numbers import Number
+import numpy as np
+from affine import Affine
+
+# Written next to the cost grid by generate_cost_grid.py (together with the slope scale)
+COST_GRID_META_PATH = "data/processed/cost_grid_meta.json"
+
+
+class GeoReference:
+    """Affine transform, shape and nodata of the cost grid: lat/lon <-> cell math without rasterio.
+
+    Conversions take whole arrays and are one NumPy expression each, with
+    the same floor rounding as rasterio's `dataset.index`. `index(x, y)` and
+    `res` match the dataset API, so a GeoReference can stand in for an open
+    dataset wherever only coordinates are needed.
+    """
+
+    def __init__(self, transform, shape, nodata=None):
+        self.transform = transform
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.nodata = nodata
+        # Inverse coefficients once: col = a*x + b*y + c, row = d*x + e*y + f
+        self._inverse = ~transform
+
+    @classmethod
+    def from_dataset(cls, src):
+        return cls(src.transform, (src.height, src.width), src.nodata)
+
+    @classmethod
+    def from_meta(cls, meta):
+        return cls(Affine.from_gdal(*meta["transform"]), meta["shape"], meta.get("nodata"))
+
+    @classmethod
+    def load(cls, meta_path=COST_GRID_META_PATH):
+        try:
+            with open(meta_path) as f:
+                return cls.from_meta(json.load(f))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"{meta_path} not found; regenerate the cost grid with generate_cost_grid.py") from None
+
+    def to_meta(self):
+        return {"shape": list(self.shape), "transform": list(self.transform.to_gdal()), "nodata": self.nodata}
+
+    @property
+    def res(self):
+        return abs(self.transform.a), abs(self.transform.e)
+
+    def rowcol(self, lats, lons):
+        """Integer (rows, cols) arrays for arrays of lat/lon; points off the grid are not clipped."""
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        inv = self._inverse
+        cols = np.floor(inv.a * lons + inv.b * lats + inv.c).astype(np.int64)
+        rows = np.floor(inv.d * lons + inv.e * lats + inv.f).astype(np.int64)
+        return rows, cols
+
+    def inside(self, rows, cols):
+        rows, cols = np.asarray(rows), np.asarray(cols)
+        return (rows >= 0) & (rows < self.shape[0]) & (cols >= 0) & (cols < self.shape[1])
+
+    def locate(self, lats, lons):
+        """(rows, cols, inside) for arrays of lat/lon; `inside` flags the points that fall on the grid."""
+        rows, cols = self.rowcol(lats, lons)
+        return rows, cols, self.inside(rows, cols)
+
+    def index(self, x, y):
+        # rasterio-style (lon, lat) argument order; plain ints for scalars, arrays otherwise
+        if isinstance(x, Number) and isinstance(y, Number):
+            # One point per leg in the hot path: plain float math is ~10x cheaper than a NumPy round trip
+            inv = self._inverse
+            return math.floor(inv.d * x + inv.e * y + inv.f), math.floor(inv.a * x + inv.b * y + inv.c)
+        return self.rowcol(y, x)
+
+    def latlon(self, rows, cols):
+        """(lats, lons) of cell centers for arrays of rows and cols."""
+        rows = np.asarray(rows, dtype=np.float64) + 0.5
+        cols = np.asarray(cols, dtype=np.float64) + 0.5
+        t = self.transform
+        return t.d * cols + t.e * rows + t.f, t.a * cols + t.b * rows + t.c
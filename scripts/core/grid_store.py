@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+COST_GRID_PATH = "data/processed/cost_grid.npy"
+COST_GRID_TILES_DIR = "data/processed/cost_grid_tiles"
+DEFAULT_TILE_SIZE = 256
+# Precomputed artifacts (hub field, HPA graph, pyramid, landmarks, labels...) are a directory of .npy
+# arrays plus this metadata file, which records the fingerprint of the grid they were built from
+ARTIFACT_META = "meta.json"
+
+
+def load_cost_grid(path=COST_GRID_PATH, mmap_mode=None):
+    return np.load(path, mmap_mode=mmap_mode)
+
+
+def grid_fingerprint(grid):
+    """Content hash of a cost grid (shape, dtype and cell values).
+
+    Precomputed artifacts store this so they can tell when the grid they were
+    built from has been regenerated. A quantized grid hashes its levels and
+    scale rather than being dequantized.
+    """
+    scale = getattr(grid, "scale", None)
+    grid = np.ascontiguousarray(grid.levels if scale is not None else grid)
+    digest = hashlib.sha1()
+    digest.update(f"{grid.shape}{grid.dtype.str}".encode())
+    if scale is not None:
+        digest.update(repr(scale).encode())
+    digest.update(memoryview(grid).cast("B"))
+    return digest.hexdigest()
+
+
+def _save_npy(path, array):
+    # Written beside the file and renamed over it, so a process that has the old copy mapped keeps it intact
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def begin_artifact(directory):
+    """Create `directory` for a precomputed artifact and retire its old meta.json.
+
+    Without meta.json the artifact reads as missing, so nothing loads old
+    metadata against arrays that are being rewritten.
+    """
+    os.makedirs(directory, exist_ok=True)
+    try:
+        os.remove(os.path.join(directory, ARTIFACT_META))
+    except FileNotFoundError:
+        pass
+
+
+def finish_artifact(directory, meta):
+    """Write meta.json, last and atomically: its presence marks a complete artifact."""
+    path = os.path.join(directory, ARTIFACT_META)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, path)
+
+
+def save_artifact(directory, arrays, meta):
+    """Save `arrays` (name -> array) as `<name>.npy` in `directory`, followed by `meta` as meta.json."""
+    begin_artifact(directory)
+    for name, array in arrays.items():
+        _save_npy(os.path.join(directory, f"{name}.npy"), array)
+    finish_artifact(directory, meta)
+
+
+def read_artifact_meta(directory):
+    with open(os.path.join(directory, ARTIFACT_META)) as f:
+        return json.load(f)
+
+
+def load_current_artifact(directory, load, fingerprint, matches=None):
+    """`load(directory)[0]` if the artifact there was saved for the grid with `fingerprint`
+    (and `matches(meta)` accepts the rest of its metadata); None if it is missing or stale."""
+    try:
+        meta = read_artifact_meta(directory)
+    except FileNotFoundError:
+        return None
+    if meta.get("grid_fingerprint") != fingerprint or (matches is not None and not matches(meta)):
+        return None
+    return load(directory)[0]
+
+
+def write_tiled_grid(grid, directory=COST_GRID_TILES_DIR, transform=None, tile_size=DEFAULT_TILE_SIZE, dtype=None):
+    """Write `grid` as fixed-size tiles in one flat file plus a small JSON header.
+
+    Tiles are stored row-major as (tile_rows, tile_cols, tile_size, tile_size);
+    edge tiles are padded with inf (the dtype's maximum for integer tiles) so
+    the padding reads as blocked. `grid` can itself be a memmap, it is copied
+    one band of tiles at a time.
+    """
+    dtype = np.dtype(dtype or grid.dtype)
+    if dtype.kind == "f":
+        padding = np.inf
+    elif dtype.kind in "iu":
+        # At or above BLOCKED_COST for every integer type, and BLOCKED_LEVEL itself for uint8
+        padding = np.iinfo(dtype).max
+    else:
+        raise ValueError(f"Tiled grids hold float or integer costs, not {dtype}")
+    height, width = grid.shape
+    tile_rows = -(-height // tile_size)
+    tile_cols = -(-width // tile_size)
+
+    os.makedirs(directory, exist_ok=True)
+    tiles = np.memmap(
+        os.path.join(directory, "tiles.bin"), dtype=dtype, mode="w+",
+        shape=(tile_rows, tile_cols, tile_size, tile_size),
+    )
+    for ti in range(tile_rows):
+        band = np.full((tile_size, tile_cols * tile_size), padding, dtype=dtype)
+        rows = grid[ti * tile_size:(ti + 1) * tile_size]
+        band[:rows.shape[0], :width] = rows
+        tiles[ti] = band.reshape(tile_size, tile_cols, tile_size).swapaxes(0, 1)
+    tiles.flush()
+    del tiles
+
+    header = {
+        "shape": [height, width],
+        "tile_size": tile_size,
+        "dtype": dtype.str,
+        "transform": list(transform.to_gdal()) if transform is not None else None,
+    }
+    with open(os.path.join(directory, "header.json"), "w") as f:
+        json.dump(header, f)
+    print(f"✅ Tiled cost grid ({tile_rows}x{tile_cols} tiles of {tile_size}) written to {directory}")
+    return directory
+
+
+def patch_tiled_grid(directory, row0, col0, block):
+    """Overwrite cells [row0:row0+h, col0:col0+w] of a tiled grid in place."""
+    grid = TiledCostGrid(directory, mode="r+")
+    t = grid.tile_size
+    row1, col1 = row0 + block.shape[0], col0 + block.shape[1]
+    for ti in range(row0 // t, (row1 - 1) // t + 1):
+        for tj in range(col0 // t, (col1 - 1) // t + 1):
+            r0, r1 = max(row0, ti * t), min(row1, (ti + 1) * t)
+            c0, c1 = max(col0, tj * t), min(col1, (tj + 1) * t)
+            grid.tiles[ti, tj, r0 - ti * t:r1 - ti * t, c0 - tj * t:c1 - tj * t] = \
+                block[r0 - row0:r1 - row0, c0 - col0:c1 - col0]
+    grid.tiles.flush()
+
+
+class TiledCostGrid:
+    """Memory-mapped view of a grid written by write_tiled_grid (read-only unless mode="r+").
+
+    Opening only maps the file; a tile is read from disk the first time
+    something touches it.
+    """
+
+    def __init__(self, directory=COST_GRID_TILES_DIR, mode="r"):
+        with open(os.path.join(directory, "header.json")) as f:
+            header = json.load(f)
+        self.directory = directory
+        self.shape = tuple(header["shape"])
+        self.tile_size = header["tile_size"]
+        self.dtype = np.dtype(header["dtype"])
+        self.transform = header["transform"]
+        self.tile_rows = -(-self.shape[0] // self.tile_size)
+        self.tile_cols = -(-self.shape[1] // self.tile_size)
+        self.tiles = np.memmap(
+            os.path.join(directory, "tiles.bin"), dtype=self.dtype, mode=mode,
+            shape=(self.tile_rows, self.tile_cols, self.tile_size, self.tile_size),
+        )
+
+    def tile(self, ti, tj):
+        return self.tiles[ti, tj]
+
+    def read_window(self, row0, row1, col0, col1):
+        """Copy cells [row0:row1, col0:col1] into a regular array."""
+        t = self.tile_size
+        out = np.empty((row1 - row0, col1 - col0), dtype=self.dtype)
+        for ti in range(row0 // t, (row1 - 1) // t + 1):
+            for tj in range(col0 // t, (col1 - 1) // t + 1):
+                r0, r1 = max(row0, ti * t), min(row1, (ti + 1) * t)
+                c0, c1 = max(col0, tj * t), min(col1, (tj + 1) * t)
+                out[r0 - row0:r1 - row0, c0 - col0:c1 - col0] = \
+                    self.tiles[ti, tj, r0 - ti * t:r1 - ti * t, c0 - tj * t:c1 - tj * t]
+        return out
+
+    def to_array(self):
+        return self.read_window(0, self.shape[0], 0, self.shape[1])
+
+
+if __name__ == "__main__":
+    # Convert an existing monolithic cost grid into the tiled format
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert cost_grid.npy into a tiled, memory-mappable grid")
+    parser.add_argument("--grid", default=COST_GRID_PATH)
+    parser.add_argument("--out", default=COST_GRID_TILES_DIR)
+    parser.add_argument("--tile-size", type=int, default=DEFAULT_TILE_SIZE)
+    parser.add_argument("--dtype", default=None, help="Tile dtype, e.g. float32 (default: same as the grid)")
+    args = parser.parse_args()
+    write_tiled_grid(load_cost_grid(args.grid, mmap_mode="r"), args.out, tile_size=args.tile_size, dtype=args.dtype)
@@ -0,0 +1,245 @@
+import heapq
+import math
+import os
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+from core.astar_engine import BLOCKED_COST, SearchGrid, astar
+from core.cost_field import grid_graph
+from core.grid_store import grid_fingerprint, load_current_artifact, read_artifact_meta, save_artifact
+
+DEFAULT_CLUSTER_SIZE = 64
+# Border openings shorter than this get one transition in the middle, longer ones one at each end
+SINGLE_TRANSITION_MAX = 6
+
+
+def _runs(mask):
+    """[start, end) index pairs of the True runs in a 1-D bool array."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+    return edges.reshape(-1, 2)
+
+
+def _transitions(passable, cluster_size):
+    """Pairs of adjacent passable cells on either side of a cluster border."""
+    h, w = passable.shape
+    for row in range(cluster_size, h, cluster_size):
+        for col0 in range(0, w, cluster_size):
+            col1 = min(col0 + cluster_size, w)
+            for a, b in _runs(passable[row - 1, col0:col1] & passable[row, col0:col1]):
+                for k in ([(a + b - 1) // 2] if b - a < SINGLE_TRANSITION_MAX else [a, b - 1]):
+                    yield (row - 1, col0 + k), (row, col0 + k)
+    for col in range(cluster_size, w, cluster_size):
+        for row0 in range(0, h, cluster_size):
+            row1 = min(row0 + cluster_size, h)
+            for a, b in _runs(passable[row0:row1, col - 1] & passable[row0:row1, col]):
+                for k in ([(a + b - 1) // 2] if b - a < SINGLE_TRANSITION_MAX else [a, b - 1]):
+                    yield (row0 + k, col - 1), (row0 + k, col)
+
+
+def path_cost(grid, path):
+    """Cost of flying `path` over `grid`, charged the way astar charges moves."""
+    deltas = np.abs(np.diff(path, axis=0))
+    steps = np.where((deltas[:, 0] != 0) & (deltas[:, 1] != 0), 1.414, 1.0)
+    return float(np.sum(grid[path[1:, 0], path[1:, 1]] * steps))
+
+
+class HPAGraph:
+    """Abstract graph for hierarchical (HPA*-style) path planning.
+
+    The grid is cut into square clusters. Nodes are the cells on either side
+    of each border opening; edges are the single step across a border and
+    the exact cluster-restricted shortest path cost between every pair of
+    nodes in the same cluster. A query searches this small graph and then
+    refines only the clusters along the abstract route, so the result can be
+    slightly more expensive than a flat astar path (bench/bench_hpa.py
+    measures by how much).
+    """
+
+    ARRAYS = ("nodes", "indptr", "indices", "weights")
+
+    def __init__(self, cluster_size, shape, nodes, indptr, indices, weights):
+        self.cluster_size = int(cluster_size)
+        self.shape = tuple(shape)
+        self.nodes = nodes
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self._views = None
+
+        clusters = self.cluster_of(nodes)
+        order = np.argsort(clusters, kind="stable")
+        bounds = np.flatnonzero(np.diff(clusters[order])) + 1
+        self.cluster_nodes = {
+            int(clusters[group[0]]): group for group in np.split(order, bounds) if len(group)
+        }
+
+    @classmethod
+    def build(cls, grid, cluster_size=DEFAULT_CLUSTER_SIZE):
+        grid = np.asarray(grid)
+        h, w = grid.shape
+        passable = grid < BLOCKED_COST
+        node_ids = {}
+        sources, targets, weights = [], [], []
+        for a, b in _transitions(passable, cluster_size):
+            a_id = node_ids.setdefault(a, len(node_ids))
+            b_id = node_ids.setdefault(b, len(node_ids))
+            sources += [a_id, b_id]
+            targets += [b_id, a_id]
+            weights += [float(grid[b]), float(grid[a])]
+
+        nodes = np.array(list(node_ids), dtype=np.int64).reshape(-1, 2)
+        graph = cls(cluster_size, (h, w), nodes, None, None, None)
+        for cluster, members in graph.cluster_nodes.items():
+            row0, col0, block = graph._cluster_block(grid, cluster)
+            local = (nodes[members, 0] - row0) * block.shape[1] + nodes[members, 1] - col0
+            dist = dijkstra(grid_graph(block), directed=True, indices=local)[:, local]
+            src, dst = np.nonzero(np.isfinite(dist) & (dist > 0))
+            sources += members[src].tolist()
+            targets += members[dst].tolist()
+            weights += dist[src, dst].tolist()
+
+        # CSR adjacency: edges sorted by source node
+        sources = np.asarray(sources, dtype=np.int64)
+        order = np.argsort(sources, kind="stable")
+        graph.indptr = np.concatenate(([0], np.cumsum(np.bincount(sources, minlength=len(nodes)))))
+        graph.indices = np.asarray(targets, dtype=np.int64)[order]
+        graph.weights = np.asarray(weights, dtype=np.float64)[order]
+        return graph
+
+    def save(self, directory, fingerprint):
+        save_artifact(directory, {name: getattr(self, name) for name in self.ARRAYS},
+                      {"cluster_size": self.cluster_size, "shape": list(self.shape), "grid_fingerprint": fingerprint})
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        meta = read_artifact_meta(directory)
+        arrays = [np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in cls.ARRAYS]
+        return cls(meta["cluster_size"], meta["shape"], *arrays), meta
+
+    def cluster_of(self, cells):
+        cells = np.asarray(cells)
+        cluster_cols = -(-self.shape[1] // self.cluster_size)
+        return (cells[..., 0] // self.cluster_size) * cluster_cols + cells[..., 1] // self.cluster_size
+
+    def _cluster_block(self, grid, cluster):
+        cluster_cols = -(-self.shape[1] // self.cluster_size)
+        row0 = (cluster // cluster_cols) * self.cluster_size
+        col0 = (cluster % cluster_cols) * self.cluster_size
+        return row0, col0, grid[row0:row0 + self.cluster_size, col0:col0 + self.cluster_size]
+
+    def _endpoint_costs(self, grid, cell, reverse):
+        """{node: cost} from `cell` to the nodes of its cluster (into `cell` if reverse)."""
+        cluster = int(self.cluster_of(cell))
+        members = self.cluster_nodes.get(cluster, np.empty(0, dtype=np.int64))
+        row0, col0, block = self._cluster_block(grid, cluster)
+        graph = grid_graph(block)
+        if reverse:
+            graph = graph.T.tocsr()
+        dist = dijkstra(graph, directed=True, indices=(cell[0] - row0) * block.shape[1] + cell[1] - col0)
+        local = (self.nodes[members, 0] - row0) * block.shape[1] + self.nodes[members, 1] - col0
+        return {int(node): float(d) for node, d in zip(members, dist[local]) if np.isfinite(d)}
+
+    def _abstract_route(self, start, goal, from_start, to_goal):
+        """(node ids of the cheapest abstract route, or None; nodes expanded)."""
+        if self._views is None:
+            # memoryviews index like lists (plain Python numbers), see astar
+            self._views = [memoryview(np.ascontiguousarray(a)) for a in (
+                self.indptr, self.indices, self.weights, self.nodes[:, 0], self.nodes[:, 1],
+            )]
+        indptr, indices, weights, rows, cols = self._views
+        n = len(self.nodes)
+        start_id, goal_id = n, n + 1
+        goal_row, goal_col = goal
+        hypot = math.hypot
+
+        g = {start_id: 0.0}
+        parent = {}
+        closed = set()
+        open_heap = [(hypot(start[0] - goal_row, start[1] - goal_col), start_id)]
+        expanded = 0
+        while open_heap:
+            current = heapq.heappop(open_heap)[1]
+            if current in closed:
+                continue
+            closed.add(current)
+            expanded += 1
+            if current == goal_id:
+                route = [goal_id]
+                while route[-1] != start_id:
+                    route.append(parent[route[-1]])
+                return route[::-1], expanded
+
+            if current == start_id:
+                edges = list(from_start.items())
+            else:
+                edges = list(zip(indices[indptr[current]:indptr[current + 1]], weights[indptr[current]:indptr[current + 1]]))
+                if current in to_goal:
+                    edges.append((goal_id, to_goal[current]))
+            g_current = g[current]
+            for neighbor, weight in edges:
+                tentative_g = g_current + weight
+                if tentative_g < g.get(neighbor, math.inf):
+                    g[neighbor] = tentative_g
+                    parent[neighbor] = current
+                    h = 0.0 if neighbor == goal_id else hypot(rows[neighbor] - goal_row, cols[neighbor] - goal_col)
+                    heapq.heappush(open_heap, (tentative_g + h, neighbor))
+        return None, expanded
+
+    def search(self, grid, start, goal, stats=None):
+        """Plan start -> goal through the abstract graph; same contract as astar.
+
+        Legs within two clusters of each other, and the rare leg the abstract
+        graph cannot connect, fall back to a flat astar over `grid`.
+        """
+        cells = grid.cells() if isinstance(grid, SearchGrid) else np.asarray(grid)
+        start = (int(start[0]), int(start[1]))
+        goal = (int(goal[0]), int(goal[1]))
+        route, expanded = None, 0
+        if max(abs(start[0] - goal[0]), abs(start[1] - goal[1])) >= 2 * self.cluster_size:
+            from_start = self._endpoint_costs(cells, start, reverse=False)
+            to_goal = self._endpoint_costs(cells, goal, reverse=True)
+            if from_start and to_goal:
+                route, expanded = self._abstract_route(start, goal, from_start, to_goal)
+        if route is None:
+            if stats is not None:
+                stats.update(hierarchical=False)
+            return astar(grid, start, goal, stats)
+
+        # Refine: cross borders in one step, run a cluster-local astar between nodes of one cluster
+        waypoints = [start] + [tuple(int(v) for v in self.nodes[node]) for node in route[1:-1]] + [goal]
+        path = [np.array([start])]
+        refined = 0
+        for a, b in zip(waypoints, waypoints[1:]):
+            if a == b:
+                continue
+            cluster = int(self.cluster_of(a))
+            if cluster != int(self.cluster_of(b)):
+                path.append(np.array([b]))
+                continue
+            row0, col0, block = self._cluster_block(cells, cluster)
+            segment, _ = astar(SearchGrid(block), (a[0] - row0, a[1] - col0), (b[0] - row0, b[1] - col0))
+            path.append(segment[1:] + (row0, col0))
+            refined += 1
+        path = np.concatenate(path)
+        if stats is not None:
+            stats.update(hierarchical=True, abstract_expanded=expanded, clusters_refined=refined)
+        return path, path_cost(cells, path)
+
+
+def hpa_dir(grid_path):
+    return os.path.splitext(grid_path)[0] + "_hpa"
+
+
+def load_or_build_hpa_graph(grid, grid_path, fingerprint=None, cluster_size=DEFAULT_CLUSTER_SIZE):
+    """Load the abstract graph stored next to `grid_path`, rebuilding it if the grid changed."""
+    directory = hpa_dir(grid_path)
+    fingerprint = fingerprint or grid_fingerprint(grid)
+    graph = load_current_artifact(directory, HPAGraph.load, fingerprint,
+                                  lambda meta: meta["cluster_size"] == cluster_size)
+    if graph is not None:
+        return graph
+
+    print(f"Building HPA graph with {cluster_size}x{cluster_size} clusters...")
+    graph = HPAGraph.build(grid, cluster_size)
+    graph.save(directory, fingerprint)
+    print(f"✅ HPA graph ({len(graph.nodes)} nodes, {len(graph.indices)} edges) cached in {directory}")
+    return HPAGraph.load(directory)[0]
@@ -0,0 +1,199 @@
+import heapq
+import math
+import os
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+from core.astar_engine import BLOCKED_COST, as_search_grid, reconstruct_path
+from core.cost_field import grid_graph
+from core.grid_store import grid_fingerprint, load_current_artifact, read_artifact_meta, save_artifact
+
+DEFAULT_LANDMARKS = 8
+# Stand-in for "unreachable" in the float32 rasters; differences stay finite and never go NaN
+UNREACHABLE = np.float32(3e38)
+
+
+class Landmarks:
+    """ALT (A*, landmarks, triangle inequality) heuristic data for one cost grid.
+
+    For each landmark L the rasters hold d(L, v) and d(v, L) for every cell
+    v, as float32 in the padded SearchGrid layout so a search can index them
+    with its own cell ids. Costs are directed, so both directions are needed:
+    d(v, t) >= d(L, t) - d(L, v) and d(v, t) >= d(v, L) - d(t, L).
+    """
+
+    ARRAYS = ("dist_from", "dist_to")
+
+    def __init__(self, cells, shape, dist_from, dist_to, epsilon, min_cost):
+        self.cells = [(int(r), int(c)) for r, c in cells]
+        self.shape = tuple(shape)
+        self.dist_from = dist_from
+        self.dist_to = dist_to
+        # float32 rounding can push a bound slightly above the true distance; subtracting this keeps it admissible
+        self.epsilon = float(epsilon)
+        self.min_cost = float(min_cost)
+        self._views = None
+
+    @classmethod
+    def build(cls, grid, count=DEFAULT_LANDMARKS, seed=0):
+        """Pick landmarks by farthest-point selection and compute their distance rasters."""
+        grid = np.asarray(grid, dtype=np.float64)
+        h, w = grid.shape
+        graph = grid_graph(grid)
+        reverse = graph.T.tocsr()
+        passable = np.flatnonzero(grid.ravel() < BLOCKED_COST)
+
+        # Start from a random cell, then keep adding the cell farthest from every landmark so far
+        rng = np.random.default_rng(seed)
+        nearest = dijkstra(graph, directed=True, indices=int(rng.choice(passable)))
+        landmarks, dist_from = [], []
+        for i in range(count):
+            score = np.where(np.isfinite(nearest), nearest, -1.0)
+            landmark = int(passable[np.argmax(score[passable])])
+            dist = dijkstra(graph, directed=True, indices=landmark)
+            landmarks.append(landmark)
+            dist_from.append(dist)
+            nearest = dist if i == 0 else np.minimum(nearest, dist)
+        dist_to = dijkstra(reverse, directed=True, indices=landmarks)
+
+        dist_from, dist_to = np.array(dist_from), np.asarray(dist_to)
+        finite = np.concatenate((dist_from[np.isfinite(dist_from)], dist_to[np.isfinite(dist_to)]))
+        epsilon = 2 * float(finite.max()) * np.finfo(np.float32).eps
+        min_cost = float(grid.ravel()[passable].min())
+        return cls(
+            np.column_stack(np.divmod(landmarks, w)), (h, w),
+            cls._pad(dist_from, (h, w)), cls._pad(dist_to, (h, w)), epsilon, min_cost,
+        )
+
+    @staticmethod
+    def _pad(dist, shape):
+        h, w = shape
+        padded = np.full((len(dist), h + 2, w + 2), UNREACHABLE, dtype=np.float32)
+        padded[:, 1:-1, 1:-1] = np.where(np.isfinite(dist), dist, UNREACHABLE).reshape(-1, h, w)
+        return padded.reshape(len(dist), -1)
+
+    def save(self, directory, fingerprint):
+        save_artifact(directory, {name: getattr(self, name) for name in self.ARRAYS}, {
+            "landmarks": self.cells, "shape": list(self.shape), "epsilon": self.epsilon,
+            "min_cost": self.min_cost, "grid_fingerprint": fingerprint,
+        })
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        meta = read_artifact_meta(directory)
+        arrays = [np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in cls.ARRAYS]
+        return cls(meta["landmarks"], meta["shape"], *arrays, meta["epsilon"], meta["min_cost"]), meta
+
+    def search(self, grid, start, goal, stats=None):
+        """astar with the ALT heuristic; same contract as astar, and the cost is optimal.
+
+        The heuristic is admissible but, after the epsilon adjustment, not
+        strictly consistent, so a node whose g-score improves after it was
+        expanded is reopened rather than skipped.
+        """
+        sg = as_search_grid(grid)
+        if sg.shape != self.shape:
+            raise ValueError(f"Landmarks were built for a {self.shape} grid, not {sg.shape}")
+        if self._views is None:
+            self._views = [[memoryview(np.ascontiguousarray(row)) for row in rasters]
+                           for rasters in (self.dist_from, self.dist_to)]
+        width = sg.padded_width
+        n = sg.size
+
+        g_arr = np.full(n, np.inf)
+        parent_arr = np.full(n, -1, dtype=np.int64)
+        expanded_arr = np.zeros(n, dtype=np.uint8)
+        costs = memoryview(sg.costs)
+        g = memoryview(g_arr)
+        parent = memoryview(parent_arr)
+        was_expanded = memoryview(expanded_arr)
+        neighbors = sg.neighbors
+        hypot = math.hypot
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        start_idx = sg.to_index(start)
+        goal_idx = sg.to_index(goal)
+        goal_row, goal_col = divmod(goal_idx, width)
+        # (d(L, .), d(L, goal), d(., L), d(goal, L)) per landmark
+        bounds = [
+            (d_from, d_from[goal_idx], d_to, d_to[goal_idx])
+            for d_from, d_to in zip(*self._views)
+        ]
+        # Every step costs at least min_cost * 1.414 per sqrt(2) cells of straight-line distance
+        scale = self.min_cost * 1.414 / math.sqrt(2)
+        epsilon = self.epsilon
+
+        def heuristic(idx):
+            row, col = divmod(idx, width)
+            best = hypot(row - goal_row, col - goal_col) * scale
+            for d_from, d_from_goal, d_to, d_to_goal in bounds:
+                bound = d_from_goal - d_from[idx] - epsilon
+                if bound > best:
+                    best = bound
+                bound = d_to[idx] - d_to_goal - epsilon
+                if bound > best:
+                    best = bound
+            return best
+
+        g[start_idx] = 0.0
+        open_heap = [(heuristic(start_idx), 0.0, start_idx)]
+        expanded = 0
+        reopened = 0
+        pushed = 1
+        peak_heap = 1
+        track_peak = stats is not None
+
+        while open_heap:
+            if track_peak and len(open_heap) > peak_heap:
+                peak_heap = len(open_heap)
+            _, g_entry, current = heappop(open_heap)
+            if g_entry > g[current]:
+                continue
+            expanded += 1
+            if was_expanded[current]:
+                reopened += 1
+            was_expanded[current] = 1
+            if current == goal_idx:
+                if stats is not None:
+                    stats.update(expanded=expanded, pushed=pushed, peak_heap=peak_heap, reopened=reopened)
+                path = reconstruct_path(parent, start_idx, goal_idx)
+                return sg.to_rowcol(path), g[goal_idx]
+
+            for offset, step in neighbors:
+                neighbor = current + offset
+                cost = costs[neighbor]
+                if cost >= BLOCKED_COST:
+                    continue
+                tentative_g = g_entry + cost * step
+                if tentative_g < g[neighbor]:
+                    g[neighbor] = tentative_g
+                    parent[neighbor] = current
+                    heappush(open_heap, (tentative_g + heuristic(neighbor), tentative_g, neighbor))
+                    pushed += 1
+
+        if stats is not None:
+            stats.update(expanded=expanded, pushed=pushed, peak_heap=peak_heap, reopened=reopened)
+        return None, float('inf')
+
+
+def landmarks_dir(grid_path):
+    return os.path.splitext(grid_path)[0] + "_landmarks"
+
+
+def load_or_build_landmarks(grid, grid_path, fingerprint=None, count=None):
+    """Load the landmark rasters stored next to `grid_path`, rebuilding them if the grid
+    changed (or, when `count` is given, if a different number of landmarks is stored)."""
+    directory = landmarks_dir(grid_path)
+    fingerprint = fingerprint or grid_fingerprint(grid)
+    landmarks = load_current_artifact(directory, Landmarks.load, fingerprint,
+                                      lambda meta: count in (None, len(meta["landmarks"])))
+    if landmarks is not None:
+        return landmarks
+
+    count = count or DEFAULT_LANDMARKS
+
+    print(f"Selecting {count} landmarks and computing their distance rasters...")
+    landmarks = Landmarks.build(grid, count)
+    landmarks.save(directory, fingerprint)
+    print(f"✅ Landmarks {landmarks.cells} cached in {directory}")
+    return Landmarks.load(directory)[0]
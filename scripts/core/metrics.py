@@ -0,0 +1,178 @@
+import cProfile
+import io
+import json
+import math
+import os
+import pstats
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Histogram upper bounds: 10us .. ~84s for *_seconds metrics, 1 .. ~2.7e8 for counts
+SECONDS_BUCKETS = [1e-5 * 2 ** i for i in range(24)]
+COUNT_BUCKETS = [4 ** i for i in range(15)]
+
+
+class Histogram:
+    """Fixed-bucket histogram, cumulative like a Prometheus histogram when exported."""
+
+    def __init__(self, buckets):
+        self.buckets = list(buckets)
+        # One count per bucket plus the +Inf overflow
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = -math.inf
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (the max for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count, "sum": self.sum, "max": self.max if self.count else 0.0,
+            "p50": self.quantile(0.5), "p95": self.quantile(0.95), "p99": self.quantile(0.99),
+            "buckets": self.buckets, "counts": self.counts,
+        }
+
+
+class Metrics:
+    """In-process counters and histograms for the planner hot path.
+
+    Disabled by default: callers check `METRICS.enabled` before timing or
+    collecting anything, so a disabled run pays one attribute lookup per leg.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, name, value):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(
+                SECONDS_BUCKETS if name.endswith("_seconds") else COUNT_BUCKETS
+            )
+        histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def record_leg(self, source, seconds, stats=None):
+        """One planned leg: where the answer came from, total planning time and the search's stats dict."""
+        self.inc("planner_legs_total", source=source)
+        self.observe("planner_leg_seconds", seconds)
+        if stats:
+            self.observe("planner_search_seconds", seconds)
+            for key in ("expanded", "pushed", "peak_heap"):
+                if key in stats:
+                    self.observe(f"planner_{key}", stats[key])
+
+    def export_jsonl(self, path, **labels):
+        """Append one line per counter and histogram, tagged with the time, pid and `labels`."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        base = {"ts": time.time(), "pid": os.getpid(), **labels}
+        with open(path, "a") as f:
+            for (name, counter_labels), value in sorted(self.counters.items()):
+                f.write(json.dumps({**base, "metric": name, "labels": dict(counter_labels), "value": value}) + "\n")
+            for name, histogram in sorted(self.histograms.items()):
+                f.write(json.dumps({**base, "metric": name, **histogram.snapshot()}) + "\n")
+
+    def export_prometheus(self, path):
+        """Write the Prometheus text exposition format (e.g. for node_exporter's textfile collector)."""
+        lines = []
+        for name in sorted({name for name, _ in self.counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (counter_name, labels), value in sorted(self.counters.items()):
+                if counter_name == name:
+                    label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        for name, histogram in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{le="{bound:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum {histogram.sum}")
+            lines.append(f"{name}_count {histogram.count}")
+        # Write then rename, so a scraper never reads a half-written file
+        tmp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+    def export(self, path):
+        """Prometheus text for .prom/.txt paths, JSONL otherwise."""
+        if path.endswith((".prom", ".txt")):
+            self.export_prometheus(path)
+        else:
+            self.export_jsonl(path)
+
+    def summary(self):
+        lines = [f"{name}{dict(labels) or ''}: {value}" for (name, labels), value in sorted(self.counters.items())]
+        for name, h in sorted(self.histograms.items()):
+            fmt = (lambda v: f"{v * 1000:.2f}ms") if name.endswith("_seconds") else (lambda v: f"{v:,.0f}")
+            lines.append(f"{name}: n={h.count} p50<={fmt(h.quantile(0.5))} p95<={fmt(h.quantile(0.95))} "
+                         f"max={fmt(h.max)}")
+        return "\n".join(lines)
+
+
+# Process-wide registry; each worker process has its own
+METRICS = Metrics()
+
+
+def enable_metrics(enabled=True):
+    METRICS.enabled = enabled
+    return METRICS
+
+
+def start_profile():
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def stop_profile(profiler, path, top=25):
+    """Stop `profiler`, dump its stats to `path` (load with pstats or snakeviz) and print the top functions."""
+    profiler.disable()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+    print(out.getvalue())
+    print(f"✅ Profile saved to {path}")
+
+
+@contextmanager
+def profiled(path=None, top=25):
+    """Run the block under cProfile when `path` is given; otherwise do nothing."""
+    if path is None:
+        yield
+        return
+    profiler = start_profile()
+    try:
+        yield
+    finally:
+        stop_profile(profiler, path, top)
@@ -0,0 +1,116 @@
+import os
+import shutil
+from collections import OrderedDict
+import numpy as np
+
+PATH_CACHE_DIR = "data/cache/paths"
+
+
+class PathCache:
+    """Two-tier cache of planned legs, keyed by grid content hash, planner mode and endpoint cells.
+
+    The memory tier is an LRU bounded by entry count. The disk tier keeps one
+    small .npz per leg under <grid fingerprint>/<mode> and evicts least
+    recently used files once it grows past `disk_max_bytes`. `mode` names
+    the search and unreachable policy that planned the legs (see
+    planner.planner_mode), so legs from an approximate planner are never
+    handed to an exact one. Opening a cache for a new fingerprint deletes
+    the directories of older grids, so regenerating the grid invalidates
+    everything automatically. Unreachable legs are cached too, as (None, inf).
+    """
+
+    def __init__(self, fingerprint, mode, memory_entries=4096, cache_dir=PATH_CACHE_DIR, disk_max_bytes=512 * 1024 * 1024):
+        self.fingerprint = fingerprint
+        self.mode = mode
+        self.memory_entries = memory_entries
+        self.disk_max_bytes = disk_max_bytes
+        self.memory = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.directory = None
+        if cache_dir:
+            self.directory = os.path.join(cache_dir, fingerprint, mode)
+            os.makedirs(self.directory, exist_ok=True)
+            for name in os.listdir(cache_dir):
+                if name != fingerprint:
+                    shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+            self.disk_bytes = sum(entry.stat().st_size for entry in os.scandir(self.directory))
+
+    @staticmethod
+    def key(start, goal):
+        return (int(start[0]), int(start[1]), int(goal[0]), int(goal[1]))
+
+    def _file(self, key):
+        return os.path.join(self.directory, "{}_{}_{}_{}.npz".format(*key))
+
+    def get(self, start, goal):
+        """Cached (path, cost) for the leg, or None on a miss."""
+        key = self.key(start, goal)
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.memory_hits += 1
+            return self.memory[key]
+
+        if self.directory:
+            path_file = self._file(key)
+            try:
+                with np.load(path_file) as data:
+                    path, cost = data["path"], float(data["cost"])
+                os.utime(path_file)  # mtime doubles as the disk tier's LRU clock
+            except (FileNotFoundError, OSError, ValueError, KeyError):
+                pass
+            else:
+                self.disk_hits += 1
+                result = (path if np.isfinite(cost) else None, cost)
+                self._remember(key, result)
+                return result
+
+        self.misses += 1
+        return None
+
+    def put(self, start, goal, path, cost):
+        key = self.key(start, goal)
+        self._remember(key, (path, cost))
+        if not self.directory:
+            return
+
+        path_file = self._file(key)
+        tmp_file = f"{path_file}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_file, path=np.empty((0, 2), dtype=np.int64) if path is None else path, cost=cost)
+        os.replace(tmp_file, path_file)  # atomic, so concurrent workers never read half a file
+        self.disk_bytes += os.path.getsize(path_file)
+        if self.disk_bytes > self.disk_max_bytes:
+            self._evict_disk()
+
+    def _remember(self, key, result):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict_disk(self):
+        # Drop the least recently used files until the tier is back under 90% of its budget
+        entries = [entry for entry in os.scandir(self.directory) if not entry.name.endswith(".tmp.npz")]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.disk_max_bytes * 0.9:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self.disk_bytes = total
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
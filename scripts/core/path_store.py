@@ -0,0 +1,164 @@
+import glob
+import json
+import os
+import time
+import numpy as np
+
+PATH_STORE_DIR = "data/paths"
+DEFAULT_SEGMENT_LEGS = 2048
+
+INDEX_DTYPE = np.dtype([
+    ("flight_id", "S36"), ("drone_id", "S32"), ("leg", np.uint8),
+    ("start_row", np.int32), ("start_col", np.int32),
+    ("offset", np.int64), ("length", np.int32), ("cost", np.float64),
+])
+
+# Paths are 8-connected, so every step is a (drow, dcol) delta in {-1, 0, 1}
+# and fits in one byte as the code (drow + 1) * 3 + (dcol + 1)
+_STEP_ROWS = np.repeat(np.arange(-1, 2), 3)
+_STEP_COLS = np.tile(np.arange(-1, 2), 3)
+
+
+def encode_path(path):
+    """(N, 2) row/col path -> N-1 uint8 step codes."""
+    deltas = np.diff(np.asarray(path, dtype=np.int64), axis=0)
+    if deltas.size and np.abs(deltas).max() > 1:
+        raise ValueError("Only 8-connected paths (unit steps) can be stored")
+    return ((deltas[:, 0] + 1) * 3 + deltas[:, 1] + 1).astype(np.uint8)
+
+
+def decode_path(start_row, start_col, steps):
+    path = np.empty((len(steps) + 1, 2), dtype=np.int64)
+    path[0] = start_row, start_col
+    np.cumsum(_STEP_ROWS[steps], out=path[1:, 0])
+    np.cumsum(_STEP_COLS[steps], out=path[1:, 1])
+    path[1:, 0] += start_row
+    path[1:, 1] += start_col
+    return path
+
+
+def _save_atomic(path, array):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def _id_bytes(field, value):
+    # NumPy would truncate a long id silently (so it could match another flight's legs) and only
+    # fail on a non-ASCII one at flush, losing the whole segment; reject both when the leg is added
+    size = INDEX_DTYPE[field].itemsize
+    try:
+        encoded = str(value).encode("ascii")
+    except UnicodeEncodeError:
+        raise ValueError(f"{field} {value!r} is not ASCII") from None
+    if len(encoded) > size:
+        raise ValueError(f"{field} {value!r} is longer than the {size} bytes the path store index holds")
+    return encoded
+
+
+class PathStoreWriter:
+    """Buffers planned legs and appends them to the store one segment at a time.
+
+    A segment is two .npy files: the step codes of all its legs back to back
+    and one INDEX_DTYPE row per leg. The index is written last, so readers
+    never see a partial segment, and segment names carry the process id so
+    several workers can append to the same store.
+    """
+
+    def __init__(self, directory=PATH_STORE_DIR, transform=None, segment_legs=DEFAULT_SEGMENT_LEGS):
+        self.directory = directory
+        self.segment_legs = segment_legs
+        self.rows = []
+        self.steps = []
+        self.offset = 0
+        self.legs_written = 0
+        self.segments_written = 0
+
+        os.makedirs(directory, exist_ok=True)
+        header_path = os.path.join(directory, "header.json")
+        if transform is not None and not os.path.exists(header_path):
+            tmp = f"{header_path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({"transform": list(transform.to_gdal())}, f)
+            os.replace(tmp, header_path)
+
+    def add(self, flight_id, drone_id, leg, path, cost):
+        """Buffer one leg; raises ValueError for an id that does not fit its fixed-width INDEX_DTYPE field."""
+        steps = encode_path(path)
+        self.rows.append((
+            _id_bytes("flight_id", flight_id), _id_bytes("drone_id", drone_id), leg,
+            path[0][0], path[0][1], self.offset, len(path), cost,
+        ))
+        self.steps.append(steps)
+        self.offset += len(steps)
+        if len(self.rows) >= self.segment_legs:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        name = os.path.join(self.directory, f"{time.time_ns()}_{os.getpid()}")
+        _save_atomic(f"{name}.steps.npy", np.concatenate(self.steps))
+        _save_atomic(f"{name}.index.npy", np.array(self.rows, dtype=INDEX_DTYPE))
+        self.legs_written += len(self.rows)
+        self.segments_written += 1
+        self.rows, self.steps, self.offset = [], [], 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PathStore:
+    """Read side of the path store.
+
+    Opening it loads the (small) leg index of every segment; step arrays are
+    memory-mapped and a path is only decoded when asked for.
+    """
+
+    def __init__(self, directory=PATH_STORE_DIR):
+        self.directory = directory
+        self.transform = None
+        header_path = os.path.join(directory, "header.json")
+        if os.path.exists(header_path):
+            with open(header_path) as f:
+                self.transform = json.load(f)["transform"]
+
+        indexes, self.segment_steps = [], []
+        for index_file in sorted(glob.glob(os.path.join(directory, "*.index.npy"))):
+            indexes.append(np.load(index_file))
+            self.segment_steps.append(np.load(index_file.replace(".index.npy", ".steps.npy"), mmap_mode="r"))
+        self.index = np.concatenate(indexes) if indexes else np.empty(0, dtype=INDEX_DTYPE)
+        self.segment = np.repeat(np.arange(len(indexes)), [len(index) for index in indexes])
+
+    def __len__(self):
+        return len(self.index)
+
+    def find(self, flight_id=None, drone_id=None, leg=None):
+        """Positions of the legs matching every given key, in write order."""
+        mask = np.ones(len(self.index), dtype=bool)
+        if flight_id is not None:
+            mask &= self.index["flight_id"] == str(flight_id).encode()
+        if drone_id is not None:
+            mask &= self.index["drone_id"] == str(drone_id).encode()
+        if leg is not None:
+            mask &= self.index["leg"] == leg
+        return np.flatnonzero(mask)
+
+    def path(self, i):
+        row = self.index[i]
+        offset = int(row["offset"])
+        steps = self.segment_steps[self.segment[i]][offset:offset + int(row["length"]) - 1]
+        return decode_path(int(row["start_row"]), int(row["start_col"]), steps)
+
+    def flight(self, flight_id):
+        """[(leg, path)] for one flight, ordered by leg number."""
+        positions = self.find(flight_id=flight_id)
+        positions = positions[np.argsort(self.index["leg"][positions], kind="stable")]
+        return [(int(self.index["leg"][i]), self.path(i)) for i in positions]
@@ -0,0 +1,128 @@
+import time
+from core.astar_engine import as_search_grid, astar, astar_bidirectional, astar_tiled
+from core.components import ComponentIndex, UnreachableError
+from core.cost_field import HubCostField
+from core.grid_store import TiledCostGrid
+from core.hpa import HPAGraph
+from core.landmarks import Landmarks
+from core.metrics import METRICS
+from core.pyramid import CostPyramid
+
+# LegPlanner argument -> class whose .load(directory) maps the precomputed data; the runners build
+# these on disk once and their worker processes map them with load_planning_data
+PLANNING_DATA = {
+    "hub_field": HubCostField, "hpa_graph": HPAGraph, "landmarks": Landmarks, "pyramid": CostPyramid,
+    "components": ComponentIndex,
+}
+
+
+def load_planning_data(planning_dirs):
+    """Map the precomputed data in `planning_dirs` (LegPlanner argument -> directory), as LegPlanner kwargs."""
+    return {name: PLANNING_DATA[name].load(directory)[0] for name, directory in planning_dirs.items()}
+
+
+def planner_mode(hpa_graph=None, landmarks=None, pyramid=None, engine=astar, on_unreachable="reject", tiled=False):
+    """Name of the search a LegPlanner built with these arguments runs, e.g. "hpa-reject".
+
+    Path caches are kept per mode: HPA and pyramid legs are approximate and
+    snapped legs differ from rejected ones, so none of them may answer for
+    another mode.
+    """
+    if tiled:
+        search = "tiled"
+    elif hpa_graph is not None:
+        search = "hpa"
+    elif pyramid is not None:
+        search = "pyramid"
+    elif landmarks is not None:
+        search = "alt"
+    else:
+        search = {astar: "astar", astar_bidirectional: "bidirectional"}.get(engine, engine.__name__)
+    return f"{search}-{on_unreachable}"
+
+
+class LegPlanner:
+    """Plans single legs over one cost grid.
+
+    `grid` is a cost array, a SearchGrid, a QuantizedCostGrid (searched in
+    fixed point by astar or astar_bidirectional) or a TiledCostGrid (searched
+    tile by tile without loading the whole map). Legs that start or end at the hub are
+    answered from the hub cost field when one is given; everything else is
+    looked up in the path cache (if any) and otherwise searched with the
+    first of these that is given: the HPA graph, the coarse-to-fine cost
+    pyramid, the landmark (ALT) heuristic; with `engine` (astar or
+    astar_bidirectional) if none is.
+
+    With a component index, a leg whose endpoints lie in different passable
+    regions never reaches a search: it raises UnreachableError, or with
+    on_unreachable="snap" the endpoint in the smaller region is moved to the
+    nearest cell of the other one.
+    """
+
+    def __init__(self, grid, hub_field=None, path_cache=None, hpa_graph=None, landmarks=None, pyramid=None,
+                 engine=astar, components=None, on_unreachable="reject"):
+        if isinstance(grid, TiledCostGrid):
+            self.search_grid = grid
+            self.search = astar_tiled
+        else:
+            self.search_grid = as_search_grid(grid)
+            if self.search_grid.scale is not None and any(x is not None for x in (hpa_graph, pyramid, landmarks)):
+                raise ValueError("HPA, pyramid and landmark searches need the float cost grid, not a quantized one")
+            if hpa_graph is not None:
+                self.search = hpa_graph.search
+            elif pyramid is not None:
+                self.search = pyramid.search
+            elif landmarks is not None:
+                self.search = landmarks.search
+            else:
+                self.search = engine
+        self.mode = planner_mode(hpa_graph, landmarks, pyramid, engine, on_unreachable, isinstance(grid, TiledCostGrid))
+        if path_cache is not None and path_cache.mode != self.mode:
+            raise ValueError(f"Path cache holds {path_cache.mode!r} legs but this planner runs {self.mode!r}")
+        self.hub_field = hub_field
+        self.path_cache = path_cache
+        self.components = components
+        self.on_unreachable = on_unreachable
+
+    def resolve(self, start, goal):
+        """The (start, goal) cells a leg will actually be planned between.
+
+        A constant-time label lookup; raises UnreachableError for a leg that
+        cannot be flown, so callers can reject an order before planning any
+        of its legs.
+        """
+        start = (int(start[0]), int(start[1]))
+        goal = (int(goal[0]), int(goal[1]))
+        if self.components is None or self.components.reachable(start, goal):
+            return start, goal
+        if METRICS.enabled:
+            METRICS.inc("planner_unreachable_total", policy=self.on_unreachable)
+        if self.on_unreachable != "snap":
+            raise UnreachableError(f"No passable route from {start} to {goal}")
+        return self.components.snap_leg(start, goal)
+
+    def plan(self, start, goal):
+        if not METRICS.enabled:
+            return self._plan(start, goal)[:2]
+        started = time.perf_counter()
+        stats = {}
+        path, cost, source = self._plan(start, goal, stats)
+        METRICS.record_leg(source, time.perf_counter() - started, stats)
+        return path, cost
+
+    def _plan(self, start, goal, stats=None):
+        # (path, cost, source), where source says which layer answered
+        start, goal = self.resolve(start, goal)
+        if self.hub_field is not None:
+            if start == self.hub_field.hub:
+                return (*self.hub_field.path_from_hub(goal), "hub_field")
+            if goal == self.hub_field.hub:
+                return (*self.hub_field.path_to_hub(start), "hub_field")
+        if self.path_cache is not None:
+            cached = self.path_cache.get(start, goal)
+            if cached is not None:
+                return (*cached, "path_cache")
+        path, cost = self.search(self.search_grid, start, goal, stats)
+        if self.path_cache is not None:
+            self.path_cache.put(start, goal, path, cost)
+        return path, cost, "search"
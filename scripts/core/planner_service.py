@@ -0,0 +1,266 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from core.astar_engine import SearchGrid, astar, astar_bidirectional
+from core.components import UnreachableError, components_dir, load_or_build_components
+from core.cost_field import hub_field_dir, load_or_build_hub_field
+from core.georef import GeoReference
+from core.grid_store import grid_fingerprint
+from core.hpa import hpa_dir, load_or_build_hpa_graph
+from core.landmarks import landmarks_dir, load_or_build_landmarks
+from core.path_cache import PATH_CACHE_DIR, PathCache
+from core.path_store import decode_path, encode_path
+from core.planner import LegPlanner, load_planning_data, planner_mode
+from core.pyramid import load_or_build_pyramid, pyramid_dir
+
+# Usage: python -m core.planner_service --workers 2          (from scripts/; Ctrl-C to stop)
+#        PlannerClient().plan_latlon((45.53, -122.65), (45.48, -122.58))
+
+PLANNER_SOCKET = "data/planner.sock"
+COST_GRID_PATH = "data/processed/cost_grid.npy"
+COST_GRID_META_PATH = "data/processed/cost_grid_meta.json"
+HUB_PATH = "data/raw/central_hub.json"
+ENGINES = ("hpa", "pyramid", "landmarks", "astar", "bidirectional")
+
+# Per-process state of a pool worker, filled in once by _init_worker
+_worker = {}
+
+# Engines that search with precomputed data: engine -> (LegPlanner argument, load_or_build function, directory)
+_ENGINE_DATA = {
+    "hpa": ("hpa_graph", load_or_build_hpa_graph, hpa_dir),
+    "pyramid": ("pyramid", load_or_build_pyramid, pyramid_dir),
+    "landmarks": ("landmarks", load_or_build_landmarks, landmarks_dir),
+}
+
+
+def _init_worker(shm_name, grid_shape, planning_dirs, fingerprint, cache_dir, engine, on_unreachable):
+    # Attach to the padded grid the server built; nothing grid-sized is copied or pickled
+    shm = shared_memory.SharedMemory(name=shm_name)
+    costs = np.ndarray((grid_shape[0] + 2) * (grid_shape[1] + 2), dtype=np.float64, buffer=shm.buf)
+    _worker["shm"] = shm
+    planning_data = load_planning_data(planning_dirs)
+    engine = astar_bidirectional if engine == "bidirectional" else astar
+    path_cache = None
+    if fingerprint:
+        mode = planner_mode(planning_data.get("hpa_graph"), planning_data.get("landmarks"), planning_data.get("pyramid"),
+                            engine, on_unreachable)
+        path_cache = PathCache(fingerprint, mode, cache_dir=cache_dir)
+    _worker["planner"] = LegPlanner(
+        SearchGrid.from_padded(costs, grid_shape), path_cache=path_cache, on_unreachable=on_unreachable,
+        engine=engine, **planning_data,
+    )
+
+
+def _plan(start, goal):
+    # Runs in a pool worker; the path goes back as uint8 step codes rather than an (N, 2) array
+    try:
+        path, cost = _worker["planner"].plan(start, goal)
+    except UnreachableError as e:
+        return {"error": "unreachable", "message": str(e)}
+    if path is None:
+        return {"error": "no_path", "message": f"No path found from {start} to {goal}"}
+    return {"cost": float(cost), "start": [int(path[0][0]), int(path[0][1])],
+            "steps": base64.b64encode(encode_path(path).tobytes()).decode()}
+
+
+class PlannerService:
+    """Warm planner over a Unix socket: the grid and precomputed fields are loaded once.
+
+    Requests and responses are one JSON object per line. `plan` takes
+    cells ("start"/"goal") or lat/lon pairs ("origin"/"dest"). The search
+    runs on a process pool whose workers share the padded grid through
+    shared memory. Reachability (`resolve`) and lat/lon conversion are
+    answered by the server process itself.
+    """
+
+    def __init__(self, grid_path=COST_GRID_PATH, meta_path=COST_GRID_META_PATH, hub=None, engine="astar",
+                 use_hub_field=True, use_path_cache=True, on_unreachable="reject", workers=1, cache_dir=PATH_CACHE_DIR):
+        grid = np.load(grid_path, mmap_mode="r")
+        self.shape = grid.shape
+        self.georef = GeoReference.load(meta_path) if os.path.exists(meta_path) else None
+        if hub is None and self.georef is not None and os.path.exists(HUB_PATH):
+            with open(HUB_PATH) as f:
+                hub_latlon = json.load(f)
+            hub = self.cell(hub_latlon["lat"], hub_latlon["lon"])
+
+        # Build (or validate) everything on disk once here; workers only map it
+        fingerprint = grid_fingerprint(grid)
+        self.components = load_or_build_components(grid, grid_path, fingerprint)
+        self.on_unreachable = on_unreachable
+        planning_dirs = {"components": components_dir(grid_path)}
+        if use_hub_field and hub is not None:
+            load_or_build_hub_field(grid, hub, grid_path, fingerprint)
+            planning_dirs["hub_field"] = hub_field_dir(grid_path)
+        if engine in _ENGINE_DATA:
+            name, load_or_build, directory = _ENGINE_DATA[engine]
+            load_or_build(grid, grid_path, fingerprint)
+            planning_dirs[name] = directory(grid_path)
+
+        self.shm = shared_memory.SharedMemory(create=True, size=SearchGrid.nbytes_for(self.shape))
+        SearchGrid(grid, out=self.shm.buf)
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(self.shm.name, self.shape, planning_dirs, fingerprint if use_path_cache else None,
+                      cache_dir, engine, on_unreachable),
+        )
+        # Keep every worker busy for a moment so all of them start (and map the data) before the first quote
+        list(self.pool.map(time.sleep, [0.2] * workers))
+        self.requests = 0
+
+    def cell(self, lat, lon):
+        return self._inside(self.georef.index(lon, lat), f"({lat}, {lon})")
+
+    def _inside(self, cell, name):
+        # Negative cells would wrap around the grid and labels, oversize ones raise IndexError
+        row, col = int(cell[0]), int(cell[1])
+        if not (0 <= row < self.shape[0] and 0 <= col < self.shape[1]):
+            raise ValueError(f"{name} is outside the cost grid")
+        return row, col
+
+    def _endpoints(self, request):
+        if "start" in request:
+            return (self._inside(request["start"], f"Cell {request['start']}"),
+                    self._inside(request["goal"], f"Cell {request['goal']}"))
+        if self.georef is None:
+            raise ValueError("No grid georeference available; send cells as start/goal")
+        return self.cell(*request["origin"]), self.cell(*request["dest"])
+
+    async def handle(self, request):
+        op = request.get("op", "plan")
+        if op == "ping":
+            return {"ok": True, "requests": self.requests, "shape": list(self.shape)}
+        start, goal = self._endpoints(request)
+        if op == "resolve":
+            if not self.components.reachable(start, goal):
+                if self.on_unreachable != "snap":
+                    return {"error": "unreachable", "message": f"No passable route from {start} to {goal}"}
+                try:
+                    start, goal = self.components.snap_leg(start, goal)
+                except UnreachableError as e:
+                    return {"error": "unreachable", "message": str(e)}
+            return {"start": list(start), "goal": list(goal)}
+        if op != "plan":
+            return {"error": "bad_request", "message": f"Unknown op {op!r}"}
+        return await asyncio.get_running_loop().run_in_executor(self.pool, _plan, start, goal)
+
+    async def _serve_connection(self, reader, writer):
+        # Each connection sends requests one after another; concurrency comes from many connections
+        try:
+            while line := await reader.readline():
+                self.requests += 1
+                started = time.perf_counter()
+                try:
+                    request = json.loads(line)
+                    response = await self.handle(request)
+                except (ValueError, KeyError, TypeError) as e:
+                    request, response = {}, {"error": "bad_request", "message": f"{type(e).__name__}: {e}"}
+                except Exception as e:
+                    request, response = {}, {"error": "internal", "message": f"{type(e).__name__}: {e}"}
+                response["id"] = request.get("id")
+                response["server_ms"] = (time.perf_counter() - started) * 1000
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path=PLANNER_SOCKET):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(self._serve_connection, path=socket_path)
+        print(f"✅ Planner service listening on {socket_path}")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        self.shm.close()
+        self.shm.unlink()
+
+
+class PlannerClient:
+    """Blocking client for PlannerService with LegPlanner's plan/resolve interface.
+
+    Pass it wherever a LegPlanner is expected (e.g. simulate_leg) to plan
+    against a warm service instead of loading the grid in this process.
+    """
+
+    def __init__(self, socket_path=PLANNER_SOCKET, timeout=None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path)
+        self.file = self.sock.makefile("rwb")
+        self.next_id = 0
+
+    def request(self, **request):
+        self.next_id += 1
+        request["id"] = self.next_id
+        self.file.write(json.dumps(request).encode() + b"\n")
+        self.file.flush()
+        response = json.loads(self.file.readline())
+        if response.get("error") == "unreachable":
+            raise UnreachableError(response["message"])
+        if "error" in response:
+            raise RuntimeError(f"Planner service error ({response['error']}): {response['message']}")
+        return response
+
+    @staticmethod
+    def _path(response):
+        steps = np.frombuffer(base64.b64decode(response["steps"]), dtype=np.uint8)
+        return decode_path(*response["start"], steps), response["cost"]
+
+    def plan(self, start, goal):
+        """(path, cost) for a leg between two cells, same contract as LegPlanner.plan."""
+        return self._path(self.request(op="plan", start=[int(start[0]), int(start[1])], goal=[int(goal[0]), int(goal[1])]))
+
+    def plan_latlon(self, origin, dest):
+        """(path, cost) for a leg between two (lat, lon) points."""
+        return self._path(self.request(op="plan", origin=list(origin), dest=list(dest)))
+
+    def resolve(self, start, goal):
+        response = self.request(op="resolve", start=[int(start[0]), int(start[1])], goal=[int(goal[0]), int(goal[1])])
+        return tuple(response["start"]), tuple(response["goal"])
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve leg planning over a Unix socket from a warm process")
+    parser.add_argument("--socket", default=PLANNER_SOCKET)
+    parser.add_argument("--grid", default=COST_GRID_PATH)
+    parser.add_argument("--engine", choices=ENGINES, default="astar", help="hpa and pyramid are faster but approximate")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Planner worker processes")
+    parser.add_argument("--no-hub-field", action="store_true")
+    parser.add_argument("--no-path-cache", action="store_true")
+    parser.add_argument("--unreachable", choices=("reject", "snap"), default="reject")
+    args = parser.parse_args()
+
+    service = PlannerService(args.grid, engine=args.engine, use_hub_field=not args.no_hub_field,
+                             use_path_cache=not args.no_path_cache, on_unreachable=args.unreachable,
+                             workers=args.workers)
+    try:
+        asyncio.run(service.serve(args.socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import os
+import numpy as np
+from scipy.ndimage import binary_dilation
+from core.astar_engine import BLOCKED_COST, SearchGrid, astar
+from core.grid_store import grid_fingerprint, load_current_artifact, read_artifact_meta, save_artifact
+
+DEFAULT_FACTORS = (4, 16)
+# Corridor half-widths tried in turn, in cells of the coarser level; after the last one the level is searched whole
+CORRIDOR_MARGINS = (1, 3)
+# Rows of the full grid pooled at a time, so building from a memmap never loads the whole grid
+POOL_BAND_ROWS = 4096
+
+
+def pool_grid(grid, factor, pooling="mean"):
+    """Downsample `grid` by `factor` with min or mean pooling over passable cells.
+
+    A coarse cell is blocked when most of the cells under it are, so thin
+    walls still show up at the coarse level. That can also close a narrow
+    gap, which is why a level without a path is searched whole one level
+    down (see CostPyramid.search).
+    """
+    h, w = grid.shape
+    coarse = np.empty((-(-h // factor), -(-w // factor)), dtype=np.float32)
+    band_rows = max(factor, POOL_BAND_ROWS // factor * factor)
+    for row0 in range(0, h, band_rows):
+        band = np.asarray(grid[row0:row0 + band_rows], dtype=np.float64)
+        bh = -(-band.shape[0] // factor) * factor
+        padded = np.full((bh, coarse.shape[1] * factor), np.nan)
+        padded[:band.shape[0], :w] = band
+        blocks = padded.reshape(bh // factor, factor, coarse.shape[1], factor)
+        in_grid = ~np.isnan(blocks)
+        passable = in_grid & (blocks < BLOCKED_COST)
+        count = passable.sum(axis=(1, 3))
+        if pooling == "min":
+            pooled = np.where(passable, blocks, np.inf).min(axis=(1, 3))
+        else:
+            pooled = np.where(passable, blocks, 0).sum(axis=(1, 3)) / np.maximum(count, 1)
+        pooled[count * 2 <= in_grid.sum(axis=(1, 3))] = BLOCKED_COST
+        coarse[row0 // factor:row0 // factor + pooled.shape[0]] = pooled
+    return coarse
+
+
+def _corridor_search(costs, start, goal, mask, scale, stats=None):
+    """astar on `costs` restricted to the cells under `mask`, a coarse mask `scale` times smaller.
+
+    Only the bounding box of the corridor is copied and searched, so memory
+    follows the corridor rather than the grid.
+    """
+    rows, cols = np.nonzero(mask)
+    r0, r1 = rows.min(), rows.max() + 1
+    c0, c1 = cols.min(), cols.max() + 1
+    row0, col0 = r0 * scale, c0 * scale
+    window = np.array(costs[row0:r1 * scale, col0:c1 * scale], dtype=np.float64)
+    inside = mask[r0:r1, c0:c1].repeat(scale, axis=0).repeat(scale, axis=1)
+    window[~inside[:window.shape[0], :window.shape[1]]] = np.inf
+    path, cost = astar(SearchGrid(window), (start[0] - row0, start[1] - col0), (goal[0] - row0, goal[1] - col0), stats)
+    if path is None:
+        return None, cost, window.size
+    return path + (row0, col0), cost, window.size
+
+
+class CostPyramid:
+    """Downsampled copies of the cost grid for coarse-to-fine corridor search.
+
+    A query runs astar on the coarsest level, then searches each finer level
+    (ending with the full grid) only inside a dilated corridor around the
+    path found one level up. A corridor without a path is widened; after the
+    widest corridor, or when there is no path one level up, the level is
+    searched whole. The full grid is always reached, so a goal is found if
+    one is reachable, but the path can cost a little more than an
+    unrestricted astar.
+    """
+
+    def __init__(self, factors, levels, pooling="mean"):
+        self.factors = [int(f) for f in factors]
+        self.levels = levels
+        self.pooling = pooling
+
+    @classmethod
+    def build(cls, grid, factors=DEFAULT_FACTORS, pooling="mean"):
+        factors = sorted(factors)
+        return cls(factors, [pool_grid(grid, f, pooling) for f in factors], pooling)
+
+    def save(self, directory, fingerprint):
+        levels = {f"level_{factor}": level for factor, level in zip(self.factors, self.levels)}
+        meta = {"factors": self.factors, "pooling": self.pooling, "grid_fingerprint": fingerprint}
+        save_artifact(directory, levels, meta)
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        meta = read_artifact_meta(directory)
+        levels = [np.load(os.path.join(directory, f"level_{f}.npy"), mmap_mode=mmap_mode) for f in meta["factors"]]
+        return cls(meta["factors"], levels, meta["pooling"]), meta
+
+    def search(self, grid, start, goal, stats=None):
+        """Coarse-to-fine search over the pyramid and then `grid`; same contract as astar."""
+        costs = grid.cells() if isinstance(grid, SearchGrid) else grid
+        start = (int(start[0]), int(start[1]))
+        goal = (int(goal[0]), int(goal[1]))
+        # Coarsest level first, the full grid (factor 1) last
+        chain = list(zip(self.factors[::-1], self.levels[::-1])) + [(1, costs)]
+        widened = 0
+        peak_cells = 0
+        expanded = 0
+        level_stats = {}
+        path = cost = None
+        previous = None
+
+        for factor, level in chain:
+            level_start = (start[0] // factor, start[1] // factor)
+            level_goal = (goal[0] // factor, goal[1] // factor)
+            if path is not None:
+                coarse_factor, coarse_level = previous
+                coarse_path = np.zeros(coarse_level.shape, dtype=bool)
+                coarse_path[path[:, 0], path[:, 1]] = True
+                for margin in CORRIDOR_MARGINS:
+                    mask = binary_dilation(coarse_path, np.ones((3, 3), dtype=bool), iterations=margin)
+                    path, cost, cells = _corridor_search(
+                        level, level_start, level_goal, mask, coarse_factor // factor, level_stats,
+                    )
+                    expanded += level_stats["expanded"]
+                    peak_cells = max(peak_cells, cells)
+                    if path is not None:
+                        break
+                    widened += 1
+            if path is None:
+                # Coarsest level, or nothing to build a corridor from: search the whole level
+                path, cost = astar(grid if factor == 1 else SearchGrid(level), level_start, level_goal, level_stats)
+                expanded += level_stats["expanded"]
+                peak_cells = max(peak_cells, level.size)
+                if previous is not None:
+                    widened += 1
+            previous = (factor, level)
+
+        if stats is not None:
+            stats.update(expanded=expanded, widened=widened, peak_cells=peak_cells)
+        return path, cost
+
+
+def pyramid_dir(grid_path):
+    return os.path.splitext(grid_path)[0] + "_pyramid"
+
+
+def load_or_build_pyramid(grid, grid_path, fingerprint=None, factors=DEFAULT_FACTORS):
+    """Load the pyramid stored next to `grid_path`, rebuilding it if the grid changed."""
+    directory = pyramid_dir(grid_path)
+    fingerprint = fingerprint or grid_fingerprint(grid)
+    pyramid = load_current_artifact(directory, CostPyramid.load, fingerprint,
+                                    lambda meta: meta["factors"] == sorted(factors))
+    if pyramid is not None:
+        return pyramid
+
+    pyramid = CostPyramid.build(grid, factors)
+    pyramid.save(directory, fingerprint)
+    print(f"✅ Cost pyramid (factors {pyramid.factors}) cached in {directory}")
+    return CostPyramid.load(directory)[0]
@@ -0,0 +1,114 @@
+import os
+import numpy as np
+from core.astar_engine import BLOCKED_COST, BLOCKED_LEVEL, MAX_LEVEL
+from core.grid_store import grid_fingerprint, load_current_artifact, read_artifact_meta, save_artifact
+
+# Rows quantized at a time, so a memory-mapped float grid is never loaded whole
+BAND_ROWS = 1024
+
+
+def quantize_costs(costs, scale):
+    """uint8 levels for float costs: round(cost / scale) in 1..MAX_LEVEL, BLOCKED_LEVEL where blocked."""
+    costs = np.asarray(costs, dtype=np.float64)
+    blocked = ~(costs < BLOCKED_COST)
+    levels = np.clip(np.rint(costs / scale), 1, MAX_LEVEL)
+    levels[blocked] = BLOCKED_LEVEL
+    return levels.astype(np.uint8)
+
+
+def dequantize_levels(levels, scale):
+    """Float costs for uint8 levels: level * scale, BLOCKED_COST where blocked."""
+    levels = np.asarray(levels)
+    return np.where(levels == BLOCKED_LEVEL, float(BLOCKED_COST), levels * scale)
+
+
+class QuantizedCostGrid:
+    """Cost grid stored as uint8 levels plus the scale that turns a level back into a cost.
+
+    A cell costs `level * scale`; BLOCKED_LEVEL marks impassable cells. One
+    byte per cell instead of eight. SearchGrid pads the levels themselves,
+    and astar / astar_bidirectional then sum path costs as exact integers
+    (fixed point), so the same leg always gets the same cost. Indexing and
+    np.asarray return dequantized float costs, for code that builds
+    precomputed data from a regular cost array.
+    """
+
+    def __init__(self, levels, scale):
+        self.levels = levels
+        self.scale = float(scale)
+
+    @classmethod
+    def build(cls, grid, scale=None):
+        """Quantize a float cost grid (an array or memmap), by default scaling its highest cost to MAX_LEVEL."""
+        height = grid.shape[0]
+        bands = [(row0, min(row0 + BAND_ROWS, height)) for row0 in range(0, height, BAND_ROWS)]
+        if scale is None:
+            highest = 0.0
+            for row0, row1 in bands:
+                band = np.asarray(grid[row0:row1], dtype=np.float64)
+                passable = band[band < BLOCKED_COST]
+                if passable.size:
+                    highest = max(highest, float(passable.max()))
+            scale = (highest or 1.0) / MAX_LEVEL
+        levels = np.empty(grid.shape, dtype=np.uint8)
+        for row0, row1 in bands:
+            levels[row0:row1] = quantize_costs(grid[row0:row1], scale)
+        return cls(levels, scale)
+
+    @property
+    def shape(self):
+        return self.levels.shape
+
+    @property
+    def size(self):
+        return self.levels.size
+
+    def __getitem__(self, key):
+        return dequantize_levels(self.levels[key], self.scale)
+
+    def __array__(self, dtype=None, copy=None):
+        costs = dequantize_levels(self.levels, self.scale)
+        return costs if dtype is None else costs.astype(dtype)
+
+    def max_error(self, grid):
+        """Largest |dequantized - original| cost over the passable cells of `grid`."""
+        worst = 0.0
+        for row0 in range(0, self.shape[0], BAND_ROWS):
+            band = np.asarray(grid[row0:row0 + BAND_ROWS], dtype=np.float64)
+            passable = band < BLOCKED_COST
+            if passable.any():
+                worst = max(worst, float(np.max(np.abs(self[row0:row0 + BAND_ROWS][passable] - band[passable]))))
+        return worst
+
+    def save(self, directory, fingerprint=None):
+        save_artifact(directory, {"levels": self.levels}, {
+            "shape": list(self.shape), "scale": self.scale, "blocked_level": BLOCKED_LEVEL,
+            "max_level": MAX_LEVEL, "grid_fingerprint": fingerprint,
+        })
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        meta = read_artifact_meta(directory)
+        if meta["blocked_level"] != BLOCKED_LEVEL or meta["max_level"] != MAX_LEVEL:
+            raise ValueError(f"{directory} uses a different level encoding; rebuild it")
+        levels = np.load(os.path.join(directory, "levels.npy"), mmap_mode=mmap_mode)
+        return cls(levels, meta["scale"]), meta
+
+
+def quantized_dir(grid_path):
+    return os.path.splitext(grid_path)[0] + "_q8"
+
+
+def load_or_build_quantized(grid, grid_path, fingerprint=None):
+    """Load the quantized copy stored next to `grid_path`, rebuilding it if the float grid changed."""
+    directory = quantized_dir(grid_path)
+    fingerprint = fingerprint or grid_fingerprint(grid)
+    quantized = load_current_artifact(directory, QuantizedCostGrid.load, fingerprint)
+    if quantized is not None:
+        return quantized
+
+    quantized = QuantizedCostGrid.build(grid)
+    quantized.save(directory, fingerprint)
+    print(f"✅ Quantized cost grid (scale {quantized.scale:.4g}, max error {quantized.max_error(grid):.4g}) "
+          f"cached in {directory}")
+    return QuantizedCostGrid.load(directory)[0]
@@ -3,20 +3,61 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import json
 import time
+import uuid
 from datetime import datetime
 import numpy as np
-import rasterio
-from rasterio.transform import xy
-import heapq
 import math
-from core.delivery_logger import insert_delivery_leg
+from core.astar_engine import astar, astar_bidirectional
+from core.components import UnreachableError, load_or_build_components
+from core.cost_field import load_or_build_hub_field
+from core.dispatcher import BATCH_ORDERS_PER_DRONE, FleetDispatcher
+from core.georef import GeoReference
+from core.grid_store import TiledCostGrid, grid_fingerprint
+from core.hpa import load_or_build_hpa_graph
+from core.landmarks import load_or_build_landmarks
+from core.metrics import METRICS, enable_metrics, start_profile, stop_profile
+from core.path_cache import PathCache
+from core.path_store import PathStoreWriter
+from core.planner import LegPlanner, planner_mode
+from core.planner_service import PlannerClient
+from core.pyramid import load_or_build_pyramid
+from core.quantized import load_or_build_quantized, quantized_dir
+from core.delivery_logger import DeliveryLogWriter, insert_delivery_leg
 from config.trino_config import TRINO_CONFIG
-from order_manager import fetch_pending_orders, mark_order_delivered
+from order_manager import claim_pending_orders, mark_order_delivered, reject_order, release_orders
 
 # Configs
 COST_GRID_PATH = "data/processed/cost_grid.npy"
+COST_GRID_TILES_DIR = "data/processed/cost_grid_tiles"
+COST_GRID_META_PATH = "data/processed/cost_grid_meta.json"
 ELEVATION_TIF = "data/raw/elevation.tif"
 HUB_PATH = "data/raw/central_hub.json"
+# Answer hub legs (1 and 3) by backtracing a cached cost field instead of searching
+USE_HUB_COST_FIELD = True
+# Memory-map the tiled grid and page in only the tiles a search touches (no hub field in this mode)
+USE_TILED_GRID = False
+# Reuse legs planned in earlier runs; entries are invalidated when the grid changes
+USE_PATH_CACHE = True
+# Plan long legs on the precomputed cluster graph (HPA*); faster, but legs cost a few percent more than
+# the optimum (see bench/bench_hpa.py), so it is opt-in like the other planners
+USE_HPA = False
+# Coarse-to-fine corridor search over a pooled cost pyramid; only used when USE_HPA is off
+USE_PYRAMID = False
+# Exact search with the landmark (ALT) heuristic instead of plain astar; used when neither of the above is
+USE_LANDMARKS = False
+# Search from both ends at once when none of the above is in use
+USE_BIDIRECTIONAL_SEARCH = False
+# Plan on the uint8 quantized grid (1/8 of the memory) with fixed-point path costs; astar / bidirectional only,
+# so HPA, pyramid and landmarks are skipped in this mode
+USE_QUANTIZED_GRID = False
+# Legs between disconnected regions: "reject" the order up front, or "snap" the endpoint to the nearest reachable cell
+UNREACHABLE_POLICY = "reject"
+# Per-leg planner metrics (expansions, heap, timings, cache hits, log latency); .prom for Prometheus text, else JSONL
+METRICS_PATH = None  # e.g. "data/logs/planner_metrics.prom"
+# Wrap the run in cProfile and save the stats here
+PROFILE_PATH = None  # e.g. "data/logs/find_path.prof"
+# Plan through a running planner service (python -m core.planner_service) instead of loading the grid here
+PLANNER_SOCKET = None  # e.g. "data/planner.sock"
 
 def load_barn():
     with open("data/raw/barn.json") as f:
@@ -28,65 +69,60 @@ def load_hub():
     with open(HUB_PATH) as f:
         return json.load(f)
 
+def orders_to_deliveries(orders):
+    return [{
+        "order_id": o[0],
+        "pickup": {"lat": o[3], "lon": o[4], "name": o[2]},
+        "dropoff": {"lat": o[5], "lon": o[6], "name": o[1]}
+    } for o in orders]
+
+# Cells of every pickup and dropoff in one vectorized conversion; returns the deliveries with a point off the grid
+def locate_deliveries(georef, deliveries):
+    points = [delivery[stop] for delivery in deliveries for stop in ("pickup", "dropoff")]
+    if not points:
+        return []
+    rows, cols, inside = georef.locate([p["lat"] for p in points], [p["lon"] for p in points])
+    for point, row, col in zip(points, rows.tolist(), cols.tolist()):
+        point["cell"] = (row, col)
+    inside = inside.reshape(-1, 2).all(axis=1)
+    return [delivery for delivery, ok in zip(deliveries, inside) if not ok]
+
+# Cell located up front by locate_deliveries, else converted on the spot
+def point_cell(georef, point):
+    cell = point.get("cell")
+    return cell if cell is not None else georef.index(point["lon"], point["lat"])
+
 # Heuristic for A*
 def heuristic(a, b):
     return math.hypot(a[0]-b[0], a[1]-b[1])
 
-# A* algorithm
-def astar(grid, start, goal):
-    open_heap = []
-    heapq.heappush(open_heap, (0 + heuristic(start, goal), start))
-    came_from = {}
-    gscore = {start: 0}
-    fscore = {start: heuristic(start, goal)}
-    visited = np.zeros_like(grid, dtype=bool)
-
-    while open_heap:
-        current = heapq.heappop(open_heap)[1]
-        if visited[current[0], current[1]]:
-            continue
-        visited[current[0], current[1]] = True
-        if current == goal:
-            path = []
-            while current in came_from:
-                path.append(current)
-                current = came_from[current]
-            path.append(start)
-            path.reverse()
-            return path, gscore[goal]
-
-        for i, j in [(-1,0), (1,0), (0,-1), (0,1), (-1,-1), (-1,1), (1,-1), (1,1)]:
-            neighbor = (current[0]+i, current[1]+j)
-            if 0 <= neighbor[0] < grid.shape[0] and 0 <= neighbor[1] < grid.shape[1]:
-                if grid[neighbor[0], neighbor[1]] >= 100:
-                    continue
-                move_cost = grid[neighbor[0], neighbor[1]] * (1.414 if i != 0 and j != 0 else 1)
-                tentative_g = gscore[current] + move_cost
-                if tentative_g < gscore.get(neighbor, float('inf')):
-                    came_from[neighbor] = current
-                    gscore[neighbor] = tentative_g
-                    fscore[neighbor] = tentative_g + heuristic(neighbor, goal)
-                    heapq.heappush(open_heap, (fscore[neighbor], neighbor))
-    return None, float('inf')
+# Constant-time check of all three legs, so an unflyable order is dropped before any leg is logged
+def check_delivery(planner, georef, hub, delivery):
+    stops = [hub, delivery["pickup"], delivery["dropoff"], hub]
+    for origin, dest in zip(stops, stops[1:]):
+        planner.resolve(point_cell(georef, origin), point_cell(georef, dest))
 
 # Compute stats per leg
-def simulate_leg(grid, transform, src, origin, dest, leg_number, drone_id, speed_mps):
-    start_rc = src.index(origin["lon"], origin["lat"])
-    goal_rc = src.index(dest["lon"], dest["lat"])
-    path, cost = astar(grid, start_rc, goal_rc)
-    if not path:
+def simulate_leg(planner, georef, origin, dest, leg_number, drone_id, speed_mps, log_writer=None, path_writer=None, flight_id=None):
+    start_rc = point_cell(georef, origin)
+    goal_rc = point_cell(georef, dest)
+    path, cost = planner.plan(start_rc, goal_rc)
+    if path is None:
         raise RuntimeError("No path found")
 
-    os.makedirs("data/logs", exist_ok=True)
-    path_file = f"data/logs/{drone_id}_leg{leg_number}_path.json"
-    with open(path_file, "w") as f:
-        json.dump({"path": path, "transform": transform.to_gdal()}, f)
+    # Keep the path for visualization and analytics, keyed by flight, drone and leg
+    flight_id = flight_id or str(uuid.uuid4())
+    if path_writer is not None:
+        path_writer.add(flight_id, drone_id, leg_number, path, cost)
 
-    distance = heuristic(start_rc, goal_rc) * src.res[0]
+    distance = heuristic(start_rc, goal_rc) * georef.res[0]
     est_time = distance / speed_mps
     timestamp = datetime.utcnow().isoformat()
 
-    insert_delivery_leg(
+    # Buffered writer if we have one, otherwise a one-off insert
+    log_leg = log_writer.add if log_writer is not None else insert_delivery_leg
+    log_started = time.perf_counter() if METRICS.enabled else None
+    log_leg(
         drone_id=str(drone_id),
         leg_type=f"leg{leg_number}",
         start_lat=float(origin["lat"]),
@@ -95,29 +131,119 @@ def simulate_leg(grid, transform, src, origin, dest, leg_number, drone_id, speed
         end_lon=float(dest["lon"]),
         cost=float(cost),
         path_length=int(len(path)),
-        duration_seconds=float(est_time)
+        duration_seconds=float(est_time),
+        flight_id=flight_id
         )
+    if log_started is not None:
+        METRICS.observe("delivery_log_seconds", time.perf_counter() - log_started)
+    return est_time
+
+# Fly all three legs of a delivery under one flight id; returns the simulated flight time in seconds
+def simulate_delivery(planner, georef, hub, delivery, drone, log_writer=None, path_writer=None):
+    drone_id = drone["id"]
+    speed = drone["speed_mps"]
+    flight_id = str(uuid.uuid4())
+    seconds = simulate_leg(planner, georef, hub, delivery["pickup"], 1, drone_id, speed, log_writer, path_writer, flight_id)
+    seconds += simulate_leg(planner, georef, delivery["pickup"], delivery["dropoff"], 2, drone_id, speed, log_writer, path_writer, flight_id)
+    seconds += simulate_leg(planner, georef, delivery["dropoff"], hub, 3, drone_id, speed, log_writer, path_writer, flight_id)
+    return seconds
+
+# Planner for this process: a client of the warm planner service if one is running, else a local LegPlanner.
+# Returns (planner, hub_field, path_cache, grid); the last three are None with the service (octile dispatch estimates)
+def load_planner(hub):
+    if PLANNER_SOCKET and os.path.exists(PLANNER_SOCKET):
+        print(f"✅ Planning through the service at {PLANNER_SOCKET}")
+        return PlannerClient(PLANNER_SOCKET), None, None, None
+    grid_path = COST_GRID_PATH
+    if USE_TILED_GRID:
+        grid = TiledCostGrid(COST_GRID_TILES_DIR)
+    elif USE_QUANTIZED_GRID:
+        # Data precomputed for the quantized grid is stored next to it, keyed on its own fingerprint
+        grid = load_or_build_quantized(np.load(COST_GRID_PATH, mmap_mode="r"), COST_GRID_PATH)
+        grid_path = quantized_dir(COST_GRID_PATH)
+    else:
+        grid = np.load(COST_GRID_PATH)
+    fingerprint = None if USE_TILED_GRID else grid_fingerprint(grid)
+    hub_field = None
+    if USE_HUB_COST_FIELD and not USE_TILED_GRID:
+        hub_field = load_or_build_hub_field(grid, hub["cell"], grid_path, fingerprint)
+    float_search = fingerprint is not None and not USE_QUANTIZED_GRID
+    hpa_graph = load_or_build_hpa_graph(grid, COST_GRID_PATH, fingerprint) if USE_HPA and float_search else None
+    pyramid = None
+    if USE_PYRAMID and not hpa_graph and float_search:
+        pyramid = load_or_build_pyramid(grid, COST_GRID_PATH, fingerprint)
+    landmarks = None
+    if USE_LANDMARKS and not (hpa_graph or pyramid) and float_search:
+        landmarks = load_or_build_landmarks(grid, COST_GRID_PATH, fingerprint)
+    engine = astar_bidirectional if USE_BIDIRECTIONAL_SEARCH else astar
+    path_cache = None
+    if USE_PATH_CACHE and fingerprint:
+        path_cache = PathCache(fingerprint, planner_mode(hpa_graph, landmarks, pyramid, engine, UNREACHABLE_POLICY))
+    # Quantizing keeps every blocked cell blocked, so the float grid's labels apply to both
+    components = load_or_build_components(grid, COST_GRID_PATH, fingerprint if float_search else None)
+    planner = LegPlanner(grid, hub_field, path_cache, hpa_graph, landmarks, pyramid, engine,
+                         components, UNREACHABLE_POLICY)
+    return planner, hub_field, path_cache, None if USE_TILED_GRID else grid
 
 # Main simulation
 if __name__ == "__main__":
-    grid = np.load(COST_GRID_PATH)
-    with rasterio.open(ELEVATION_TIF) as src:
-        transform = src.transform
-        hub = load_hub()
-        drones = load_barn()
-
-        pending_orders = fetch_pending_orders()
-        deliveries = [{
-            "order_id": o[0],
-            "pickup": {"lat": o[3], "lon": o[4], "name": o[2]},
-            "dropoff": {"lat": o[5], "lon": o[6], "name": o[1]}
-        } for o in pending_orders]
-
-        for delivery, drone in zip(deliveries, drones):
-            drone_id = drone["id"]
-            speed = drone["speed_mps"]
-            simulate_leg(grid, transform, src, hub, delivery["pickup"], 1, drone_id, speed)
-            simulate_leg(grid, transform, src, delivery["pickup"], delivery["dropoff"], 2, drone_id, speed)
-            simulate_leg(grid, transform, src, delivery["dropoff"], hub, 3, drone_id, speed)
-            mark_order_delivered(delivery["order_id"])
-            print("-- End of delivery simulation --\n")
+    if METRICS_PATH:
+        enable_metrics()
+    profiler = start_profile() if PROFILE_PATH else None
+    # Coordinate math only needs the transform saved with the grid, not the DEM itself
+    georef = GeoReference.load(COST_GRID_META_PATH)
+    hub = load_hub()
+    hub["cell"] = georef.index(hub["lon"], hub["lat"])
+    drones = load_barn()
+    planner, hub_field, path_cache, grid = load_planner(hub)
+
+    dispatcher = FleetDispatcher(
+        drones, hub["cell"], georef.res[0], lambda lat, lon: georef.index(lon, lat),
+        hub_field, path_cache, grid,
+    )
+    batch_size = BATCH_ORDERS_PER_DRONE * len(drones)
+
+    # Drain the pending queue: claim a batch, assign what the fleet flies best next, carry the rest over
+    claimed, delivered, pool = [], set(), []
+    try:
+        with DeliveryLogWriter(trino_config=TRINO_CONFIG) as log_writer, PathStoreWriter(transform=georef.transform) as path_writer:
+            while True:
+                batch = orders_to_deliveries(claim_pending_orders(batch_size - len(pool)))
+                outside = {delivery["order_id"] for delivery in locate_deliveries(georef, batch)}
+                for delivery in batch:
+                    claimed.append(delivery["order_id"])
+                    if delivery["order_id"] in outside:
+                        reject_order(delivery["order_id"], "outside the cost grid")
+                        continue
+                    try:
+                        check_delivery(planner, georef, hub, delivery)
+                    except UnreachableError as e:
+                        # Rejected orders are no longer in flight, so the release below leaves them alone
+                        reject_order(delivery["order_id"], str(e))
+                        continue
+                    pool.append(delivery)
+                if not pool:
+                    break
+                assignments, pool, unassignable = dispatcher.assign(pool)
+                for delivery in unassignable:
+                    reject_order(delivery["order_id"], "beyond the range of every drone")
+                for delivery, drone_index, start, _ in assignments:
+                    seconds = simulate_delivery(planner, georef, hub, delivery, drones[drone_index], log_writer, path_writer)
+                    dispatcher.complete(drone_index, start + seconds)
+                    mark_order_delivered(delivery["order_id"])
+                    delivered.add(delivery["order_id"])
+                    print("-- End of delivery simulation --\n")
+    finally:
+        release_orders(order_id for order_id in claimed if order_id not in delivered)
+    if delivered and dispatcher.makespan():
+        hours = dispatcher.makespan() / 3600
+        print(f"✅ {len(delivered)} orders delivered in {hours:.2f} simulated hours "
+              f"({len(delivered) / hours:.1f} orders/hour across {len(drones)} drones)")
+    if path_cache is not None:
+        print(f"Path cache: {path_cache.stats()}")
+    if profiler is not None:
+        stop_profile(profiler, PROFILE_PATH)
+    if METRICS_PATH:
+        METRICS.export(METRICS_PATH)
+        print(METRICS.summary())
+        print(f"✅ Planner metrics written to {METRICS_PATH}")
@@ -0,0 +1,111 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import time
+from datetime import datetime
+import numpy as np
+from core.cost_field import load_or_build_hub_field
+from core.dispatcher import FleetDispatcher
+from core.fleet_sim import FleetSimulation
+from core.georef import GeoReference
+from core.grid_store import grid_fingerprint
+from core.metrics import profiled
+from find_path_sqlite import COST_GRID_META_PATH, COST_GRID_PATH, load_barn, load_hub, orders_to_deliveries
+from order_manager import get_repository
+
+# Usage: python fleet_sim.py --drones 200 --orders 20000 --radius-km 15
+#        python fleet_sim.py --drones 50 --from-db
+
+# Relative order volume per hour of the day (lunch and dinner peaks)
+DEMAND_PROFILE = [1, 0.5, 0.3, 0.2, 0.2, 0.4, 1, 2, 3, 3, 4, 6, 8, 6, 4, 4, 5, 7, 9, 8, 6, 4, 3, 2]
+
+
+def build_fleet(drones, count):
+    # Clone the barn's drone models round-robin up to `count` drones
+    return [dict(drones[i % len(drones)], id=f"{drones[i % len(drones)]['id']}_{i:04d}") for i in range(count)]
+
+
+def synthetic_demand(hub_field, georef, count, radius_cells, seed=0):
+    """`count` orders over one day, following DEMAND_PROFILE, between random reachable cells near the hub."""
+    rng = np.random.default_rng(seed)
+    profile = np.asarray(DEMAND_PROFILE, dtype=np.float64)
+    hours = rng.choice(24, size=count, p=profile / profile.sum())
+    created = np.sort((hours + rng.random(count)) * 3600)
+
+    h, w = hub_field.shape
+    cells = []
+    while len(cells) < 2 * count:
+        angle = rng.uniform(0, 2 * np.pi, 2 * count)
+        dist = radius_cells * np.sqrt(rng.random(2 * count))
+        rows = np.round(hub_field.hub[0] + dist * np.sin(angle)).astype(np.int64)
+        cols = np.round(hub_field.hub[1] + dist * np.cos(angle)).astype(np.int64)
+        inside = (rows >= 0) & (rows < h) & (cols >= 0) & (cols < w)
+        rows, cols = rows[inside], cols[inside]
+        # Keep cells a drone can fly to from the hub and back
+        ids = rows * w + cols
+        ok = np.isfinite(hub_field.dist_out[ids]) & np.isfinite(hub_field.dist_in[ids])
+        cells.extend(zip(rows[ok], cols[ok]))
+    rows, cols = np.array(cells[:2 * count]).T
+    lats, lons = georef.latlon(rows, cols)
+    return [{
+        "order_id": str(i),
+        "created_s": float(created[i]),
+        "pickup": {"lat": float(lats[2 * i]), "lon": float(lons[2 * i])},
+        "dropoff": {"lat": float(lats[2 * i + 1]), "lon": float(lons[2 * i + 1])},
+    } for i in range(count)]
+
+
+def pending_demand():
+    """Pending orders from the local database, timed by created_at (read only, nothing is claimed)."""
+    rows = list(get_repository().iter_pending_orders())
+    deliveries = orders_to_deliveries(rows)
+    if not rows:
+        return deliveries
+    t0 = datetime.fromisoformat(rows[0][8])
+    for delivery, row in zip(deliveries, rows):
+        delivery["created_s"] = (datetime.fromisoformat(row[8]) - t0).total_seconds()
+    return deliveries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Discrete-event fleet simulation: utilization and queueing latency")
+    parser.add_argument("--drones", type=int, default=None, help="Fleet size (default: the drones in barn.json)")
+    parser.add_argument("--orders", type=int, default=5000, help="Synthetic orders over one day")
+    parser.add_argument("--radius-km", type=float, default=10.0, help="Synthetic orders fall within this distance of the hub")
+    parser.add_argument("--from-db", action="store_true", help="Replay pending orders from the database instead")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", default=None, metavar="PATH", help="cProfile the simulation and save the stats to PATH")
+    args = parser.parse_args()
+
+    grid = np.load(COST_GRID_PATH, mmap_mode="r")
+    drones = load_barn()
+    drones = build_fleet(drones, args.drones) if args.drones else drones
+    georef = GeoReference.load(COST_GRID_META_PATH)
+    hub = load_hub()
+    hub_cell = georef.index(hub["lon"], hub["lat"])
+    hub_field = load_or_build_hub_field(grid, hub_cell, COST_GRID_PATH, grid_fingerprint(grid))
+    cell_size = georef.res[0]
+    if args.from_db:
+        deliveries = pending_demand()
+    else:
+        deliveries = synthetic_demand(hub_field, georef, args.orders, args.radius_km * 1000 / cell_size, args.seed)
+    dispatcher = FleetDispatcher(drones, hub_cell, cell_size, lambda lat, lon: georef.index(lon, lat), hub_field)
+
+    started = time.perf_counter()
+    with profiled(args.profile):
+        report = FleetSimulation(dispatcher).run(deliveries)
+    elapsed = time.perf_counter() - started
+
+    flights = report.pop("flights_per_drone")
+    print(f"✅ Simulated {report['orders']} orders on {len(drones)} drones in {elapsed:.2f}s")
+    print(f"Served {report['served']}, rejected {report['rejected']}, "
+          f"{report['orders_per_hour']:.1f} orders/hour over {report['makespan_s'] / 3600:.1f} simulated hours")
+    print(f"Fleet utilization {report['utilization'] * 100:.1f}%, flights per drone {min(flights)}-{max(flights)}")
+    print(f"Queueing latency: mean {report['wait_mean_s'] / 60:.1f} min, p50 {report['wait_p50_s'] / 60:.1f} min, "
+          f"p95 {report['wait_p95_s'] / 60:.1f} min, max {report['wait_max_s'] / 60:.1f} min "
+          f"(peak queue {report['peak_waiting']})")
+
+
+if __name__ == "__main__":
+    main()
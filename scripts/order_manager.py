@@ -1,66 +1,162 @@
+import os
+import socket
 import sqlite3
 import uuid
 from datetime import datetime
+from setup_local_db import apply_migrations, create_tables
 
 DB_PATH = "data/delivery_system.sqlite"
 
+ORDER_COLUMNS = """
+    order_id, customer_id, store_name,
+    pickup_lat, pickup_lon, dropoff_lat, dropoff_lon,
+    depot_id, created_at, status
+"""
+
+
+class OrderRepository:
+    """Orders table access over one long-lived SQLite connection.
+
+    The database runs in WAL mode so readers are not blocked while the
+    simulator writes, and the bulk methods commit once per call instead of
+    once per order.
+    """
+
+    def __init__(self, db_path=DB_PATH, timeout=30.0):
+        self.db_path = db_path
+        # Generous busy timeout: several simulator processes may claim orders at once
+        self.conn = sqlite3.connect(db_path, timeout=timeout)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        create_tables(self.conn)
+        apply_migrations(self.conn)
+
+    def insert_orders(self, orders):
+        """Insert order dicts (customer_id, store_name, pickup/dropoff lat/lon, optional depot_id)
+        in a single transaction and return their new order ids."""
+        created_at = datetime.utcnow().isoformat()
+        rows = [(
+            str(uuid.uuid4()), o["customer_id"], o["store_name"],
+            o["pickup_lat"], o["pickup_lon"],
+            o["dropoff_lat"], o["dropoff_lon"],
+            o.get("depot_id", "depot-001"), created_at, "pending"
+        ) for o in orders]
+        with self.conn:
+            self.conn.executemany(f"""
+                INSERT INTO orders ({ORDER_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        return [row[0] for row in rows]
+
+    def iter_pending_orders(self, batch_size=1000):
+        """Stream pending orders from a cursor, `batch_size` rows at a time."""
+        cur = self.conn.execute(f"SELECT {ORDER_COLUMNS} FROM orders WHERE status = 'pending' ORDER BY created_at")
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+
+    def claim_pending_orders(self, limit, claimed_by=None):
+        """Atomically move up to `limit` of the oldest pending orders to in_flight and return them.
+
+        Selection and update are one statement, so concurrent simulators never
+        receive the same order.
+        """
+        claimed_by = claimed_by or f"{socket.gethostname()}:{os.getpid()}"
+        with self.conn:
+            rows = self.conn.execute(f"""
+                UPDATE orders
+                SET status = 'in_flight', claimed_by = ?, claimed_at = ?
+                WHERE order_id IN (
+                    SELECT order_id FROM orders
+                    WHERE status = 'pending'
+                    ORDER BY created_at
+                    LIMIT ?
+                )
+                RETURNING {ORDER_COLUMNS}
+            """, (claimed_by, datetime.utcnow().isoformat(), limit)).fetchall()
+        return sorted(rows, key=lambda row: row[8])
+
+    def release_orders(self, order_ids):
+        """Return claimed orders that were not delivered to the pending queue."""
+        with self.conn:
+            self.conn.executemany("""
+                UPDATE orders
+                SET status = 'pending', claimed_by = NULL, claimed_at = NULL
+                WHERE order_id = ? AND status = 'in_flight'
+            """, [(order_id,) for order_id in order_ids])
+
+    def reject_orders(self, order_ids):
+        """Take claimed orders that can never be flown (e.g. unreachable drop-off) off the queue for good."""
+        with self.conn:
+            self.conn.executemany("""
+                UPDATE orders
+                SET status = 'rejected'
+                WHERE order_id = ? AND status = 'in_flight'
+            """, [(order_id,) for order_id in order_ids])
+
+    def mark_orders_delivered(self, order_ids):
+        with self.conn:
+            self.conn.executemany("""
+                UPDATE orders
+                SET status = 'delivered'
+                WHERE order_id = ?
+            """, [(order_id,) for order_id in order_ids])
+
+    def close(self):
+        self.conn.close()
+
+
+# Shared repository behind the module-level helpers, opened on first use
+_repository = None
+
+
+def get_repository():
+    global _repository
+    if _repository is None:
+        _repository = OrderRepository(DB_PATH)
+    return _repository
+
+
 def insert_order(customer_id, store_name, pickup_lat, pickup_lon, dropoff_lat, dropoff_lon, depot_id="depot-001"):
-    order_id = str(uuid.uuid4())
-    created_at = datetime.utcnow().isoformat()
-    status = "pending"
-
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-
-    cur.execute("""
-        INSERT INTO orders (
-            order_id, customer_id, store_name,
-            pickup_lat, pickup_lon,
-            dropoff_lat, dropoff_lon,
-            depot_id, created_at, status
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        order_id, customer_id, store_name,
-        pickup_lat, pickup_lon,
-        dropoff_lat, dropoff_lon,
-        depot_id, created_at, status
-    ))
-
-    conn.commit()
-    conn.close()
+    order_id = get_repository().insert_orders([{
+        "customer_id": customer_id, "store_name": store_name,
+        "pickup_lat": pickup_lat, "pickup_lon": pickup_lon,
+        "dropoff_lat": dropoff_lat, "dropoff_lon": dropoff_lon,
+        "depot_id": depot_id,
+    }])[0]
     print(f"✅ Order {order_id} created for {customer_id}")
     return order_id
 
 
 def fetch_pending_orders():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+    return list(get_repository().iter_pending_orders())
+
 
-    cur.execute("""
-        SELECT order_id, customer_id, store_name,
-               pickup_lat, pickup_lon, dropoff_lat, dropoff_lon,
-               depot_id, created_at, status
-        FROM orders
-        WHERE status = 'pending'
-    """)
+def claim_pending_orders(limit, claimed_by=None):
+    return get_repository().claim_pending_orders(limit, claimed_by)
+
+
+def release_orders(order_ids):
+    get_repository().release_orders(list(order_ids))
+
+
+def reject_order(order_id, reason="unreachable"):
+    get_repository().reject_orders([order_id])
+    print(f"Order {order_id} rejected ({reason}).")
 
-    rows = cur.fetchall()
-    conn.close()
-    return rows
 
 def mark_order_delivered(order_id):
-    conn = sqlite3.connect("data/delivery_system.sqlite")
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE orders
-        SET status = 'delivered'
-        WHERE order_id = ?
-    """, (order_id,))
-    conn.commit()
-    conn.close()
+    get_repository().mark_orders_delivered([order_id])
     print(f"✅ Order {order_id} marked as delivered.")
 
 
+def mark_orders_delivered(order_ids):
+    order_ids = list(order_ids)
+    get_repository().mark_orders_delivered(order_ids)
+    print(f"✅ {len(order_ids)} orders marked as delivered.")
+
+
 # Example usage (for testing)
 if __name__ == "__main__":
     # Fake customer order
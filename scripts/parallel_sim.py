@@ -0,0 +1,228 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, util
+import numpy as np
+from core.astar_engine import SearchGrid, astar, astar_bidirectional
+from core.components import UnreachableError, components_dir, load_or_build_components
+from core.cost_field import hub_field_dir, load_or_build_hub_field
+from core.delivery_logger import DeliveryLogWriter
+from core.dispatcher import BATCH_ORDERS_PER_DRONE, FleetDispatcher
+from core.georef import GeoReference
+from core.grid_store import TiledCostGrid, grid_fingerprint
+from core.hpa import hpa_dir, load_or_build_hpa_graph
+from core.landmarks import landmarks_dir, load_or_build_landmarks
+from core.metrics import METRICS, enable_metrics, profiled
+from core.pyramid import load_or_build_pyramid, pyramid_dir
+from core.quantized import load_or_build_quantized, quantized_dir
+from core.path_cache import PathCache
+from core.path_store import PathStoreWriter
+from core.planner import LegPlanner, load_planning_data, planner_mode
+from find_path_sqlite import (
+    COST_GRID_META_PATH, COST_GRID_PATH, COST_GRID_TILES_DIR, UNREACHABLE_POLICY,
+    USE_BIDIRECTIONAL_SEARCH, USE_HPA, USE_HUB_COST_FIELD, USE_LANDMARKS, USE_PATH_CACHE, USE_PYRAMID, USE_QUANTIZED_GRID,
+    USE_TILED_GRID,
+    check_delivery, load_barn, load_hub, locate_deliveries, orders_to_deliveries, simulate_delivery,
+)
+from order_manager import claim_pending_orders, mark_order_delivered, reject_order, release_orders
+
+# Usage: python parallel_sim.py --workers 8
+
+# Per-process state, filled in once by _init_worker
+_worker = {}
+
+def _init_worker(shm_name, grid_shape, planning_dirs, fingerprint, metrics_path=None, scale=None):
+    if shm_name is None:
+        # Tiled mode: every worker maps the tile file itself and pages in what it searches
+        grid = TiledCostGrid(COST_GRID_TILES_DIR)
+    else:
+        # Attach to the padded grid the parent built; nothing grid-sized is copied or pickled
+        shm = shared_memory.SharedMemory(name=shm_name)
+        dtype = np.float64 if scale is None else np.uint8
+        costs = np.ndarray((grid_shape[0] + 2) * (grid_shape[1] + 2), dtype=dtype, buffer=shm.buf)
+        grid = SearchGrid.from_padded(costs, grid_shape, scale)
+        _worker["shm"] = shm
+    planning_data = load_planning_data(planning_dirs)
+    engine = astar_bidirectional if USE_BIDIRECTIONAL_SEARCH else astar
+    # Workers share the on-disk cache tier; each keeps its own memory tier
+    path_cache = None
+    if USE_PATH_CACHE and fingerprint:
+        mode = planner_mode(planning_data.get("hpa_graph"), planning_data.get("landmarks"), planning_data.get("pyramid"),
+                            engine, UNREACHABLE_POLICY, shm_name is None)
+        path_cache = PathCache(fingerprint, mode)
+    _worker["planner"] = LegPlanner(grid, path_cache=path_cache, engine=engine, on_unreachable=UNREACHABLE_POLICY,
+                                    **planning_data)
+    # Workers only do coordinate math, so the saved georeference replaces an open rasterio dataset
+    georef = GeoReference.load(COST_GRID_META_PATH)
+    hub = load_hub()
+    hub["cell"] = georef.index(hub["lon"], hub["lat"])
+    _worker["georef"], _worker["hub"] = georef, hub
+    # One buffered log connection per worker, flushed when the worker process exits
+    log_writer = DeliveryLogWriter()
+    util.Finalize(log_writer, log_writer.close, exitpriority=10)
+    _worker["log_writer"] = log_writer
+    # Each worker appends its own segments to the shared path store
+    path_writer = PathStoreWriter(transform=georef.transform)
+    util.Finalize(path_writer, path_writer.close, exitpriority=10)
+    _worker["path_writer"] = path_writer
+    if metrics_path:
+        # Each worker appends its own block, tagged with its pid, when it exits
+        enable_metrics()
+        util.Finalize(METRICS, METRICS.export_jsonl, args=(metrics_path,), exitpriority=10)
+
+
+def _simulate_delivery(delivery, drone):
+    planner, georef, hub = _worker["planner"], _worker["georef"], _worker["hub"]
+    log_writer, path_writer = _worker["log_writer"], _worker["path_writer"]
+    started = time.perf_counter()
+    try:
+        check_delivery(planner, georef, hub, delivery)
+    except UnreachableError as e:
+        return delivery["order_id"], None, None, str(e)
+    seconds = simulate_delivery(planner, georef, hub, delivery, drone, log_writer, path_writer)
+    return delivery["order_id"], seconds, time.perf_counter() - started, None
+
+
+def _drain(workers, initargs, dispatcher, drones, georef, claim, on_delivered, on_rejected):
+    # Claim a batch, assign what the fleet flies best next and fly those pairs in parallel, carry the rest over
+    results, pool = [], []
+    batch_size = BATCH_ORDERS_PER_DRONE * len(drones)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+        while True:
+            batch = orders_to_deliveries(claim(batch_size - len(pool)))
+            # Cells for the whole batch in one vectorized step; they travel to the workers with the deliveries
+            outside = {delivery["order_id"] for delivery in locate_deliveries(georef, batch)}
+            for delivery in batch:
+                if delivery["order_id"] in outside:
+                    on_rejected(delivery["order_id"], "outside the cost grid")
+                else:
+                    pool.append(delivery)
+            if not pool:
+                break
+            assignments, pool, unassignable = dispatcher.assign(pool)
+            for delivery in unassignable:
+                on_rejected(delivery["order_id"], "beyond the range of every drone")
+            pairs = [(delivery, drones[drone_index]) for delivery, drone_index, _, _ in assignments]
+            outcomes = executor.map(_simulate_delivery, *zip(*pairs)) if pairs else []
+            for (order_id, seconds, elapsed, rejection), (_, drone_index, start, _) in zip(outcomes, assignments):
+                if rejection is not None:
+                    # The drone never left, so it is free again when the round started
+                    dispatcher.complete(drone_index, start)
+                    on_rejected(order_id, rejection)
+                    continue
+                dispatcher.complete(drone_index, start + seconds)
+                on_delivered(order_id)
+                results.append((order_id, elapsed))
+    return results
+
+
+def run_parallel_simulation(drones, workers=None, claim=claim_pending_orders, on_delivered=mark_order_delivered,
+                            on_rejected=reject_order, metrics_path=None):
+    """Drain the pending queue with `drones`, flying each round's deliveries on a process pool.
+
+    Orders are claimed BATCH_ORDERS_PER_DRONE per drone at a time and paired
+    with drones by a FleetDispatcher (speed, range and availability, as in
+    find_path_sqlite.py); orders that lose out are carried into the next
+    round. The cost grid is padded once into shared memory (or, with
+    USE_TILED_GRID, memory-mapped tile by tile) and precomputed planning
+    data (hub field, HPA graph, landmarks, pyramid, component labels) is
+    memory-mapped by every worker. `claim`, `on_delivered` and `on_rejected`
+    (order status updates) run in this process only. With `metrics_path`,
+    every worker appends its planner metrics there as JSONL when it exits.
+    Returns the list of (order_id, seconds) results for delivered orders,
+    in wall-clock seconds per delivery.
+    """
+    georef = GeoReference.load(COST_GRID_META_PATH)
+    hub = load_hub()
+    hub_cell = georef.index(hub["lon"], hub["lat"])
+    index = lambda lat, lon: georef.index(lon, lat)
+    if USE_TILED_GRID:
+        load_or_build_components(TiledCostGrid(COST_GRID_TILES_DIR), COST_GRID_PATH)
+        planning_dirs = {"components": components_dir(COST_GRID_PATH)}
+        # No grid in this process: the dispatcher estimates legs with octile distances
+        dispatcher = FleetDispatcher(drones, hub_cell, georef.res[0], index)
+        return _drain(workers, (None, None, planning_dirs, None, metrics_path), dispatcher, drones, georef,
+                      claim, on_delivered, on_rejected)
+
+    grid = np.load(COST_GRID_PATH, mmap_mode="r")
+    grid_path, scale = COST_GRID_PATH, None
+    if USE_QUANTIZED_GRID:
+        # The workers share uint8 levels (1/8 of the float grid) and search them in fixed point
+        grid = load_or_build_quantized(grid, COST_GRID_PATH)
+        grid_path, scale = quantized_dir(COST_GRID_PATH), grid.scale
+    fingerprint = grid_fingerprint(grid)
+    # Build (or validate) everything on disk once here; workers only map it
+    # Labels are keyed on the float grid, which the quantized fingerprint does not identify
+    load_or_build_components(grid, COST_GRID_PATH, None if USE_QUANTIZED_GRID else fingerprint)
+    planning_dirs = {"components": components_dir(COST_GRID_PATH)}
+    planning_data = {}
+    if USE_HUB_COST_FIELD:
+        planning_data["hub_field"] = load_or_build_hub_field(grid, hub_cell, grid_path, fingerprint)
+        planning_dirs["hub_field"] = hub_field_dir(grid_path)
+    # HPA, pyramid and landmarks search float costs; the quantized grid is searched with plain astar
+    if not USE_QUANTIZED_GRID:
+        if USE_HPA:
+            planning_data["hpa_graph"] = load_or_build_hpa_graph(grid, COST_GRID_PATH, fingerprint)
+            planning_dirs["hpa_graph"] = hpa_dir(COST_GRID_PATH)
+        elif USE_PYRAMID:
+            planning_data["pyramid"] = load_or_build_pyramid(grid, COST_GRID_PATH, fingerprint)
+            planning_dirs["pyramid"] = pyramid_dir(COST_GRID_PATH)
+        elif USE_LANDMARKS:
+            planning_data["landmarks"] = load_or_build_landmarks(grid, COST_GRID_PATH, fingerprint)
+            planning_dirs["landmarks"] = landmarks_dir(COST_GRID_PATH)
+    # The dispatcher reads leg 2 estimates from the disk tier the workers fill
+    path_cache = None
+    if USE_PATH_CACHE:
+        engine = astar_bidirectional if USE_BIDIRECTIONAL_SEARCH else astar
+        path_cache = PathCache(fingerprint, planner_mode(planning_data.get("hpa_graph"), planning_data.get("landmarks"),
+                                                         planning_data.get("pyramid"), engine, UNREACHABLE_POLICY))
+    dispatcher = FleetDispatcher(drones, hub_cell, georef.res[0], index, planning_data.get("hub_field"), path_cache, grid)
+
+    grid_shape = grid.shape
+    shm = shared_memory.SharedMemory(create=True, size=SearchGrid.nbytes_for(grid_shape, quantized=scale is not None))
+    try:
+        SearchGrid(grid, out=shm.buf)
+        initargs = (shm.name, grid_shape, planning_dirs, fingerprint, metrics_path, scale)
+        return _drain(workers, initargs, dispatcher, drones, georef, claim, on_delivered, on_rejected)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate pending deliveries on a process pool")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--metrics", default=None, metavar="PATH",
+                        help="Append per-worker planner metrics (JSONL) to PATH, e.g. data/logs/planner_metrics.jsonl")
+    parser.add_argument("--profile", default=None, metavar="PATH", help="cProfile this process and save the stats to PATH")
+    args = parser.parse_args()
+
+    drones = load_barn()
+    claimed, delivered = [], set()
+
+    def claim(limit):
+        orders = claim_pending_orders(limit)
+        claimed.extend(order[0] for order in orders)
+        return orders
+
+    def on_delivered(order_id):
+        mark_order_delivered(order_id)
+        delivered.add(order_id)
+
+    started = time.perf_counter()
+    try:
+        with profiled(args.profile):
+            results = run_parallel_simulation(drones, workers=args.workers, claim=claim, on_delivered=on_delivered,
+                                              metrics_path=args.metrics)
+    finally:
+        # Rejected orders are no longer in flight, so this leaves them alone
+        release_orders(order_id for order_id in claimed if order_id not in delivered)
+    elapsed = time.perf_counter() - started
+    if results:
+        print(f"✅ Simulated {len(results)} deliveries on {args.workers} workers in {elapsed:.2f}s "
+              f"({len(results) / elapsed:.2f} orders/sec)")
+    else:
+        print("No pending deliveries to simulate.")
@@ -2,9 +2,45 @@ import sqlite3
 import os
 from datetime import datetime
 
-def create_db(db_path="data/delivery_system.sqlite"):
-    os.makedirs("data", exist_ok=True)
-    conn = sqlite3.connect(db_path)
+# Versioned schema changes on top of the base tables, tracked in PRAGMA user_version.
+# Append new versions; never edit one that has shipped.
+MIGRATIONS = [
+    (1, [
+        # Covers the pending-order scan and the oldest-first claim without touching the table
+        "CREATE INDEX IF NOT EXISTS idx_orders_status_created ON orders (status, created_at, order_id)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_depot_status ON orders (depot_id, status, created_at)",
+    ]),
+    (2, [
+        # Who pulled an order off the queue, for concurrent simulators
+        "ALTER TABLE orders ADD COLUMN claimed_by TEXT",
+        "ALTER TABLE orders ADD COLUMN claimed_at TIMESTAMP",
+    ]),
+]
+
+
+def apply_migrations(conn):
+    """Bring the schema up to the latest migration; each version commits atomically."""
+    for target, statements in MIGRATIONS:
+        if target <= conn.execute("PRAGMA user_version").fetchone()[0]:
+            continue
+        # IMMEDIATE takes the write lock up front; re-check in case another process just migrated
+        conn.execute("BEGIN IMMEDIATE")
+        if target <= conn.execute("PRAGMA user_version").fetchone()[0]:
+            conn.execute("ROLLBACK")
+            continue
+        try:
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        print(f"✅ Applied schema migration {target}")
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def create_tables(conn):
     cur = conn.cursor()
 
     # Depots table
@@ -46,6 +82,13 @@ def create_db(db_path="data/delivery_system.sqlite"):
     """)
 
     conn.commit()
+
+
+def create_db(db_path="data/delivery_system.sqlite"):
+    os.makedirs("data", exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    create_tables(conn)
+    apply_migrations(conn)
     conn.close()
     print("✅ SQLite database initialized at:", db_path)
 
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules import each other from scripts/ (core.*, bench.*), as when run from that directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,32 @@
+import numpy as np
+from core.astar_engine import BLOCKED_COST
+from core.components import load_or_build_components, update_components
+
+
+def test_regenerated_grid_is_relabelled(tmp_path):
+    grid_path = str(tmp_path / "cost_grid.npy")
+    grid = np.ones((6, 6))
+    np.save(grid_path, grid)
+    assert load_or_build_components(grid, grid_path).count == 1
+
+    # Same shape, new content: a wall splits the grid in two
+    grid[:, 3] = BLOCKED_COST
+    np.save(grid_path, grid)
+    components = load_or_build_components(grid, grid_path)
+    assert components.count == 2 and not components.reachable((0, 0), (0, 5))
+
+
+def test_cost_only_patch_keeps_labels_current(tmp_path, capsys):
+    grid_path = str(tmp_path / "cost_grid.npy")
+    grid = np.ones((6, 6))
+    np.save(grid_path, grid)
+    components = load_or_build_components(grid, grid_path)
+
+    old_block = grid[1:3, 1:3].copy()
+    grid[1:3, 1:3] = 5.0
+    np.save(grid_path, grid)
+    update_components(grid_path, 1, 1, old_block, grid[1:3, 1:3])
+    capsys.readouterr()
+    # Still valid for the patched grid, so loading does not relabel
+    assert load_or_build_components(grid, grid_path).count == components.count
+    assert "labelled" not in capsys.readouterr().out
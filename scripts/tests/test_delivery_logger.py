@@ -0,0 +1,67 @@
+import sqlite3
+import time
+import pytest
+from core.delivery_logger import DeliveryLogWriter, sqlite_log_connection
+
+
+def add_legs(writer, count):
+    for i in range(count):
+        writer.add(f"drone_{i}", "delivery", 0.0, 0.0, 1.0, 1.0, 1.0, 2, 3.0)
+
+
+def logged(conn):
+    return conn.execute("SELECT COUNT(*) FROM delivery_logs").fetchone()[0]
+
+
+def test_quiet_writer_is_flushed_by_timer():
+    conn = sqlite_log_connection()
+    writer = DeliveryLogWriter(conn, max_delay_s=0.05)
+    add_legs(writer, 3)
+    deadline = time.monotonic() + 5
+    while writer.pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert logged(conn) == 3 and writer.oldest_pending is None
+
+
+class FailingConnection:
+    """Wraps a SQLite connection; the cursor's `fail_on`-th execute raises."""
+
+    def __init__(self, conn, fail_on):
+        self.conn = conn
+        self.fail_on = fail_on
+        self.executes = 0
+
+    def cursor(self):
+        cursor = self.conn.cursor()
+        outer = self
+
+        class Cursor:
+            def execute(self, query, params):
+                outer.executes += 1
+                if outer.executes == outer.fail_on:
+                    raise sqlite3.OperationalError("connection lost")
+                return cursor.execute(query, params)
+
+            def fetchall(self):
+                return cursor.fetchall()
+
+        return Cursor()
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        pass
+
+
+def test_failed_flush_keeps_only_unwritten_legs():
+    conn = sqlite_log_connection()
+    writer = DeliveryLogWriter(FailingConnection(conn, fail_on=2), max_delay_s=60)
+    add_legs(writer, 5)
+    # Written two per INSERT; the second INSERT fails
+    writer.batch_size = 2
+    with pytest.raises(sqlite3.OperationalError):
+        writer.flush()
+    assert logged(conn) == 2 and len(writer.pending) == 3
+    writer.close()
+    assert logged(conn) == 5 and writer.rows_written == 5
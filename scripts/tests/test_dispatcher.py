@@ -0,0 +1,48 @@
+import numpy as np
+from core.dispatcher import FleetDispatcher
+
+HUB = (0, 0)
+CELL_SIZE = 100.0
+
+
+def order(order_id, pickup, dropoff):
+    # The test index treats lat/lon as row/col
+    return {"order_id": order_id, "pickup": {"lat": pickup[0], "lon": pickup[1]},
+            "dropoff": {"lat": dropoff[0], "lon": dropoff[1]}}
+
+
+def dispatcher(drones):
+    return FleetDispatcher(drones, HUB, CELL_SIZE, lambda lat, lon: (int(lat), int(lon)))
+
+
+def drain(dispatcher, pool, max_rounds=100):
+    # The main loop of find_path_sqlite.py without the flying: assign until the pool is empty
+    assigned = []
+    for _ in range(max_rounds):
+        if not pool:
+            return assigned
+        assignments, pool, unassignable = dispatcher.assign(pool)
+        assert not unassignable
+        assigned.extend(assignments)
+    raise AssertionError(f"{len(pool)} orders still pending after {max_rounds} rounds")
+
+
+def test_busy_long_range_drone_takes_orders_out_of_short_range():
+    # 2 km round trips: only the long-range drone can fly the far order, and it is busy for half an hour
+    drones = [{"id": "short", "speed_mps": 10, "range_km": 1.0}, {"id": "long", "speed_mps": 10, "range_km": 50.0}]
+    fleet = dispatcher(drones)
+    fleet.available_at[:] = [0.0, 1800.0]
+    assigned = drain(fleet, [order(1, (5, 0), (10, 0))])
+    assert [(a[0]["order_id"], a[1], a[2]) for a in assigned] == [(1, 1, 1800.0)]
+
+
+def test_mixed_range_fleet_drains_every_order():
+    rng = np.random.default_rng(0)
+    drones = [{"id": i, "speed_mps": 10, "range_km": 2.0 if i % 2 else 40.0} for i in range(4)]
+    fleet = dispatcher(drones)
+    pool = [order(i, tuple(rng.integers(0, 60, 2)), tuple(rng.integers(0, 60, 2))) for i in range(30)]
+    assigned = drain(fleet, pool)
+    assert sorted(a[0]["order_id"] for a in assigned) == list(range(30))
+    for delivery, drone_index, _, _ in assigned:
+        reach = fleet.trip_costs([delivery])[1][0] * CELL_SIZE
+        assert reach <= drones[drone_index]["range_km"] * 1000
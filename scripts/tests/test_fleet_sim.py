@@ -0,0 +1,21 @@
+from core.dispatcher import BATCH_ORDERS_PER_DRONE
+from core.fleet_sim import FleetSimulation
+from test_dispatcher import dispatcher, order
+
+
+def test_idle_short_range_drone_is_not_starved_by_far_orders():
+    # 1 km range covers the near order's round trip, not the far ones (12 km)
+    drones = [{"id": "long", "speed_mps": 10, "range_km": 50.0}, {"id": "short", "speed_mps": 10, "range_km": 1.0}]
+    far = [order(f"far-{i}", (50, 0), (60, 0)) for i in range(2 * BATCH_ORDERS_PER_DRONE + 1)]
+    deliveries = [dict(d, created_s=0.0) for d in far + [order("near", (2, 0), (3, 0))]]
+    flown = []
+
+    def flight_time(delivery, drone, estimate):
+        flown.append((delivery["order_id"], drone["id"]))
+        return estimate
+
+    stats = FleetSimulation(dispatcher(drones), flight_time).run(deliveries)
+    assert stats["served"] == len(deliveries)
+    # Both drones leave at t=0: the near order is not queued behind every far one
+    assert ("near", "short") in flown[:2]
+    assert stats["flights_per_drone"] == [len(far), 1]
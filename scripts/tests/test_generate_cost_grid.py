@@ -0,0 +1,67 @@
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from core.astar_engine import BLOCKED_COST, astar
+from core.generate_cost_grid import COST_GRID_PATH, build_cost_grid, build_cost_grid_chunked, update_cost_grid_window
+
+# 40x40 DEM, 0.01 degree cells with the top-left corner at (lat 50, lon 10)
+TRANSFORM = from_origin(10.0, 50.0, 0.01, 0.01)
+
+
+def write_dem(path, elevation):
+    with rasterio.open(path, "w", driver="GTiff", height=elevation.shape[0], width=elevation.shape[1], count=1,
+                       dtype="float32", transform=TRANSFORM, nodata=-9999.0) as dst:
+        dst.write(elevation.astype(np.float32), 1)
+
+
+def test_window_update_matches_full_rebuild(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    elevation = rng.normal(0, 1, (40, 40))
+    # The steepest slope stays outside the update, so both runs normalize with the same scale
+    elevation[30:, 30:] += 50
+    write_dem("dem.tif", elevation)
+    build_cost_grid("dem.tif")
+
+    # Raise rows/cols 10:15, the last one touching the edge of the box
+    elevation[10:15, 10:15] += 5
+    write_dem("dem.tif", elevation)
+    row0, col0, block = update_cost_grid_window(49.85, 49.9, 10.1, 10.15, "dem.tif")
+    patched = np.load(COST_GRID_PATH)
+
+    rebuilt = build_cost_grid("dem.tif")
+    assert (row0, col0) == (9, 9) and block.shape == (7, 7)
+    np.testing.assert_allclose(patched, rebuilt, rtol=1e-6)
+
+
+def test_chunked_build_matches_full_build(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    elevation = np.random.default_rng(1).normal(0, 10, (40, 40))
+    elevation[3, 4] = -9999.0
+    write_dem("dem.tif", elevation)
+    monkeypatch.setattr("core.generate_cost_grid.load_no_fly_zones", lambda: [
+        {"min_lat": 49.77, "max_lat": 49.85, "min_lon": 10.1, "max_lon": 10.2}])
+    full = build_cost_grid("dem.tif")
+    assert (full[15:23, 10:20] == BLOCKED_COST).all()
+
+    # 7 rows per block leaves a short last block, and block edges fall inside the no-fly zone
+    build_cost_grid_chunked("dem.tif", "chunked/cost_grid.npy", chunk_rows=7, workers=2)
+    chunked = np.load("chunked/cost_grid.npy")
+    assert chunked.dtype == full.dtype
+    assert np.array_equal(chunked, full)
+
+
+def test_window_update_invalidates_the_cached_search_grid(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_dem("dem.tif", np.zeros((40, 40)))
+    build_cost_grid("dem.tif")
+    grid = np.load(COST_GRID_PATH, mmap_mode="r")
+    _, before = astar(grid, (5, 0), (5, 39))
+
+    # A no-fly zone (or any patch) applied by the same process must reach the next search on `grid`
+    monkeypatch.setattr("core.generate_cost_grid.load_no_fly_zones", lambda: [
+        {"min_lat": 49.8, "max_lat": 50.0, "min_lon": 10.195, "max_lon": 10.205}])
+    update_cost_grid_window(49.8, 50.0, 10.195, 10.205, "dem.tif")
+    _, after = astar(grid, (5, 0), (5, 39))
+    assert before < after < float("inf")
+    assert after == astar(np.load(COST_GRID_PATH), (5, 0), (5, 39))[1]
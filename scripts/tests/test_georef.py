@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from rasterio.transform import from_origin, rowcol
+from core.georef import GeoReference
+
+SHAPE = (40, 60)
+# 0.01 degrees is inexact in binary, 0.125 is exact, so pixel edges land on both sides of the floor
+TRANSFORMS = [from_origin(10.0, 50.0, 0.01, 0.01), from_origin(-3.5, 51.25, 0.125, 0.125)]
+
+
+def points(transform, seed=0):
+    """Random (lats, lons) over the grid and a 5-cell margin around it, followed by every pixel corner."""
+    rng = np.random.default_rng(seed)
+    cols = np.concatenate([rng.uniform(-5, SHAPE[1] + 5, 500), np.tile(np.arange(SHAPE[1] + 1), SHAPE[0] + 1)])
+    rows = np.concatenate([rng.uniform(-5, SHAPE[0] + 5, 500), np.repeat(np.arange(SHAPE[0] + 1), SHAPE[1] + 1)])
+    lons, lats = transform * (cols, rows)
+    return lats, lons
+
+
+@pytest.mark.parametrize("transform", TRANSFORMS)
+def test_rowcol_and_index_match_rasterio(transform):
+    georef = GeoReference(transform, SHAPE)
+    lats, lons = points(transform)
+    expected_rows, expected_cols = rowcol(transform, lons, lats)
+
+    rows, cols = georef.rowcol(lats, lons)
+    np.testing.assert_array_equal(rows, expected_rows)
+    np.testing.assert_array_equal(cols, expected_cols)
+    rows, cols = georef.index(lons, lats)
+    np.testing.assert_array_equal(rows, expected_rows)
+    np.testing.assert_array_equal(cols, expected_cols)
+    # The scalar fast path rounds the same way
+    assert [georef.index(float(x), float(y)) for x, y in zip(lons, lats)] == list(zip(expected_rows, expected_cols))
+
+
+@pytest.mark.parametrize("transform", TRANSFORMS)
+def test_locate_flags_off_grid_points(transform):
+    georef = GeoReference(transform, SHAPE)
+    lats, lons = points(transform, seed=1)
+    expected_rows, expected_cols = rowcol(transform, lons, lats)
+
+    rows, cols, inside = georef.locate(lats, lons)
+    np.testing.assert_array_equal(rows, expected_rows)
+    np.testing.assert_array_equal(cols, expected_cols)
+    on_grid = (expected_rows >= 0) & (expected_rows < SHAPE[0]) & (expected_cols >= 0) & (expected_cols < SHAPE[1])
+    np.testing.assert_array_equal(inside, on_grid)
+    # The margin puts points off every side; the far corners' edges belong to the next row/col, off the grid
+    assert not on_grid.all() and on_grid.any()
+    assert not inside[-1] and inside[500]
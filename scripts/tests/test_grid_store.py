@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from bench.terrain import query_set, synthetic_cost
+from core.astar_engine import BLOCKED_LEVEL, astar, astar_tiled
+from core.grid_store import (
+    TiledCostGrid, begin_artifact, grid_fingerprint, load_current_artifact, write_tiled_grid,
+)
+from core.hpa import HPAGraph, hpa_dir, load_or_build_hpa_graph
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.uint8])
+def test_astar_tiled_matches_astar_with_partial_edge_tiles(tmp_path, dtype):
+    # 50x45 with 16-cell tiles leaves a partial last tile in both directions
+    grid = np.rint(synthetic_cost("lakes", 64, seed=3)[:50, :45]).astype(dtype)
+    write_tiled_grid(grid, str(tmp_path), tile_size=16)
+    tiled = TiledCostGrid(str(tmp_path))
+    costs = grid.astype(np.float64)
+    for start, goal in query_set(costs, 9, seed=3):
+        path, cost = astar(costs, start, goal)
+        tiled_path, tiled_cost = astar_tiled(tiled, start, goal)
+        assert tiled_cost == pytest.approx(cost)
+        assert np.array_equal(tiled_path, path)
+
+
+def test_integer_tiles_are_padded_as_blocked(tmp_path):
+    write_tiled_grid(np.ones((20, 20), dtype=np.uint8), str(tmp_path), tile_size=16)
+    tiles = TiledCostGrid(str(tmp_path)).tiles
+    assert tiles.dtype == np.uint8
+    assert (tiles[1, 1, 4:, :] == BLOCKED_LEVEL).all() and (tiles[1, 1, :4, :4] == 1).all()
+
+
+def test_non_numeric_tiles_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="float or integer"):
+        write_tiled_grid(np.ones((4, 4), dtype=bool), str(tmp_path), tile_size=2)
+
+
+def test_artifacts_reload_only_for_the_grid_they_were_built_from(tmp_path):
+    grid = np.rint(synthetic_cost("fractal", 32, seed=1))
+    grid_path = str(tmp_path / "cost_grid.npy")
+    graph = load_or_build_hpa_graph(grid, grid_path, cluster_size=8)
+    directory = hpa_dir(grid_path)
+    fingerprint = grid_fingerprint(grid)
+    assert load_current_artifact(directory, HPAGraph.load, fingerprint) is not None
+    assert load_current_artifact(directory, HPAGraph.load, fingerprint, lambda meta: meta["cluster_size"] == 16) is None
+    grid[0, 0] += 1
+    assert load_current_artifact(directory, HPAGraph.load, grid_fingerprint(grid)) is None
+
+    # A rewrite retires the old metadata first, so an interrupted one reads as missing rather than current
+    begin_artifact(directory)
+    assert load_current_artifact(directory, HPAGraph.load, fingerprint) is None
+    graph.save(directory, fingerprint)
+    assert np.array_equal(load_current_artifact(directory, HPAGraph.load, fingerprint).nodes, graph.nodes)
@@ -0,0 +1,60 @@
+import sqlite3
+from multiprocessing import Pool
+from order_manager import OrderRepository
+from setup_local_db import MIGRATIONS, apply_migrations, create_tables
+
+
+def new_orders(count):
+    return [{"customer_id": f"C{i:03d}", "store_name": "store", "pickup_lat": 45.5, "pickup_lon": -122.6,
+             "dropoff_lat": 45.6, "dropoff_lon": -122.7} for i in range(count)]
+
+
+def statuses(repository):
+    return dict(repository.conn.execute("SELECT order_id, status FROM orders").fetchall())
+
+
+def test_migrations_are_idempotent(tmp_path):
+    conn = sqlite3.connect(tmp_path / "orders.sqlite")
+    create_tables(conn)
+    assert apply_migrations(conn) == MIGRATIONS[-1][0] == 2
+    # A second run (or a second process) finds nothing left to do
+    assert apply_migrations(conn) == 2
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(orders)")]
+    assert columns.count("claimed_by") == 1 and columns.count("claimed_at") == 1
+    # Repositories migrate on open; one over an up-to-date db changes nothing
+    OrderRepository(str(tmp_path / "orders.sqlite")).close()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 2
+
+
+def claim_all(db_path, name):
+    # One simulator process: claim small batches until the queue is empty
+    repository = OrderRepository(db_path)
+    claimed = []
+    while rows := repository.claim_pending_orders(7, claimed_by=name):
+        claimed.extend(row[0] for row in rows)
+    repository.close()
+    return claimed
+
+
+def test_concurrent_claims_never_share_an_order(tmp_path):
+    db_path = str(tmp_path / "orders.sqlite")
+    order_ids = OrderRepository(db_path).insert_orders(new_orders(300))
+    with Pool(4) as pool:
+        claims = pool.starmap(claim_all, [(db_path, f"sim-{i}") for i in range(4)])
+    claimed = [order_id for claim in claims for order_id in claim]
+    assert len(claimed) == len(set(claimed)) and set(claimed) == set(order_ids)
+
+
+def test_release_puts_claims_back_to_pending(tmp_path):
+    repository = OrderRepository(str(tmp_path / "orders.sqlite"))
+    repository.insert_orders(new_orders(5))
+    claimed = [row[0] for row in repository.claim_pending_orders(3)]
+    repository.mark_orders_delivered(claimed[:1])
+    repository.release_orders(claimed)
+    status = statuses(repository)
+    # Delivered orders stay delivered; only the ones still in flight go back
+    assert status[claimed[0]] == "delivered"
+    assert all(status[order_id] == "pending" for order_id in claimed[1:])
+    assert repository.conn.execute("SELECT COUNT(*) FROM orders WHERE claimed_by IS NOT NULL AND status = 'pending'"
+                                   ).fetchone()[0] == 0
+    assert len(repository.claim_pending_orders(10)) == 4
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from core.astar_engine import astar, astar_bidirectional
+from core.path_cache import PathCache
+from core.planner import LegPlanner, planner_mode
+
+
+def test_modes_do_not_share_legs(tmp_path):
+    path = np.array([[0, 0], [1, 1]])
+    approximate = PathCache("grid", planner_mode(pyramid=object()), cache_dir=tmp_path)
+    approximate.put((0, 0), (1, 1), path, 3.5)
+    assert PathCache("grid", planner_mode(), cache_dir=tmp_path).get((0, 0), (1, 1)) is None
+    assert PathCache("grid", planner_mode(on_unreachable="snap"), cache_dir=tmp_path).get((0, 0), (1, 1)) is None
+    cached_path, cost = PathCache("grid", planner_mode(pyramid=object()), cache_dir=tmp_path).get((0, 0), (1, 1))
+    assert cost == 3.5 and np.array_equal(cached_path, path)
+
+
+def test_new_fingerprint_drops_old_grids(tmp_path):
+    PathCache("old", planner_mode(), cache_dir=tmp_path).put((0, 0), (1, 1), None, float("inf"))
+    PathCache("new", planner_mode(), cache_dir=tmp_path)
+    assert [p.name for p in tmp_path.iterdir()] == ["new"]
+
+
+def test_planner_rejects_cache_of_another_mode(tmp_path):
+    grid = np.ones((4, 4))
+    cache = PathCache("grid", planner_mode(engine=astar), cache_dir=tmp_path)
+    with pytest.raises(ValueError):
+        LegPlanner(grid, path_cache=cache, engine=astar_bidirectional)
+    assert LegPlanner(grid, path_cache=cache).mode == cache.mode == "astar-reject"
@@ -0,0 +1,58 @@
+import asyncio
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from core.astar_engine import BLOCKED_COST, astar
+from core.components import UnreachableError
+from core.planner_service import PlannerClient, PlannerService
+
+
+@pytest.fixture(scope="module")
+def service(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("service")
+    grid = np.random.default_rng(0).uniform(1, 5, (12, 12))
+    # A wall cuts off the last two columns
+    grid[:, 9] = BLOCKED_COST
+    grid_path = str(tmp_path / "cost_grid.npy")
+    np.save(grid_path, grid)
+    socket_path = str(tmp_path / "planner.sock")
+    service = PlannerService(grid_path, meta_path=str(tmp_path / "missing.json"), hub=(0, 0), workers=1,
+                             cache_dir=str(tmp_path / "cache"))
+    threading.Thread(target=asyncio.run, args=(service.serve(socket_path),), daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not os.path.exists(socket_path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield grid, socket_path
+    service.close()
+
+
+def test_plan_round_trip(service):
+    grid, socket_path = service
+    with PlannerClient(socket_path) as client:
+        path, cost = client.plan((0, 0), (11, 8))
+    expected_path, expected_cost = astar(grid, (0, 0), (11, 8))
+    assert cost == pytest.approx(expected_cost)
+    assert np.array_equal(path, expected_path)
+
+
+def test_resolve_and_unreachable(service):
+    _, socket_path = service
+    with PlannerClient(socket_path) as client:
+        assert client.resolve((0, 0), (5, 5)) == ((0, 0), (5, 5))
+        with pytest.raises(UnreachableError):
+            client.resolve((0, 0), (5, 11))
+        with pytest.raises(UnreachableError):
+            client.plan((0, 0), (5, 11))
+
+
+@pytest.mark.parametrize("cell", [(-1, 0), (0, -3), (12, 0), (0, 40)])
+def test_cells_off_the_grid_are_bad_requests(service, cell):
+    _, socket_path = service
+    with PlannerClient(socket_path) as client:
+        for op in ("plan", "resolve"):
+            with pytest.raises(RuntimeError, match="bad_request"):
+                client.request(op=op, start=list(cell), goal=[1, 1])
+        # The connection stays usable
+        assert client.resolve((0, 0), (1, 1)) == ((0, 0), (1, 1))
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from bench.terrain import query_set, synthetic_cost
+from core.astar_engine import SearchGrid, astar, astar_bidirectional
+from core.cost_field import HubCostField
+from core.quantized import QuantizedCostGrid
+
+
+@pytest.fixture(scope="module", params=["lakes", "fractal"])
+def terrain(request):
+    grid = synthetic_cost(request.param, 64, 1)
+    return grid, QuantizedCostGrid.build(grid), query_set(grid, 10, 1)
+
+
+def test_quantized_cost_close_to_float_cost(terrain):
+    grid, quantized, legs = terrain
+    exact, fixed = SearchGrid(grid), SearchGrid(quantized)
+    for start, goal in legs:
+        path, cost = astar(exact, start, goal)
+        quantized_path, quantized_cost = astar(fixed, start, goal)
+        # Each cell is off by at most max_error, each step is at most a diagonal
+        steps = max(len(path), len(quantized_path))
+        assert abs(quantized_cost - cost) <= quantized.max_error(grid) * 1.415 * steps
+
+
+def test_quantized_engines_agree(terrain):
+    _, quantized, legs = terrain
+    search_grid = SearchGrid(quantized)
+    for start, goal in legs:
+        assert astar_bidirectional(search_grid, start, goal)[1] == astar(search_grid, start, goal)[1]
+
+
+def test_quantized_hub_field_matches_astar(terrain):
+    _, quantized, legs = terrain
+    search_grid = SearchGrid(quantized)
+    hub = legs[0][0]
+    field = HubCostField.build(quantized, hub)
+    for _, goal in legs:
+        assert field.path_from_hub(goal)[1] == astar(search_grid, hub, goal)[1]
+        assert field.path_to_hub(goal)[1] == astar(search_grid, goal, hub)[1]
@@ -0,0 +1,142 @@
+import heapq
+import numpy as np
+import pytest
+from bench.terrain import query_set, synthetic_cost
+from core.astar_engine import BLOCKED_COST, MOVES, SearchGrid, astar, astar_bidirectional
+from core.cost_field import HubCostField
+from core.dstar_lite import FlightReplanner
+from core.landmarks import Landmarks
+from core.path_store import PathStore, PathStoreWriter, decode_path, encode_path
+
+
+def reference_costs(grid, start):
+    """Plain Dijkstra from `start` over the planner's cost model: a move costs the entered cell times its step."""
+    h, w = grid.shape
+    dist = np.full((h, w), np.inf)
+    dist[start] = 0.0
+    heap = [(0.0, start)]
+    while heap:
+        d, (row, col) = heapq.heappop(heap)
+        if d > dist[row, col]:
+            continue
+        for d_row, d_col, step in MOVES:
+            r, c = row + d_row, col + d_col
+            if 0 <= r < h and 0 <= c < w and grid[r, c] < BLOCKED_COST and d + grid[r, c] * step < dist[r, c]:
+                dist[r, c] = d + grid[r, c] * step
+                heapq.heappush(heap, (dist[r, c], (r, c)))
+    return dist
+
+
+def path_cost(grid, path):
+    return sum(grid[r, c] * (1.414 if r != pr and c != pc else 1) for (pr, pc), (r, c) in zip(path[:-1], path[1:]))
+
+
+def random_grid(kind, seed, size=16):
+    rng = np.random.default_rng(seed)
+    if kind == "near_flat":
+        # Costs just above the minimum of 1, where an overestimating heuristic shows on long diagonals
+        return np.where(rng.random((size, size)) < 0.5, 1.0, 1 + rng.choice([0.001, 0.005, 0.01, 0.02], (size, size)))
+    grid = rng.uniform(1, 10, (size, size))
+    grid[rng.random((size, size)) < 0.2] = BLOCKED_COST
+    return grid
+
+
+@pytest.mark.parametrize("kind", ["rough", "near_flat"])
+@pytest.mark.parametrize("seed", range(1, 4))
+def test_astar_matches_dijkstra(kind, seed):
+    grid = random_grid(kind, seed)
+    search_grid = SearchGrid(grid)
+    for start in [(0, 0), (3, 11), (15, 4)]:
+        dist = reference_costs(grid, start)
+        for goal in np.ndindex(grid.shape):
+            path, cost = astar(search_grid, start, goal)
+            if not np.isfinite(dist[goal]):
+                assert path is None and cost == float("inf")
+                continue
+            assert cost == pytest.approx(dist[goal], rel=1e-9)
+            assert tuple(path[0]) == start and tuple(path[-1]) == goal
+            assert np.abs(np.diff(path, axis=0)).max(initial=0) <= 1
+            assert all(grid[r, c] < BLOCKED_COST for r, c in path[1:])
+            assert path_cost(grid, path) == pytest.approx(cost, rel=1e-9)
+
+
+@pytest.fixture(scope="module")
+def terrain():
+    grid = synthetic_cost("lakes", 64, 3)
+    return grid, query_set(grid, 12, 3)
+
+
+def test_exact_engines_match_astar(terrain):
+    grid, legs = terrain
+    search_grid = SearchGrid(grid)
+    landmarks = Landmarks.build(grid, count=4)
+    for start, goal in legs:
+        cost = astar(search_grid, start, goal)[1]
+        assert astar_bidirectional(search_grid, start, goal)[1] == pytest.approx(cost)
+        assert landmarks.search(search_grid, start, goal)[1] == pytest.approx(cost)
+
+
+def test_hub_field_matches_astar(terrain):
+    grid, legs = terrain
+    search_grid = SearchGrid(grid)
+    hub = legs[0][0]
+    field = HubCostField.build(grid, hub)
+    for _, goal in legs:
+        assert field.path_from_hub(goal)[1] == pytest.approx(astar(search_grid, hub, goal)[1])
+        assert field.path_to_hub(goal)[1] == pytest.approx(astar(search_grid, goal, hub)[1])
+
+
+def test_dstar_lite_repair_matches_fresh_astar(terrain):
+    grid, legs = terrain
+    replanner = FlightReplanner(grid)
+    positions = {}
+    for flight_id, (start, goal) in enumerate(legs):
+        path, _ = replanner.add(flight_id, start, goal)
+        positions[flight_id] = tuple(int(v) for v in path[len(path) // 3])
+        replanner.advance(flight_id, positions[flight_id])
+
+    updated = grid.copy()
+    # A no-fly patch on one remaining path, then a cheaper strip that some legs should switch to
+    row, col = replanner.paths[0][0][2 * len(replanner.paths[0][0]) // 3]
+    row0, col0 = (int(np.clip(v - 3, 0, grid.shape[0] - 6)) for v in (row, col))
+    patches = [(row0, col0, np.full((6, 6), float(BLOCKED_COST))),
+               (40, 0, np.full((2, 64), 1.0))]
+    for row0, col0, block in patches:
+        updated[row0:row0 + block.shape[0], col0:col0 + block.shape[1]] = block
+        replanner.apply_update(row0, col0, block)
+        search_grid = SearchGrid(updated)
+        for flight_id, position in positions.items():
+            expected = astar(search_grid, position, legs[flight_id][1])[1]
+            assert replanner.legs[flight_id].plan()[1] == pytest.approx(expected)
+
+
+def test_path_store_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    path = np.cumsum(np.vstack([[[5, 7]], rng.integers(-1, 2, (50, 2))]), axis=0)
+    assert np.array_equal(decode_path(5, 7, encode_path(path)), path)
+    with pytest.raises(ValueError):
+        encode_path([[0, 0], [2, 0]])
+
+    with PathStoreWriter(str(tmp_path)) as writer:
+        writer.add("flight-1", "drone_001", 2, path[::-1], 4.0)
+        writer.add("flight-1", "drone_001", 1, path, 3.0)
+    store = PathStore(str(tmp_path))
+    assert [leg for leg, _ in store.flight("flight-1")] == [1, 2]
+    assert np.array_equal(store.flight("flight-1")[0][1], path)
+    assert np.array_equal(store.flight("flight-1")[1][1], path[::-1])
+
+
+def test_path_store_rejects_ids_that_do_not_fit(tmp_path):
+    path = np.array([[0, 0], [1, 1]])
+    with PathStoreWriter(str(tmp_path)) as writer:
+        writer.add("f" * 36, "d" * 32, 1, path, 1.4)
+        with pytest.raises(ValueError, match="drone_id"):
+            writer.add("flight-2", "d" * 33, 1, path, 1.4)
+        with pytest.raises(ValueError, match="flight_id"):
+            writer.add("f" * 37, "drone_001", 1, path, 1.4)
+        with pytest.raises(ValueError, match="not ASCII"):
+            writer.add("flight-3", "drône", 1, path, 1.4)
+    # Nothing rejected reached the segment, and the ids that just fit round-trip
+    store = PathStore(str(tmp_path))
+    assert len(store.index) == 1
+    assert np.array_equal(store.flight("f" * 36)[0][1], path)
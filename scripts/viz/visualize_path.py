@@ -1,33 +1,40 @@
-import json
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 import rasterio
 from rasterio.transform import Affine, xy
-import sys
+from core.path_store import PATH_STORE_DIR, PathStore
 
-# Usage: python visualize_path.py path_to_json elevation.tif
-if len(sys.argv) != 3:
-    print("Usage: python visualize_path.py <path_json> <elevation_tif>")
-    sys.exit(1)
+# Usage: python viz/visualize_path.py <flight_id> data/raw/elevation.tif [--leg 2]
+parser = argparse.ArgumentParser(description="Animate a stored delivery flight over the elevation map")
+parser.add_argument("flight_id")
+parser.add_argument("elevation_tif")
+parser.add_argument("--leg", type=int, default=None, help="Only show this leg (default: the whole flight)")
+parser.add_argument("--store", default=PATH_STORE_DIR, help="Path store directory")
+args = parser.parse_args()
 
-path_file = sys.argv[1]
-elevation_file = sys.argv[2]
+elevation_file = args.elevation_tif
 
-# Load path and transform
-with open(path_file) as f:
-    data = json.load(f)
-    path = data["path"]
-    transform = Affine.from_gdal(*data["transform"])
+# Load path (memory-mapped) and transform
+store = PathStore(args.store)
+legs = [path for leg, path in store.flight(args.flight_id) if args.leg in (None, leg)]
+if not legs:
+    print(f"No stored path for flight {args.flight_id}")
+    sys.exit(1)
+path = np.concatenate(legs)
 
 # Load elevation
 with rasterio.open(elevation_file) as src:
     elevation = src.read(1)
     bounds = src.bounds
+    transform = Affine.from_gdal(*store.transform) if store.transform else src.transform
 
 # Convert path (row, col) to real-world coords
-coords = [xy(transform, row, col) for row, col in path]
-x_vals, y_vals = zip(*coords)
+x_vals, y_vals = xy(transform, path[:, 0], path[:, 1])
 
 # Plot setup
 fig, ax = plt.subplots(figsize=(10, 10))